@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import importlib
+
+# Qt free core package of the dsp algorithm: all modules of the engine
+# (audio3d.engine.dsp, dsp_in, dsp_out, dsp_state, ...) only need numpy and
+# scipy, the gui modules of audio3d import them. Entry point for programs
+# which embed the renderer, e.g.:
+#
+#     import audio3d.engine as engine
+#     state = engine.DspState().configure([{"path": "speech.wav"}])
+#     engine.Dsp(state).run()
+#
+# Importing this package imports nothing else: every name below is imported
+# from its module at its first use, so a service which only renders offline
+# never loads the PortAudio backend and no name ever loads PySide, OpenGL
+# or the head tracker.
+exports = {"DspState": "audio3d.engine.dsp_state",
+           "Scene": "audio3d.engine.dsp_state",
+           "Dsp": "audio3d.engine.dsp",
+           "AsyncEngine": "audio3d.engine.dsp_async",
+           "OfflineRenderer": "audio3d.engine.dsp_offline",
+           "load_scene": "audio3d.engine.dsp_offline",
+           "BatchRenderer": "audio3d.engine.dsp_batch",
+           "load_manifest": "audio3d.engine.dsp_batch",
+           "create_backend": "audio3d.engine.dsp_backend",
+           "NullBackend": "audio3d.engine.dsp_backend",
+           "FileBackend": "audio3d.engine.dsp_backend",
+           "WavBackend": "audio3d.engine.dsp_backend",
+           "PortAudioBackend": "audio3d.engine.dsp_backend",
+           "Metrics": "audio3d.engine.dsp_metrics",
+           "resource_filename": "audio3d.engine.dsp_resources"}
+__all__ = sorted(exports)
+
+
+def __getattr__(name):
+    """
+    H2 -- __getattr__
+    ===================
+    **Imports the exported name from its module at its first use.**
+
+    Author: Felix Pfreundtner
+    """
+    if name not in exports:
+        raise AttributeError("module 'audio3d.engine' has no attribute "
+                             + repr(name))
+    value = getattr(importlib.import_module(exports[name]), name)
+    # later uses find the name without __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,871 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_in
+import audio3d.engine.dsp_out
+import audio3d.engine.dsp_buffer
+import audio3d.engine.dsp_metrics
+import audio3d.engine.dsp_multiproc
+import audio3d.engine.dsp_stream
+import audio3d.engine.dsp_threads
+import numpy as np
+import collections
+import threading
+import time
+
+
+class Dsp:
+    """
+    Dsp
+    ************************
+    **Main class of the project's Digital Signal Processing part.**
+
+    This class holds variables and methods which enable the build of the
+    binaural output. It holds one instance of the DspIn and DspOut class.
+    The run() function is called by GUI Main Window as Thread and generates
+    block by block a binaural audio output and sends it to a playback queue
+    which is read by a PortAudio Callback Thread. To reach a higher
+    performance the __init__ of the DspIn and DspOut class perform many time
+    intensive calculations before starting the run() function of this class.
+    """
+    def __init__(self, state_init):
+        """
+        **__init__ is called by GUI MainWindow and creates all variables which
+        are relevant for the run()method's while loop. It also creates one
+        instance of the DspIn and DspOut class,  which provides all functions
+        and variables need to generate the binaural block output.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.state = state_init
+        # publish the current speakers and settings: the dsp thread renders
+        # every block with the newest snapshot published by the gui
+        self.scene = state_init.publish_scene()
+        # Number of all speakers
+        self.spn = len(self.state.gui_sp)
+        # Azimuth head angle which was convolved in prior iteration for every
+        # speaker
+        self.prior_head_angle = np.full(self.spn, np.nan)
+        # Azimuth head angle of every speaker in the last scene snapshot: a
+        # changed angle in the scene replaces the angle of a parameter event
+        self.scene_head_angle = [self.scene.sp[sp]["angle"] for sp in
+                                 range(self.spn)]
+        # Angle changes of every speaker in the current block from parameter
+        # events: list of (sample in block, angle, crossfade samples), angle
+        # None for the same angle from a new hrtf database
+        self.hrtf_events = [[] for sp in range(self.spn)]
+        # Speakers which are added, removed or muted during playback:
+        # changes queued by add_speaker(), remove_speaker() and
+        # mute_speaker(), applied by the dsp thread before the next block
+        self.sp_changes = collections.deque()
+        # whether the slot of a speaker belongs to a removed speaker
+        self.sp_removed = np.zeros(self.spn, dtype=bool)
+        # removed speakers which are faded out in the current block
+        self.sp_removing = []
+        # slots of removed speakers which are taken by the next added
+        # speakers
+        self.free_slots = collections.deque()
+        # Set number of bufferblocks between fft block convolution and audio
+        # block playback
+        self.bufferblocks = state_init.gui_settings["bufferblocks"]
+        # Create Input Object which contains mono input samples of sources
+        # and hrtf impulse responses samples
+        self.dspin_obj = audio3d.engine.dsp_in.DspIn(state_init)
+        # Runtime performance counters, readable through
+        # state.dsp_metrics.snapshot() and optionally exported every
+        # metrics_interval seconds to the JSON lines file metrics_file
+        self.metrics = audio3d.engine.dsp_metrics.Metrics(
+            self.dspin_obj.hopsize / self.dspin_obj.samplerate)
+        self.state.dsp_metrics = self.metrics
+        self.metrics_exporter = None
+        if state_init.gui_settings.get("metrics_file") is not None:
+            self.metrics_exporter = audio3d.engine.dsp_metrics.MetricsExporter(
+                self.metrics, state_init.gui_settings["metrics_file"],
+                state_init.gui_settings.get("metrics_interval", 1.0))
+        # Create Output Object which contains binaural output samples
+        self.dspout_obj = audio3d.engine.dsp_out.DspOut(
+            state_init, self.dspin_obj.fft_blocksize, self.dspin_obj.hopsize,
+            self.metrics)
+        # preallocated arrays of crossfade_hrtf(): sample number of every
+        # sample of the binaural block output and per speaker the prior
+        # block, the block convolved with the new hrtfs and the fraction of
+        # its output
+        fft_blocksize = self.dspin_obj.fft_blocksize
+        self.crossfade_samples = np.repeat(np.arange(
+            fft_blocksize, dtype=np.float32)[:, np.newaxis], 2, axis=1)
+        self.sp_crossfade_prior = np.zeros((self.spn, fft_blocksize, 2),
+                                           dtype=np.float32)
+        self.sp_crossfade_block = np.zeros_like(self.sp_crossfade_prior)
+        self.sp_crossfade_fade = np.zeros_like(self.sp_crossfade_prior)
+        # Blockcounter initialized to count number of already convolved
+        # blocks
+        self.blockcounter = 0
+        # Pull mode: the PortAudio callback renders every block itself, as
+        # late as possible, instead of playing blocks rendered in advance.
+        # A block has to be rendered within pull_deadline (fraction of the
+        # block time) else the playback falls back to the queued mode.
+        if state_init.gui_settings.get("pull_mode", False) is True:
+            self.dspout_obj.pull_mode = True
+            self.dspout_obj.pull_render = self.render_pull
+            self.dspout_obj.pull_deadline = \
+                state_init.gui_settings.get("pull_deadline", 0.7) * \
+                self.dspin_obj.hopsize / self.dspin_obj.samplerate
+        # whether the PortAudio playback thread has been started
+        self.playthread_started = False
+        # the PortAudio playback thread, it ends with the playback
+        self.playthread = None
+        # Adaptive buffer depth: the number of blocks rendered in advance is
+        # adapted to the measured render time between bufferblocks_min and
+        # bufferblocks_max
+        self.buffer_controller = None
+        if state_init.gui_settings.get("adaptive_buffer", False) is True:
+            self.buffer_controller = \
+                audio3d.engine.dsp_buffer.BufferDepthController(
+                    self.dspin_obj.hopsize / self.dspin_obj.samplerate,
+                    self.bufferblocks,
+                    state_init.gui_settings.get("bufferblocks_min", 1),
+                    state_init.gui_settings.get("bufferblocks_max"))
+            self.dspout_obj.underrun_silence = True
+        # Sharded rendering: the speakers are split between
+        # gui_settings["render_processes"] worker processes, which render
+        # their binaural block output in parallel
+        self.sharded = None
+        if state_init.gui_settings.get("render_processes", 1) > 1:
+            # live sources can only be captured by one process
+            if any(audio3d.engine.dsp_stream.StreamSource.is_stream_path(
+                    sp["path"]) for sp in state_init.gui_sp):
+                self.state.send_error("Live sources can not be rendered "
+                                      "by several processes - rendering in "
+                                      "one process.")
+            else:
+                self.sharded = audio3d.engine.dsp_multiproc.ShardedRenderer(
+                    self, state_init.gui_settings["render_processes"])
+        # Threaded rendering: the speakers are rendered by a pool of
+        # gui_settings["render_threads"] persistent threads. With less than
+        # render_threads_min_speakers speakers the synchronisation of the
+        # threads costs more than it saves: the speakers are rendered
+        # serially until add_speaker() reaches this number.
+        self.threadpool = None
+        if self.sharded is None and \
+                state_init.gui_settings.get("render_threads", 1) > 1:
+            self.threadpool = audio3d.engine.dsp_threads.SpeakerThreadPool(
+                self.render_sps, self.spn,
+                state_init.gui_settings["render_threads"],
+                state_init.gui_settings.get("render_threads_min_speakers",
+                                            4))
+
+    def run(self):
+        """
+        run
+        ===================
+        **Runs the dsp algorithm.**
+
+        The method ist called as single processing
+        thread from gui_main_window. It uses a while loop, which generates
+        block by block a mixed binaural output for multiple input speaker
+        wave files. For this 3 hrtf databases can be chosen in Gui Main
+        Window. After the block buffer size, which can be specified in
+        gui_main_window, it generates a second thread which starts the playback
+        of the generated binaural blocks with PortAudio. The algorithm
+        can be stopped and paused through GUI Main Window by using a shared
+        state object. The speaker positions and settings are not locked: the
+        gui publishes them as immutable snapshots (see
+        DspState.publish_scene()) and every block is rendered with the
+        newest one.
+
+        | The steps of the while loop are:
+        | 1. Take the newest snapshot of the speakers and settings
+        | 2. Set the common begin and end sample position in the speaker wave
+          files input which needs to be read in this iteration.
+        | 3. Iterate over all speakers sp.
+        | 4. Read in current fitting hrtf for left and right ear and speaker
+          block input
+        | 5. Convolve hrtfs with speaker block input using fft and overlap add
+        | 6. Mix binaural stereo blockoutput of every speaker to one binaural
+          stereo block output having regard to speaker distances.
+        | 7. Add mixed binaural stereo block to play queue
+        | 8. Read play queue by PortAudio playback thread
+        | 9. If selected in GUI MainWindow: records the binaural output to a
+          wave file
+        | 10. Finish DSP Algorithm, reset play and pause button
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        # tell gui that dsp algorithm is running
+        self.state.dsp_run = True
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+        # If record box is checked: open the record file, the blocks are
+        # written during playback
+        if self.state.gui_settings["record"] is True:
+            self.dspout_obj.open_recordfile(self.dspin_obj.samplerate)
+        # pull mode: start playback at once and wait until the callback
+        # rendered the last block or fell back to the queued mode
+        if self.dspout_obj.pull_mode is True:
+            self.start_playthread()
+            self.state.wait_dsp(
+                lambda: self.dspout_obj.pull_mode is False or
+                any(self.dspout_obj.continue_convolution) is False)
+            # queued mode continues with the block after the last block
+            # rendered in pull mode (blockcounter is counted on by
+            # render_pull()) and after the last block played in pull mode
+            self.dspout_obj.prior_played_block_counter = \
+                self.dspout_obj.played_block_counter
+        # run the main while loop as long as there are still samples to be
+        # read from speaker wave files
+        while any(self.dspout_obj.continue_convolution) is True:
+            # render new binaural block
+
+            # handle playback stop: break convolution while loop
+            if self.state.dsp_stop is True:
+                break
+
+            # render the next binaural block and add it to play queue
+            # which is read by PortAudio Play Thread
+            render_begin = time.perf_counter()
+            self.render_block(self.blockcounter)
+            render_time = time.perf_counter() - render_begin
+
+            # Synchronize with PortAudio Playback Thread:
+
+            # Create PortAudio playback thread if specified number of
+            # bufferblocks has been convolved
+            if self.blockcounter == self.bufferblocks:
+                self.start_playthread()
+
+            # adapt the buffer depth: render one block more without waiting
+            # or wait for one more played block
+            if self.buffer_controller is not None and \
+                    self.playthread_started is True:
+                change = self.buffer_controller.update(
+                    render_time, self.dspout_obj.playring.fill_level(),
+                    self.dspout_obj.playring.underruns)
+                if change != 0:
+                    self.dspout_obj.prior_played_block_counter -= change
+                    self.state.dsp_buffer_status = \
+                        self.buffer_controller.metrics()
+
+            # when less blocks than the bufferblocksize has been convolved (
+            # playback thread not started yet).
+            if self.blockcounter <= self.bufferblocks:
+                # increment number of already convolved block iterations
+                self.blockcounter += 1
+            else:
+                # wait until the the new block has been played: the
+                # playback callback wakes up the dsp thread
+                self.state.wait_dsp(
+                    lambda: self.dspout_obj.played_block_counter >
+                    self.dspout_obj.prior_played_block_counter)
+                # increment number of last played block
+                self.dspout_obj.prior_played_block_counter += 1
+                # increment number of already convolved block iterations
+                self.blockcounter += 1
+
+            # handle playback pause: sleep until resume or stop
+            self.state.wait_dsp(lambda: self.state.dsp_pause is False)
+
+        # Finish DSP Algorithm:
+
+        # stop the render processes and threads
+        self.close_workers()
+        # stop capture of live sources and report their latency
+        self.dspin_obj.close_streams()
+        if any(stream is not None for stream in self.dspin_obj.sp_stream):
+            self.report_stream_latency()
+
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        # report the counters of the playback ring buffer
+        self.state.dsp_playback_status = self.dspout_obj.playback_status()
+        if self.buffer_controller is not None:
+            self.state.dsp_buffer_status = self.buffer_controller.metrics()
+
+        # If record box is checked: write remaining blocks and final header
+        if self.state.gui_settings["record"] is True:
+            self.dspout_obj.writerecordfile(self.dspin_obj.samplerate,
+                                            self.dspin_obj.hopsize)
+        # mark dsp algorithm as finished
+        self.state.dsp_run = False
+
+    def start_playthread(self):
+        """
+        start_playthread
+        ===================
+        **Creates and starts the PortAudio playback thread once.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.playthread_started is True:
+            return
+        playthread = threading.Thread(
+            target=self.dspout_obj.audiooutput, args=(
+                self.dspin_obj.samplerate,
+                self.dspin_obj.hopsize))
+        # Start PortAudio playback thread
+        playthread.start()
+        self.playthread = playthread
+        self.playthread_started = True
+
+    def render_block(self, blocknumber):
+        """
+        render_block
+        ===================
+        **Renders the next binaural block of all speakers and adds it to the
+        play queue.**
+
+        The method holds the steps 1 to 7 of the run() while loop. It is
+        called by the dsp thread in run() or, in pull mode, directly by the
+        PortAudio callback through render_pull(). blocknumber is the number
+        of the block in the playback, which is used to measure the latency
+        of live sources.
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        block_begin = time.perf_counter()
+        # take the newest speakers and settings published by the gui, they
+        # are kept for the whole block
+        self.update_scene()
+        hopsize = self.dspin_obj.hopsize
+        # add, remove and mute the speakers queued by the controller
+        if len(self.sp_changes) > 0:
+            self.apply_sp_changes()
+        # take the parameter events of the block and hand them to the
+        # speakers
+        self.state.dsp_events.rendered = blocknumber * hopsize
+        events = self.state.dsp_events.take((blocknumber + 1) * hopsize)
+        if len(events) > 0:
+            self.dispatch_events(events, blocknumber * hopsize)
+        # handle a seek requested by gui: jump to the new position
+        # before the block is read
+        seek = self.state.dsp_seek
+        if seek is not None:
+            self.state.dsp_seek = None
+            self.seek(seek)
+
+        # print the number of already done FFT / Block iterations
+        # print("FFT Block " + str(self.blockcounter) + ":")
+        # set the begin and end of the speaker wave block which needs to
+        # be read in this iteration
+        self.dspin_obj.set_block_begin_end()
+        # iterate over all active speakers sp
+        if self.sharded is not None:
+            # the speakers are rendered by the worker processes
+            self.sharded.render(blocknumber)
+        elif self.threadpool is not None:
+            # the speakers are rendered by the thread pool
+            self.threadpool.render(blocknumber)
+        else:
+            self.render_sps(range(self.spn), blocknumber)
+
+        # Mix binaural stereo blockoutput of every speaker to one
+        # binaural stereo block output having regard to speaker distances
+        stage_begin = time.perf_counter()
+        self.dspout_obj.mix_binaural_block(self.dspin_obj.hopsize)
+        stage_end = time.perf_counter()
+        self.metrics.record_stage("mix", stage_end - stage_begin)
+        # free the slots of removed speakers which are faded out
+        if len(self.sp_removing) > 0:
+            self.free_removed()
+
+        # Add mixed binaural stereo block to play queue which is read by
+        # PortAudio Play Thread
+        self.dspout_obj.add_to_playqueue()
+        block_end = time.perf_counter()
+        self.metrics.record_stage("queue", block_end - stage_end)
+        self.metrics.record_stage("block", block_end - block_begin)
+
+        # If record box is checked (record file opened in run()): Add mixed
+        # binaural stereo block to the record file which is written by the
+        # record writer thread
+        if self.dspout_obj.recordwriter is not None:
+            self.dspout_obj.add_to_recordqueue()
+
+    def render_sps(self, sps, blocknumber):
+        """
+        render_sps
+        ===================
+        **Renders the binaural block outputs of the range of speakers sps
+        (steps 4 and 5 of the run() while loop).**
+
+        The blocks of the speakers are read one after another, then they
+        are windowed, convolved and overlap added at once in the rows of
+        the speaker arrays of dspin_obj and dspout_obj. If only some of the
+        speakers are read, the speakers are convolved one by one. All
+        speakers are overlap added, also the ones whose convolution is
+        skipped, so they keep the position of the other speakers in the
+        accumulator of DspOut.overlap_add().
+
+        Author: Felix Pfreundtner
+        """
+        # speakers whose block is read and convolved
+        read = []
+        # speakers which only play the remaining block output of prior ffts
+        silent = []
+        # speakers whose convolution is skipped: their output is dropped
+        skipped = []
+        stage_begin = time.perf_counter()
+        for sp in sps:
+            sp_read = self.read_sp_block(sp, blocknumber)
+            if sp_read is True:
+                read.append(sp)
+            elif sp_read is False:
+                silent.append(sp)
+            else:
+                skipped.append(sp)
+        # convolve all speakers at once or every read speaker on its own
+        if len(read) == len(sps) and len(read) > 0:
+            read_rows = [sps]
+        else:
+            read_rows = read
+        for rows in read_rows:
+            # apply window to sp input in sp_block
+            self.dspin_obj.apply_window_on_sp_block(rows)
+        stage_end = time.perf_counter()
+        self.metrics.record_stage("read", stage_end - stage_begin)
+        stage_begin = stage_end
+        for rows in read_rows:
+            # convolve hrtfs with speaker block inputs to get binaural stereo
+            # block outputs
+            self.dspin_obj.fft_convolution_block(
+                rows, out=self.dspout_obj.sp_binaural_block[
+                    audio3d.engine.dsp_in.sp_rows(rows)])
+        # crossfade to the hrtfs of the parameter events of the block
+        for sp in read:
+            if len(self.hrtf_events[sp]) > 0:
+                self.crossfade_hrtf(sp)
+        stage_end = time.perf_counter()
+        self.metrics.record_stage("convolution", stage_end - stage_begin)
+        stage_begin = stage_end
+
+        # overlap and add binaural stereo block outputs of the speakers to
+        # their prior binaural stereo block outputs
+        for sp in silent + skipped:
+            self.dspout_obj.sp_binaural_block[sp] = 0
+        if len(sps) > 0:
+            self.dspout_obj.overlap_add(self.dspin_obj.fft_blocksize,
+                                        self.dspin_obj.hopsize, sps)
+        for sp in skipped:
+            self.dspout_obj.sp_binaural_block_out[sp] = 0
+        self.metrics.record_stage("overlap_add",
+                                  time.perf_counter() - stage_begin)
+
+    def read_sp_block(self, sp, blocknumber):
+        """
+        read_sp_block
+        ===================
+        **Loads the hrtfs and reads the normalized block of speaker sp for
+        render_sps().**
+
+        Return values:
+
+        * True if the block was read, False if the speaker only plays the
+          remaining block output of prior ffts and None if its convolution
+          is skipped
+
+        Author: Felix Pfreundtner
+        """
+        # if speaker wave file has no unread samples skip convolution
+        if not self.dspout_obj.continue_convolution[sp]:
+            self.hrtf_events[sp] = []
+            return None
+        # muted wave file which is faded out: its position follows the
+        # output clock, so it is neither read nor convolved
+        muted = bool(self.dspout_obj.sp_muted[sp]) and \
+            self.dspout_obj.sp_gain_ramp[sp].remaining == 0 and \
+            self.dspin_obj.sp_stream[sp] is None
+        # speaker starts after this block or is muted: skip reading and
+        # convolution, only the remaining block output of prior ffts is
+        # played
+        if self.dspin_obj.sp_active(sp) is False or muted is True:
+            if muted is True:
+                self.dspout_obj.continue_convolution[sp] = \
+                    not self.dspin_obj.sp_finished(sp)
+            # nothing to crossfade: only load the hrtfs of the events
+            for offset, angle, crossfade in self.hrtf_events[sp]:
+                if angle is None:
+                    angle = self.prior_head_angle[sp]
+                if not np.isnan(angle):
+                    self.dspin_obj.get_hrtf_block_fft(sp, angle)
+                    self.prior_head_angle[sp] = angle
+            self.hrtf_events[sp] = []
+            return False
+        # a changed angle in the scene replaces the angle of prior parameter
+        # events
+        angle = self.prior_head_angle[sp]
+        if self.scene.sp[sp]["angle"] != self.scene_head_angle[sp] or \
+                np.isnan(angle):
+            angle = self.scene.sp[sp]["angle"]
+            self.scene_head_angle[sp] = angle
+        # check whether head position to speaker sp has changed
+        if angle != self.prior_head_angle[sp]:
+            stage_begin = time.perf_counter()
+            # if yes, load new fitting hrtf frequency values
+            self.dspin_obj.get_hrtf_block_fft(sp, angle)
+            # save head position to speaker of this block in
+            # prior_head_angle
+            self.prior_head_angle[sp] = angle
+            self.metrics.record_stage("hrtf",
+                                      time.perf_counter() - stage_begin)
+            self.metrics.record_hrtf_switch()
+
+        # Load wave block of speaker sp with speaker_blocksize (
+        # fft_blocksize-hrtf_blocksize+1) and current block begin_end
+        self.dspout_obj.continue_convolution[sp] = \
+            self.dspin_obj.get_sp_block(sp)
+        # remember capture time of live source samples to measure capture
+        # to output latency
+        if self.dspin_obj.sp_stream_capture_time[sp] is not None:
+            self.dspout_obj.stream_latency.mark_block(
+                blocknumber, self.dspin_obj.sp_stream_capture_time[sp])
+
+        # normalize sp block if requested
+        self.dspin_obj.normalize(sp)
+        return True
+
+    def crossfade_hrtf(self, sp):
+        """
+        crossfade_hrtf
+        ===================
+        **Applies the angle changes of speaker sp in the current block at
+        their samples.**
+
+        The windowed speaker block is convolved again with the hrtfs of
+        every new angle. Before the sample of the event the block keeps the
+        prior output, from the sample on it crossfades linearly to the new
+        output within the crossfade samples of the event (default
+        gui_settings["event_crossfade"], 128 samples). The overlap add
+        carries the crossfaded block into the following blocks. The block
+        is crossfaded in the preallocated contiguous rows of speaker sp, so
+        no memory is allocated and the speakers of several render threads
+        do not share them.
+
+        Author: Felix Pfreundtner
+        """
+        block = self.sp_crossfade_prior[sp]
+        new_block = self.sp_crossfade_block[sp]
+        fade = self.sp_crossfade_fade[sp]
+        np.copyto(block, self.dspout_obj.sp_binaural_block[sp])
+        for offset, angle, crossfade in self.hrtf_events[sp]:
+            if angle is None:
+                angle = self.prior_head_angle[sp]
+            self.dspin_obj.get_hrtf_block_fft(sp, angle)
+            self.prior_head_angle[sp] = angle
+            self.metrics.record_hrtf_switch()
+            self.dspin_obj.fft_convolution_block(
+                sp, out=self.sp_crossfade_block[
+                    audio3d.engine.dsp_in.sp_rows(sp)])
+            if crossfade is None:
+                crossfade = self.scene.settings.get("event_crossfade", 128)
+            # fraction of the new output of every sample
+            if crossfade > 0:
+                np.subtract(self.crossfade_samples, offset - 1, out=fade)
+                np.divide(fade, crossfade, out=fade)
+                np.clip(fade, 0, 1, out=fade)
+            else:
+                np.greater_equal(self.crossfade_samples, offset, out=fade)
+            np.subtract(new_block, block, out=new_block)
+            np.multiply(new_block, fade, out=new_block)
+            np.add(block, new_block, out=block)
+        np.copyto(self.dspout_obj.sp_binaural_block[sp], block)
+        self.hrtf_events[sp] = []
+
+    def dispatch_events(self, events, block_sample):
+        """
+        dispatch_events
+        ===================
+        **Hands the parameter events of the block, which begins at output
+        sample block_sample, to the speakers.**
+
+        Angle changes are crossfaded by render_sps(), distance and gain
+        changes are ramped by DspOut.mix_binaural_block(). A new hrtf
+        database is loaded at the begin of the block and crossfaded at the
+        sample of its event for every speaker. In sharded rendering only
+        distance and gain events are applied.
+
+        Author: Felix Pfreundtner
+        """
+        for event in events:
+            offset = max(0, event.sample - block_sample)
+            if event.sp is not None and not 0 <= event.sp < self.spn:
+                self.state.send_error("Parameter event for unknown speaker "
+                                      + str(event.sp))
+            elif event.kind == "distance" or event.kind == "gain":
+                self.dspout_obj.gain_events[event.sp].append((offset, event))
+            elif self.sharded is not None:
+                self.state.send_error("Angle and hrtf database events are "
+                                      "not applied in sharded rendering")
+            elif event.kind == "angle":
+                self.hrtf_events[event.sp].append((offset, event.value,
+                                                   event.ramp))
+            else:
+                self.dspin_obj.switch_hrtf_database(event.value)
+                for sp in range(self.spn):
+                    self.hrtf_events[sp].append((offset, None, event.ramp))
+
+    def render_pull(self):
+        """
+        render_pull
+        ===================
+        **Renders the next binaural block inside the PortAudio callback in
+        pull mode.**
+
+        The callback never waits for the gui: the block is rendered with
+        the newest published snapshot of the speakers and settings. The
+        blockcounter is counted on, so the dsp thread continues with the
+        next block number when the pull mode falls back to the queued mode.
+
+        Return values:
+
+        * rendered: False if no block could be rendered
+
+        Author: Felix Pfreundtner
+        """
+        if any(self.dspout_obj.continue_convolution) is False or \
+                self.state.dsp_stop is True:
+            return False
+        blocknumber = self.dspout_obj.played_block_counter
+        self.render_block(blocknumber)
+        self.blockcounter = blocknumber + 1
+        return True
+
+    def update_scene(self):
+        """
+        update_scene
+        ===================
+        **Takes the newest snapshot of the speakers and settings published
+        by the gui for the next block.**
+
+        The snapshot is read with one atomic access and shared with the
+        DspIn and DspOut object, so all steps of a block use the same
+        speaker positions.
+
+        Author: Felix Pfreundtner
+        """
+        scene = self.state.scene
+        self.scene = scene
+        self.dspin_obj.scene = scene
+        self.dspout_obj.scene = scene
+
+    def seek(self, sample):
+        """
+        seek
+        ===================
+        **Continues playback of all speaker files at sample.**
+
+        The method only changes the read position of the speaker inputs
+        and the overlap add state of the speakers, so the jump takes the
+        same time for every position. Speakers which have already reached
+        their end are played again. Live sources have no position and are
+        not changed. If gui_settings["seek_crossfade"] is True (default),
+        the old position is faded out during the first hop of the new
+        position.
+
+        Author: Matthias Lederle
+        """
+        self.dspin_obj.seek(sample)
+        crossfade = self.scene.settings.get("seek_crossfade", True)
+        if self.sharded is not None:
+            self.sharded.seek(sample, crossfade)
+        for sp in range(self.spn):
+            if self.dspin_obj.sp_stream[sp] is not None and \
+                    self.dspin_obj.sp_param[sp][0] is None or \
+                    self.sp_removed[sp]:
+                continue
+            self.dspout_obj.seek_overlap_add(sp, crossfade)
+
+    def prepare_speaker(self, sp):
+        """
+        prepare_speaker
+        ===================
+        **Reads a new speaker sp (speaker dict like in gui_sp) while the dsp
+        thread keeps rendering (see DspIn.prepare_sp()). The result is added
+        with add_speaker().**
+
+        Raises RuntimeError if the speaker can not be played or the speakers
+        are rendered by several processes.
+
+        Author: Matthias Lederle
+        """
+        if self.sharded is not None:
+            raise RuntimeError("Speakers can not be added while rendering "
+                               "in several processes")
+        return self.dspin_obj.prepare_sp(sp)
+
+    def add_speaker(self, sp_in):
+        """
+        add_speaker
+        ===================
+        **Adds the speaker prepared by prepare_speaker() before the next
+        block.**
+
+        The speaker takes the slot of a removed speaker or a new slot after
+        the last speaker, its speaker dict is published in gui_sp. Without
+        "start" the speaker starts with the first sample which is rendered
+        only after the change (one hop after the begin of the next block),
+        a "start" in the past begins in the middle of the file like after a
+        seek. The mix is
+        divided by the number of slots, so a new slot makes all speakers
+        quieter like a playback started with one speaker more, ramped
+        within the next block (see DspOut.mix_binaural_block()). Called by
+        the thread which owns gui_sp.
+
+        Return values:
+
+        * sp: Slot of the speaker, its index in gui_sp
+
+        Author: Matthias Lederle
+        """
+        if len(self.free_slots) > 0:
+            sp = self.free_slots.popleft()
+            self.state.gui_sp[sp] = sp_in.state.gui_sp[0]
+        else:
+            sp = len(self.state.gui_sp)
+            self.state.gui_sp.append(sp_in.state.gui_sp[0])
+        # the dsp thread renders only its own slots, so it may take the
+        # snapshot before the change
+        self.state.publish_scene()
+        self.sp_changes.append(("add", sp, sp_in))
+        return sp
+
+    def remove_speaker(self, sp):
+        """
+        remove_speaker
+        ===================
+        **Removes speaker sp before the next block: it is faded out within
+        gui_settings["event_gain_ramp"] samples and its slot is freed for
+        the next added speaker.**
+
+        Author: Matthias Lederle
+        """
+        self.sp_changes.append(("remove", sp))
+
+    def mute_speaker(self, sp, muted=True):
+        """
+        mute_speaker
+        ===================
+        **Mutes or unmutes speaker sp before the next block (see
+        DspOut.mute()). A muted wave file keeps its position but is not
+        rendered.**
+
+        Author: Matthias Lederle
+        """
+        self.sp_changes.append(("mute", sp, muted))
+
+    def apply_sp_changes(self):
+        """
+        apply_sp_changes
+        ===================
+        **Applies the added, removed and muted speakers queued by the
+        controller. Called by the dsp thread before a block.**
+
+        Author: Matthias Lederle
+        """
+        dspin_obj = self.dspin_obj
+        while len(self.sp_changes) > 0:
+            change = self.sp_changes.popleft()
+            if change[0] == "add":
+                self.insert_speaker(change[1], change[2])
+            elif change[1] >= self.spn or self.sp_removed[change[1]]:
+                self.state.send_error("Speaker change for unknown speaker "
+                                      + str(change[1]))
+            elif change[0] == "remove":
+                self.sp_removed[change[1]] = True
+                self.dspout_obj.mute(change[1], True)
+                self.sp_removing.append(change[1])
+                self.hrtf_events[change[1]] = []
+            else:
+                self.dspout_obj.mute(change[1], change[2])
+        if self.threadpool is not None:
+            self.threadpool.resize(dspin_obj.spn)
+
+    def insert_speaker(self, sp, sp_in):
+        """
+        insert_speaker
+        ===================
+        **Takes the prepared speaker sp_in as speaker sp in the DspIn,
+        DspOut and Dsp object.**
+
+        Author: Matthias Lederle
+        """
+        dspin_obj = self.dspin_obj
+        # first sample of the next block on the clock of the speaker files
+        sample = dspin_obj.block_begin_end[0] + dspin_obj.hopsize
+        # live sources have no schedule, the other speakers start right
+        # after the prior block, which is the first sample which is read
+        # only by the following blocks
+        if sp_in.sp_param[0][0] is not None and \
+                sp_in.state.gui_sp[0].get("start") is None:
+            sp_in.sp_start[0] = dspin_obj.block_begin_end[1]
+            # compressed files start at a full hop
+            if sp_in.sp_stream[0] is not None:
+                sp_in.sp_start[0] = dspin_obj.hopsize * -(
+                    -dspin_obj.block_begin_end[1] // dspin_obj.hopsize)
+        dspin_obj.insert_sp(sp, sp_in)
+        if dspin_obj.sp_start[sp] < sample:
+            dspin_obj.seek_sp(sp, sample)
+        self.dspout_obj.insert_sp(sp, dspin_obj.fft_blocksize,
+                                  dspin_obj.hopsize)
+        values = {"prior_head_angle": np.nan, "scene_head_angle": None,
+                  "hrtf_events": [], "sp_removed": False,
+                  "sp_crossfade_prior": np.zeros_like(self.crossfade_samples),
+                  "sp_crossfade_block": np.zeros_like(self.crossfade_samples),
+                  "sp_crossfade_fade": np.zeros_like(self.crossfade_samples)}
+        for name, value in values.items():
+            setattr(self, name, audio3d.engine.dsp_in.set_slot(
+                getattr(self, name), sp, value))
+        self.spn = dspin_obj.spn
+
+    def free_removed(self):
+        """
+        free_removed
+        ===================
+        **Ends the removed speakers which are faded out and frees their
+        slots.**
+
+        Author: Matthias Lederle
+        """
+        for sp in list(self.sp_removing):
+            if self.dspout_obj.sp_gain_ramp[sp].remaining > 0:
+                continue
+            self.sp_removing.remove(sp)
+            self.dspout_obj.continue_convolution[sp] = False
+            self.dspin_obj.close_sp(sp)
+            self.free_slots.append(sp)
+
+    def close_workers(self):
+        """
+        close_workers
+        ===================
+        **Stops the render processes of sharded rendering and the threads of
+        threaded rendering (see gui_settings["render_processes"] and
+        gui_settings["render_threads"]).**
+
+        Author: Felix Pfreundtner
+        """
+        if self.sharded is not None:
+            self.sharded.close()
+            self.sharded = None
+        if self.threadpool is not None:
+            self.threadpool.close()
+            self.threadpool = None
+
+    def report_stream_latency(self):
+        """
+        report_stream_latency
+        ===================
+        **Reports the measured capture to output latency of all live sources
+        to the GUI.**
+
+        The latency statistics are saved in state.dsp_stream_latency and a
+        message is sent to the GUI MainWindow.
+
+        Author: Felix Pfreundtner
+        """
+        latency = self.dspout_obj.stream_latency.report()
+        self.state.dsp_stream_latency = latency
+        if latency["count"] > 0:
+            self.state.send_error(
+                "Capture to output latency of live sources: mean {:.1f} ms, "
+                "max {:.1f} ms".format(latency["mean"] * 1000,
+                                       latency["max"] * 1000))
@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import numpy as np
+import scipy.io.wavfile
+import math
+import os
+import hashlib
+import warnings
+
+
+class DspAnalysis:
+    """
+    DspAnalysis
+    ************************
+    **This class holds a compact analysis index of one speaker input
+    signal.**
+
+    The index stores for every analysis block (100 ms) the peak amplitude,
+    the mean square and the K-weighted (ITU-R BS.1770) mean square of the
+    signal. From these blocks a pyramid is built, where every level
+    combines two blocks of the level below. The index can be filled
+    incrementally with add_samples(), so streaming sources are analysed
+    while they are played, or it is read from a sidecar file in the user
+    cache directory, so the normalisation gain of a file is known without
+    scanning the whole file before playback.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # version of the sidecar file format
+    version = 1
+    # file ending of the sidecar file of a wave file
+    sidecar_ending = ".a3d.npz"
+
+    def __init__(self, samplerate=44100):
+        """
+        **__init__ creates an empty index for a signal with samplerate.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.samplerate = samplerate
+        # one analysis block holds 100 ms of the signal
+        self.blocksize = samplerate // 10
+        # total number of analysed samples
+        self.samplenumber = 0
+        # block values of pyramid level 0: peak, mean square and k-weighted
+        # mean square
+        self.block_peak = []
+        self.block_ms = []
+        self.block_kms = []
+        # samples of a not yet completed analysis block
+        self.rest = np.zeros((0, ), dtype=np.float64)
+        # k weighting filter and its filter state between two add_samples()
+        self.kfilter_b, self.kfilter_a = self.build_k_filter(samplerate)
+        self.kfilter_state = [np.zeros((2, )), np.zeros((2, ))]
+        # pyramid levels, built by finish()
+        self.pyramid = []
+
+    def build_k_filter(self, samplerate):
+        """
+        H2 -- build_k_filter
+        ===================
+        **Calculates the two biquad filter stages of the ITU-R BS.1770 K
+        weighting for any samplerate.**
+
+        Return values:
+
+        * b: List with the numerator coefficients of the high shelf and the
+          high pass stage
+        * a: List with the denominator coefficients of both stages
+
+        Author: Felix Pfreundtner
+        """
+        # stage 1: high shelf (4 dB, 1500 Hz) modelling the head
+        gain = 10 ** (4.0 / 40)
+        w0 = 2 * math.pi * 1500 / samplerate
+        alpha = math.sin(w0) / (2 * (1 / math.sqrt(2)))
+        cos_w0 = math.cos(w0)
+        b_shelf = [gain * ((gain + 1) + (gain - 1) * cos_w0 + 2 *
+                           math.sqrt(gain) * alpha),
+                   -2 * gain * ((gain - 1) + (gain + 1) * cos_w0),
+                   gain * ((gain + 1) + (gain - 1) * cos_w0 - 2 *
+                           math.sqrt(gain) * alpha)]
+        a_shelf = [(gain + 1) - (gain - 1) * cos_w0 + 2 * math.sqrt(gain) *
+                   alpha,
+                   2 * ((gain - 1) - (gain + 1) * cos_w0),
+                   (gain + 1) - (gain - 1) * cos_w0 - 2 * math.sqrt(gain) *
+                   alpha]
+        # stage 2: high pass (38 Hz) as revised low frequency B-curve
+        w0 = 2 * math.pi * 38 / samplerate
+        alpha = math.sin(w0) / (2 * 0.5)
+        cos_w0 = math.cos(w0)
+        b_pass = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a_pass = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        b = [np.array(b_shelf) / a_shelf[0], np.array(b_pass) / a_pass[0]]
+        a = [np.array(a_shelf) / a_shelf[0], np.array(a_pass) / a_pass[0]]
+        return b, a
+
+    def add_samples(self, samples):
+        """
+        H2 -- add_samples
+        ===================
+        **Adds the next samples of the signal to the index.**
+
+        The method can be called with any number of samples. Completed
+        analysis blocks are appended to pyramid level 0, remaining samples
+        are kept until the next call or until finish() is called.
+
+        Author: Felix Pfreundtner
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.shape[0] == 0:
+            return
+        self.samplenumber += samples.shape[0]
+        samples = np.concatenate((self.rest, samples))
+        blocknumber = samples.shape[0] // self.blocksize
+        self.add_blocks(samples[:blocknumber * self.blocksize])
+        self.rest = samples[blocknumber * self.blocksize:]
+
+    def add_blocks(self, samples):
+        """
+        H2 -- add_blocks
+        ===================
+        **Calculates peak, mean square and k-weighted mean square of
+        complete analysis blocks.**
+
+        Author: Felix Pfreundtner
+        """
+        if samples.shape[0] == 0:
+            return
+        # deferred import: scipy.signal takes longer to import than the
+        # rest of the dsp algorithm together
+        import scipy.signal
+        # k weight the samples, keep the filter state for the next samples
+        weighted = samples
+        for stage in range(2):
+            weighted, self.kfilter_state[stage] = scipy.signal.lfilter(
+                self.kfilter_b[stage], self.kfilter_a[stage], weighted,
+                zi=self.kfilter_state[stage])
+        blocks = samples.reshape((-1, self.blocksize))
+        weighted_blocks = weighted.reshape((-1, self.blocksize))
+        self.block_peak.extend(np.amax(np.abs(blocks), axis=1))
+        self.block_ms.extend(np.mean(blocks ** 2, axis=1))
+        self.block_kms.extend(np.mean(weighted_blocks ** 2, axis=1))
+
+    def finish(self):
+        """
+        H2 -- finish
+        ===================
+        **Analyses the remaining samples as last (zeropadded) block and
+        builds the pyramid.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.rest.shape[0] != 0:
+            last_block = np.zeros((self.blocksize, ), dtype=np.float64)
+            last_block[:self.rest.shape[0]] = self.rest
+            self.add_blocks(last_block)
+            self.rest = np.zeros((0, ), dtype=np.float64)
+        self.build_pyramid()
+
+    def build_pyramid(self):
+        """
+        H2 -- build_pyramid
+        ===================
+        **Builds all pyramid levels from the block values of level 0.**
+
+        Every level holds peak, mean square and k-weighted mean square of
+        two neighbouring entries of the level below, the highest level
+        holds the values of the whole signal.
+
+        Author: Felix Pfreundtner
+        """
+        level = [np.array(self.block_peak, dtype=np.float32),
+                 np.array(self.block_ms, dtype=np.float64),
+                 np.array(self.block_kms, dtype=np.float64)]
+        if level[0].shape[0] == 0:
+            level = [np.zeros((1, ), dtype=np.float32),
+                     np.zeros((1, ), dtype=np.float64),
+                     np.zeros((1, ), dtype=np.float64)]
+        self.pyramid = [level]
+        while level[0].shape[0] > 1:
+            # zeropad odd levels to get pairs of entries
+            if level[0].shape[0] % 2 != 0:
+                level = [np.append(values, 0) for values in level]
+            level = [np.maximum(level[0][0::2], level[0][1::2]),
+                     (level[1][0::2] + level[1][1::2]) / 2,
+                     (level[2][0::2] + level[2][1::2]) / 2]
+            self.pyramid.append(level)
+
+    @property
+    def peak(self):
+        """
+        H2 -- peak
+        ===================
+        **Maximum absolute amplitude of the whole signal.**
+
+        Author: Felix Pfreundtner
+        """
+        if len(self.pyramid) == 0:
+            if len(self.block_peak) == 0:
+                return 0
+            return float(max(self.block_peak))
+        return float(self.pyramid[-1][0][0])
+
+    @property
+    def rms(self):
+        """
+        H2 -- rms
+        ===================
+        **Root mean square amplitude of the whole signal.**
+
+        Author: Felix Pfreundtner
+        """
+        if len(self.block_ms) == 0:
+            return 0
+        return math.sqrt(np.mean(self.block_ms))
+
+    @property
+    def loudness(self):
+        """
+        H2 -- loudness
+        ===================
+        **Gated integrated loudness of the whole signal in LUFS (relative to
+        int16 full scale) as defined in ITU-R BS.1770.**
+
+        The loudness is calculated from gating blocks of 400 ms with 75 %
+        overlap, which are four neighbouring analysis blocks of level 0.
+        A mono signal is weighted like one channel.
+
+        Author: Felix Pfreundtner
+        """
+        kms = np.array(self.block_kms, dtype=np.float64) / 32768 ** 2
+        if kms.shape[0] == 0:
+            return -math.inf
+        if kms.shape[0] < 4:
+            gating_kms = np.array([np.mean(kms)])
+        else:
+            gating_kms = np.convolve(kms, np.ones((4, )) / 4, mode="valid")
+        # absolute gate at -70 LUFS
+        gating_kms = gating_kms[gating_kms > 10 ** ((-70 + 0.691) / 10)]
+        if gating_kms.shape[0] == 0:
+            return -math.inf
+        # relative gate 10 LU below the absolute gated loudness
+        relative_gate = -0.691 + 10 * math.log10(np.mean(gating_kms)) - 10
+        gating_kms = gating_kms[gating_kms > 10 ** ((relative_gate + 0.691) /
+                                                    10)]
+        return -0.691 + 10 * math.log10(np.mean(gating_kms))
+
+    def peak_between(self, begin, end):
+        """
+        H2 -- peak_between
+        ===================
+        **Returns the maximum amplitude between sample begin and end of the
+        signal using the pyramid.**
+
+        The value is an upper bound at analysis block resolution and is
+        found in logarithmic time of the signal length.
+
+        Author: Felix Pfreundtner
+        """
+        begin = max(begin // self.blocksize, 0)
+        end = min(-(-end // self.blocksize), len(self.block_peak))
+        peak = 0
+        for level in self.pyramid:
+            if begin >= end:
+                break
+            # take uneven borders from this level, go one level up with rest
+            if begin % 2 != 0:
+                peak = max(peak, level[0][begin])
+                begin += 1
+            if end % 2 != 0 and end > begin:
+                peak = max(peak, level[0][end - 1])
+                end -= 1
+            begin //= 2
+            end //= 2
+        return float(peak)
+
+    def normalize_amp(self, mode="peak", target_loudness=-18.0):
+        """
+        H2 -- normalize_amp
+        ===================
+        **Returns the maximum amplitude the signal should have after
+        normalisation.**
+
+        With mode "peak" the signal is normalized to the maximum int16
+        amplitude. With mode "loudness" the signal is gained to
+        target_loudness in LUFS, but the gain is limited so that the peak
+        amplitude never exceeds the maximum int16 amplitude.
+
+        Author: Felix Pfreundtner
+        """
+        max_amplitude_output = 32767
+        if mode == "loudness" and self.peak != 0 and \
+                self.loudness != -math.inf:
+            gain = 10 ** ((target_loudness - self.loudness) / 20)
+            return min(self.peak * gain, max_amplitude_output)
+        return max_amplitude_output
+
+    @staticmethod
+    def cache_directory(directory=None):
+        """
+        H2 -- cache_directory
+        ===================
+        **Returns the directory of the sidecar files.**
+
+        directory is the "analysis_cache" gui setting. If it is None the
+        audio3d directory in the user cache directory is used
+        (%LOCALAPPDATA% on Windows, $XDG_CACHE_HOME or ~/.cache else).
+
+        Author: Felix Pfreundtner
+        """
+        if directory is not None:
+            return directory
+        if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+            cache = os.environ["LOCALAPPDATA"]
+        else:
+            cache = os.environ.get("XDG_CACHE_HOME") or \
+                os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(cache, "audio3d")
+
+    @classmethod
+    def sidecar_path(cls, path, directory=None):
+        """
+        H2 -- sidecar_path
+        ===================
+        **Returns the path of the sidecar file of a wave file.**
+
+        The sidecar file is kept in the cache directory (see
+        cache_directory()) and named after the wave file and a hash of its
+        absolute path, so wave files with the same name do not share a
+        sidecar file. Only if the cache directory is not writable, the
+        sidecar file is kept next to the wave file.
+
+        Return values:
+
+        * path: The sidecar file path or None if neither the cache
+          directory nor the directory of the wave file is writable.
+
+        Author: Felix Pfreundtner
+        """
+        path = os.path.abspath(path)
+        directory = cls.cache_directory(directory)
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            pass
+        if os.path.isdir(directory) and os.access(directory, os.W_OK):
+            key = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+            return os.path.join(directory, os.path.basename(path) + "." +
+                                key + cls.sidecar_ending)
+        if os.access(os.path.dirname(path), os.W_OK):
+            return path + cls.sidecar_ending
+        return None
+
+    def save(self, path, source_stat=None):
+        """
+        H2 -- save
+        ===================
+        **Saves the index with all pyramid levels to a sidecar file.**
+
+        source_stat is the os.stat() of the analysed wave file and is used
+        to detect a changed wave file when the index is loaded again.
+
+        Author: Felix Pfreundtner
+        """
+        if source_stat is None:
+            source_stat = (0, 0)
+        else:
+            source_stat = (source_stat.st_size, source_stat.st_mtime_ns)
+        pyramid = {}
+        for level_number, level in enumerate(self.pyramid):
+            pyramid["peak_" + str(level_number)] = level[0]
+            pyramid["ms_" + str(level_number)] = level[1]
+            pyramid["kms_" + str(level_number)] = level[2]
+        with open(path, "wb") as file:
+            np.savez(file, version=self.version,
+                     samplerate=self.samplerate,
+                     samplenumber=self.samplenumber,
+                     source_stat=np.array(source_stat, dtype=np.int64),
+                     levels=len(self.pyramid), **pyramid)
+
+    @classmethod
+    def load(cls, path, source_stat=None):
+        """
+        H2 -- load
+        ===================
+        **Loads an index from a sidecar file.**
+
+        Return values:
+
+        * analysis: The loaded DspAnalysis object or None if the sidecar file
+          does not exist, has another version or belongs to another state of
+          the wave file.
+
+        Author: Felix Pfreundtner
+        """
+        if path is None:
+            return None
+        try:
+            with np.load(path) as sidecar:
+                if int(sidecar["version"]) != cls.version:
+                    return None
+                if source_stat is not None and \
+                        list(sidecar["source_stat"]) != \
+                        [source_stat.st_size, source_stat.st_mtime_ns]:
+                    return None
+                analysis = cls(int(sidecar["samplerate"]))
+                analysis.samplenumber = int(sidecar["samplenumber"])
+                for level_number in range(int(sidecar["levels"])):
+                    analysis.pyramid.append(
+                        [sidecar["peak_" + str(level_number)],
+                         sidecar["ms_" + str(level_number)],
+                         sidecar["kms_" + str(level_number)]])
+        except (OSError, KeyError, ValueError):
+            return None
+        analysis.block_peak = list(analysis.pyramid[0][0])
+        analysis.block_ms = list(analysis.pyramid[0][1])
+        analysis.block_kms = list(analysis.pyramid[0][2])
+        return analysis
+
+    def save_sidecar(self, path, directory=None):
+        """
+        H2 -- save_sidecar
+        ===================
+        **Saves the index as sidecar file of the wave file path.**
+
+        directory is the "analysis_cache" gui setting (see
+        cache_directory()). If no sidecar location is writable or the file
+        can not be written, a RuntimeWarning is issued, because the index
+        then has to be calculated again at the next playback.
+
+        Author: Felix Pfreundtner
+        """
+        sidecar = self.sidecar_path(path, directory)
+        if sidecar is None:
+            warnings.warn("no writable location for the analysis index of "
+                          + path, RuntimeWarning)
+            return
+        try:
+            self.save(sidecar, os.stat(path))
+        except OSError as error:
+            warnings.warn("analysis index of " + path + " not saved: " +
+                          str(error), RuntimeWarning)
+
+    @classmethod
+    def for_file(cls, path, samplerate, samples=None, directory=None):
+        """
+        H2 -- for_file
+        ===================
+        **Returns the index of a wave file.**
+
+        If a valid sidecar file exists in the cache directory (see
+        sidecar_path()) it is loaded, else the index is calculated from
+        samples (or the wave file) and saved as sidecar file for the next
+        playback.
+
+        Author: Felix Pfreundtner
+        """
+        source_stat = os.stat(path)
+        analysis = cls.load(cls.sidecar_path(path, directory), source_stat)
+        if analysis is not None and analysis.samplerate == samplerate:
+            return analysis
+        if samples is None:
+            _, samples = scipy.io.wavfile.read(path)
+            # mix stereo files to mono the same way as DspIn.read_sp()
+            if samples.ndim == 2:
+                samples = samples[:, 0] + samples[:, 1] / 2
+        analysis = cls(samplerate)
+        analysis.add_samples(samples)
+        analysis.finish()
+        analysis.save_sidecar(path, directory)
+        return analysis
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_state
+import asyncio
+import threading
+
+
+class AsyncEngine:
+    """
+    AsyncEngine
+    ************************
+    **This class controls the dsp algorithm from an asyncio event loop.**
+
+    await start(scene) creates the Dsp object without blocking the event
+    loop and runs Dsp.run() in its own dsp thread, which renders in real
+    time like in the gui. Speaker positions and settings are changed with
+    update_speaker() and update_settings(), which publish a new scene
+    snapshot (see DspState.publish_scene()), so the event loop never waits
+    for the dsp thread. Speakers are added, removed and muted while the
+    scene is running, new files are read in an executor. metrics() streams
+    the runtime counters, await stop() stops the playback and returns when
+    dsp and playback thread are finished. The end of the dsp thread is
+    reported to the event loop with call_soon_threadsafe(), so nothing
+    polls the flags of the state. One event loop can drive many engines,
+    every engine has its own state.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, settings=None):
+        """
+        **__init__ gets gui_settings which every scene gets unless it sets
+        them itself, e.g. {"audio_backend": "null"} for a service without
+        sound card.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.settings = dict(settings or {})
+        self.state = None
+        self.dsp_obj = None
+        self.dspthread = None
+        # set in the event loop when dsp and playback thread are finished
+        self.finished = None
+
+    @property
+    def running(self):
+        """
+        H2 -- running
+        ===================
+        **Whether a scene is rendered at the moment.**
+        """
+        return self.finished is not None and not self.finished.is_set()
+
+    async def start(self, scene):
+        """
+        H2 -- start
+        ===================
+        **Starts the real time rendering of scene, a dict with a list
+        "sources" of speaker dicts and optionally "settings" (see
+        dsp_offline.load_scene()).**
+
+        Raises RuntimeError if a scene is already running or the dsp
+        algorithm reports an error for the scene, e.g. an unsupported wave
+        format.
+
+        Author: Felix Pfreundtner
+        """
+        # deferred import: the dsp algorithm loads numpy and scipy
+        import audio3d.engine.dsp
+        if self.running is True:
+            raise RuntimeError("The engine renders already a scene")
+        settings = dict(self.settings)
+        settings.update(scene.get("settings", {}))
+        settings.setdefault("record", False)
+        state = audio3d.engine.dsp_state.DspState().configure(
+            scene["sources"], settings)
+        loop = asyncio.get_running_loop()
+        # reading the speaker files and hrtfs takes a while: not in the
+        # event loop
+        dsp_obj = await loop.run_in_executor(None, audio3d.engine.dsp.Dsp,
+                                             state)
+        if state.dsp_stop is True:
+            dsp_obj.close_workers()
+            dsp_obj.dspin_obj.close_streams()
+            raise RuntimeError("; ".join(state.gui_error))
+        self.state = state
+        self.dsp_obj = dsp_obj
+        self.finished = asyncio.Event()
+        self.dspthread = threading.Thread(target=self.run_dsp,
+                                          args=(loop, self.finished))
+        self.dspthread.daemon = True
+        self.dspthread.start()
+
+    def run_dsp(self, loop, finished):
+        """
+        H2 -- run_dsp
+        ===================
+        **Target of the dsp thread: runs the dsp algorithm, joins the
+        playback thread and reports the end to the event loop.**
+
+        Author: Felix Pfreundtner
+        """
+        try:
+            self.dsp_obj.run()
+            # the playback thread plays the queued blocks and ends with the
+            # end of the stream or a stop
+            if self.dsp_obj.playthread is not None:
+                self.dsp_obj.playthread.join()
+        finally:
+            loop.call_soon_threadsafe(finished.set)
+
+    async def update_speaker(self, sp, **values):
+        """
+        H2 -- update_speaker
+        ===================
+        **Changes values of speaker sp, e.g. angle=90 or distance=2. The dsp
+        thread renders the next block with them.**
+
+        Author: Matthias Lederle
+        """
+        self.state.gui_sp[sp].update(values)
+        self.state.publish_scene()
+
+    async def add_speaker(self, sp):
+        """
+        H2 -- add_speaker
+        ===================
+        **Adds speaker sp (speaker dict like the sources of the scene) to the
+        running scene. The file is read in an executor, the dsp thread
+        renders the speaker from the next block on (see
+        Dsp.add_speaker()).**
+
+        Return values:
+
+        * sp: Index of the new speaker
+
+        Author: Matthias Lederle
+        """
+        loop = asyncio.get_running_loop()
+        sp_in = await loop.run_in_executor(None, self.dsp_obj.prepare_speaker,
+                                           dict(sp))
+        return self.dsp_obj.add_speaker(sp_in)
+
+    async def remove_speaker(self, sp):
+        """
+        H2 -- remove_speaker
+        ===================
+        **Fades out and removes speaker sp (see Dsp.remove_speaker()).**
+
+        Author: Matthias Lederle
+        """
+        self.dsp_obj.remove_speaker(sp)
+
+    async def mute_speaker(self, sp, muted=True):
+        """
+        H2 -- mute_speaker
+        ===================
+        **Mutes or unmutes speaker sp (see Dsp.mute_speaker()).**
+
+        Author: Matthias Lederle
+        """
+        self.dsp_obj.mute_speaker(sp, muted)
+
+    async def update_settings(self, **values):
+        """
+        H2 -- update_settings
+        ===================
+        **Changes gui_settings which are read during the rendering, e.g.
+        seek_crossfade.**
+
+        Author: Matthias Lederle
+        """
+        self.state.gui_settings.update(values)
+        self.state.publish_scene()
+
+    async def schedule(self, kind, value, sp=None, delay=0.0, ramp=None):
+        """
+        H2 -- schedule
+        ===================
+        **Changes parameter kind ("angle", "distance", "gain" or
+        "hrtf_database") of speaker sp to value delay seconds after the block
+        which is rendered at the moment, sample accurate within the block
+        (see EventQueue).**
+
+        A new hrtf database is read in an executor before the event is
+        scheduled, so the dsp thread only switches the tables.
+
+        Return values:
+
+        * sample: Output sample of the change
+
+        Author: Felix Pfreundtner
+        """
+        if kind == "hrtf_database":
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, self.dsp_obj.dspin_obj.load_hrtf_database, value)
+        events = self.state.dsp_events
+        sample = events.rendered + int(round(delay * self.dsp_obj.dspin_obj
+                                             .samplerate))
+        events.push(sample, kind, value, sp=sp, ramp=ramp)
+        return sample
+
+    async def seek(self, sample):
+        """
+        H2 -- seek
+        ===================
+        **Continues the playback at sample (see Dsp.seek()).**
+
+        Author: Matthias Lederle
+        """
+        self.state.seek_playback(sample)
+
+    async def pause(self):
+        """
+        H2 -- pause
+        ===================
+        **Pauses the playback.**
+
+        Author: Matthias Lederle
+        """
+        self.state.dsp_pause = True
+
+    async def resume(self):
+        """
+        H2 -- resume
+        ===================
+        **Resumes the paused playback.**
+
+        Author: Matthias Lederle
+        """
+        self.state.dsp_pause = False
+
+    async def wait(self):
+        """
+        H2 -- wait
+        ===================
+        **Returns when the scene is played completely or stopped.**
+
+        Return values:
+
+        * status: See status()
+
+        Author: Matthias Lederle
+        """
+        if self.finished is not None:
+            await self.finished.wait()
+        return self.status()
+
+    async def stop(self):
+        """
+        H2 -- stop
+        ===================
+        **Stops the playback and returns when dsp and playback thread are
+        finished.**
+
+        Return values:
+
+        * status: See status()
+
+        Author: Matthias Lederle
+        """
+        if self.running is True:
+            self.state.dsp_stop = True
+        return await self.wait()
+
+    async def metrics(self, interval=1.0):
+        """
+        H2 -- metrics
+        ===================
+        **Asynchronous generator of the runtime counters
+        (Metrics.snapshot()) every interval seconds while the scene is
+        running, the last snapshot is yielded after the end of the scene.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.finished is None:
+            return
+        while True:
+            ended = self.finished.is_set()
+            yield self.state.dsp_metrics.snapshot()
+            if ended is True:
+                return
+            try:
+                await asyncio.wait_for(self.finished.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def status(self):
+        """
+        H2 -- status
+        ===================
+        **Returns the state of the last started scene.**
+
+        Return values:
+
+        * status: Dict whether the scene is running, the error messages,
+          the playback status (see DspOut.playback_status()) and the buffer
+          status of the last playback
+
+        Author: Felix Pfreundtner
+        """
+        if self.state is None:
+            return {"running": False, "errors": [], "playback": {},
+                    "buffer": {}}
+        self.state.mtx_error.acquire()
+        errors = list(self.state.gui_error)
+        self.state.mtx_error.release()
+        return {"running": self.running, "errors": errors,
+                "playback": dict(self.state.dsp_playback_status),
+                "buffer": dict(self.state.dsp_buffer_status)}
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_record
+import threading
+import time
+try:
+    import pyaudio
+except ImportError:
+    # the null, file and wave backends need no PortAudio
+    pyaudio = None
+
+# return flags of the playback callback, same values as pyaudio.paContinue
+# and pyaudio.paComplete
+paContinue = 0
+paComplete = 1
+# status flag of the callback if a block was played too late, same value as
+# pyaudio.paOutputUnderflow
+paOutputUnderflow = 4
+
+
+def create_backend(settings):
+    """
+    H2 -- create_backend
+    ===================
+    **Creates the audio output backend selected in gui_settings.**
+
+    settings["audio_backend"] is "portaudio" (default), "null", "file" or
+    "wav". The null, file and wave backends play in real time if
+    settings["audio_backend_realtime"] is True (default for "null") or as
+    fast as possible; the file and wave backends write to
+    settings["audio_backend_path"].
+
+    Return values:
+
+    * backend: The OutputBackend object
+
+    Author: Felix Pfreundtner
+    """
+    name = settings.get("audio_backend", "portaudio")
+    if name == "portaudio":
+        return PortAudioBackend()
+    if name == "null":
+        return NullBackend(settings.get("audio_backend_realtime", True))
+    if name == "file":
+        return FileBackend(settings["audio_backend_path"],
+                           settings.get("audio_backend_realtime", False))
+    if name == "wav":
+        return WavBackend(settings["audio_backend_path"],
+                          settings.get("audio_backend_realtime", False))
+    raise ValueError("Unknown audio backend: " + str(name))
+
+
+class OutputBackend:
+    """
+    OutputBackend
+    ************************
+    **Interface of the audio outputs which play the binaural blocks of
+    DspOut.**
+
+    After open() the backend calls callback(in_data, frame_count,
+    time_info, status) for every block, like a PortAudio stream callback.
+    Backends which do not play in real time call wait_block() before, which
+    returns when the next block can be taken.
+    The callback returns the int16 block and paContinue, or paComplete at
+    the end of the playback. start() and stop() start and pause the
+    playback, close() ends it.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def open(self, samplerate, hopsize, callback, wait_block=None):
+        """
+        H2 -- open
+        ===================
+        **Prepares the playback of stereo blocks of hopsize frames.**
+
+        Author: Felix Pfreundtner
+        """
+        raise NotImplementedError
+
+    def start(self):
+        """
+        H2 -- start
+        ===================
+        **Starts or resumes the playback.**
+
+        Author: Felix Pfreundtner
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """
+        H2 -- stop
+        ===================
+        **Pauses the playback.**
+
+        Author: Felix Pfreundtner
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        H2 -- close
+        ===================
+        **Ends the playback and frees the device or file.**
+
+        Author: Felix Pfreundtner
+        """
+        raise NotImplementedError
+
+
+class PortAudioBackend(OutputBackend):
+    """
+    PortAudioBackend
+    ************************
+    **Plays the binaural blocks on the default sound card with a PortAudio
+    callback stream.**
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self):
+        self.pa = None
+        self.audiostream = None
+
+    def open(self, samplerate, hopsize, callback, wait_block=None):
+        self.pa = pyaudio.PyAudio()
+        self.audiostream = self.pa.open(format=pyaudio.paInt16,
+                                        channels=2,
+                                        rate=samplerate,
+                                        output=True,
+                                        frames_per_buffer=hopsize,
+                                        stream_callback=callback,
+                                        start=False)
+
+    def start(self):
+        self.audiostream.start_stream()
+
+    def stop(self):
+        self.audiostream.stop_stream()
+
+    def close(self):
+        self.audiostream.stop_stream()
+        self.audiostream.close()
+        self.pa.terminate()
+
+
+class NullBackend(OutputBackend):
+    """
+    NullBackend
+    ************************
+    **Consumes the binaural blocks without sound card.**
+
+    An own thread calls the callback like PortAudio does. In real time mode
+    the calls are paced by the block time on an absolute clock, a call
+    which comes more than one block time too late gets the status
+    paOutputUnderflow. Otherwise the blocks are consumed as fast as the dsp
+    thread renders them: the thread waits with wait_block() until the next
+    block is available. Subclasses write the blocks with consume().
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, realtime=True):
+        """
+        **__init__ gets whether the blocks are consumed in real time.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.realtime = realtime
+        self.callback = None
+        self.wait_block = None
+        self.thread = None
+        self.running = threading.Event()
+        self.closed = False
+        # number of consumed blocks and of blocks played too late
+        self.blocks = 0
+        self.late_blocks = 0
+
+    def open(self, samplerate, hopsize, callback, wait_block=None):
+        self.samplerate = samplerate
+        self.hopsize = hopsize
+        self.hop_time = hopsize / samplerate
+        self.callback = callback
+        self.wait_block = wait_block
+        self.thread = threading.Thread(target=self.play_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def start(self):
+        self.running.set()
+
+    def stop(self):
+        self.running.clear()
+
+    def close(self):
+        self.closed = True
+        self.running.set()
+        self.thread.join()
+
+    def consume(self, data):
+        """
+        H2 -- consume
+        ===================
+        **Takes one played block. The null backend drops it.**
+
+        Author: Felix Pfreundtner
+        """
+        pass
+
+    def play_loop(self):
+        """
+        H2 -- play_loop
+        ===================
+        **Calls the callback for every block until it completes the
+        playback or close() is called.**
+
+        Author: Felix Pfreundtner
+        """
+        # time at which the next block is due
+        due = None
+        while True:
+            # paused: the clock starts again after the pause
+            if self.running.is_set() is False:
+                due = None
+                self.running.wait()
+            if self.closed is True:
+                break
+            now = time.perf_counter()
+            status = 0
+            if self.realtime is True:
+                if due is None:
+                    due = now
+                elif now < due:
+                    time.sleep(due - now)
+                    now = time.perf_counter()
+                elif now - due > self.hop_time:
+                    # block came too late: the sound card would have played
+                    # silence
+                    status = paOutputUnderflow
+                    self.late_blocks += 1
+                    due = now
+                due += self.hop_time
+            elif self.wait_block is not None:
+                self.wait_block()
+            data, flag = self.callback(None, self.hopsize,
+                                       {"current_time": now,
+                                        "output_buffer_dac_time": now},
+                                       status)
+            if flag == paComplete:
+                break
+            self.consume(data)
+            self.blocks += 1
+
+
+class FileBackend(NullBackend):
+    """
+    FileBackend
+    ************************
+    **Writes the binaural blocks as raw interleaved int16 samples to a
+    file.**
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, path, realtime=False):
+        super(FileBackend, self).__init__(realtime)
+        self.path = path
+        self.file = None
+
+    def open(self, samplerate, hopsize, callback, wait_block=None):
+        self.file = open(self.path, "wb")
+        super(FileBackend, self).open(samplerate, hopsize, callback,
+                                      wait_block)
+
+    def consume(self, data):
+        self.file.write(data)
+
+    def close(self):
+        super(FileBackend, self).close()
+        self.file.close()
+
+
+class WavBackend(NullBackend):
+    """
+    WavBackend
+    ************************
+    **Writes the binaural blocks to a wave file with a RecordWriter.**
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, path, realtime=False):
+        super(WavBackend, self).__init__(realtime)
+        self.path = path
+        self.writer = None
+
+    def open(self, samplerate, hopsize, callback, wait_block=None):
+        self.writer = audio3d.engine.dsp_record.RecordWriter(self.path,
+                                                             samplerate)
+        super(WavBackend, self).open(samplerate, hopsize, callback,
+                                     wait_block)
+
+    def consume(self, data):
+        # the block is a slot of the playback ring buffer, which is reused
+        # after the next callback
+        self.writer.write(bytes(data), wait=True)
+
+    def close(self):
+        super(WavBackend, self).close()
+        self.writer.close()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_offline
+import concurrent.futures
+import argparse
+import json
+import time
+import sys
+import os
+
+
+def load_manifest(path):
+    """
+    H2 -- load_manifest
+    ===================
+    **Reads a manifest of scene jobs from a JSON file.**
+
+    The manifest is a dict with a list "jobs" of scenes (see
+    dsp_offline.load_scene()), each with an unique "name", and optionally
+    "output_dir" (default: directory of the manifest) and "defaults" (keys
+    which every job gets unless it sets them itself, e.g. "settings" or
+    "duration"). A job without "output" is written to output_dir/name.wav.
+    Relative paths are relative to the manifest file.
+
+    Return values:
+
+    * jobs: List of the scenes of all jobs
+    * output_dir: Directory of the outputs and the reports
+
+    Author: Matthias Lederle
+    """
+    with open(path) as file:
+        manifest = json.load(file)
+    directory = os.path.dirname(os.path.abspath(path))
+    output_dir = os.path.join(directory, manifest.get("output_dir", "."))
+    jobs = []
+    names = set()
+    for index, job in enumerate(manifest["jobs"]):
+        scene = dict(manifest.get("defaults", {}))
+        scene.update(job)
+        scene.setdefault("name", "job_" + str(index))
+        if scene["name"] in names:
+            raise ValueError("Job name is not unique: " + scene["name"])
+        names.add(scene["name"])
+        audio3d.engine.dsp_offline.resolve_scene_paths(scene, directory)
+        if scene.get("output") is None:
+            scene["output"] = os.path.join(output_dir,
+                                           scene["name"] + ".wav")
+        jobs.append(scene)
+    return jobs, output_dir
+
+
+def render_job(scene):
+    """
+    H2 -- render_job
+    ===================
+    **Renders one job of the batch. Runs in a worker process of
+    BatchRenderer.**
+
+    The output is written to a ".part" file which replaces the output only
+    when the job is complete, so an interrupted job leaves no output. The
+    hrtf databases stay loaded in the worker process between its jobs (see
+    DspIn.hrtf_cache).
+
+    Return values:
+
+    * report: Dict with the name, the output path, the status ("done" or
+      "failed"), the result of OfflineRenderer.render() or the error
+      message
+
+    Author: Matthias Lederle
+    """
+    report = {"name": scene["name"], "output": scene["output"]}
+    try:
+        renderer = audio3d.engine.dsp_offline.OfflineRenderer(scene)
+        result = renderer.render(scene["output"] + ".part")
+        os.replace(scene["output"] + ".part", scene["output"])
+    except (ValueError, RuntimeError, OSError) as error:
+        report.update(status="failed", error=str(error))
+        return report
+    report.update(status="done", blocks=result["blocks"],
+                  seconds=result["seconds"], walltime=result["walltime"],
+                  realtime_factor=result["realtime_factor"],
+                  messages=list(renderer.state.gui_error))
+    return report
+
+
+class BatchRenderer:
+    """
+    BatchRenderer
+    ************************
+    **This class renders a list of scene jobs with a pool of long living
+    worker processes.**
+
+    Every worker process renders job after job, so the start of the
+    process, the imports and the loading of the hrtf databases happen only
+    once per worker and not once per job. Every finished job is appended as
+    one JSON line to the report file batch_report.jsonl in the output
+    directory. Jobs which are marked as done in this file and whose output
+    exists are skipped, so an interrupted batch continues where it stopped.
+    At the end a summary of all jobs is written to batch_summary.json.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    report_name = "batch_report.jsonl"
+    summary_name = "batch_summary.json"
+
+    def __init__(self, jobs, output_dir, workers=None):
+        """
+        **__init__ gets the scenes of the jobs (see load_manifest()), the
+        output directory and the number of worker processes (default:
+        number of CPUs).**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.jobs = jobs
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.report_path = os.path.join(output_dir, self.report_name)
+        self.summary_path = os.path.join(output_dir, self.summary_name)
+
+    def read_report(self):
+        """
+        H2 -- read_report
+        ===================
+        **Reads the reports of the jobs which were finished in a prior run.**
+
+        Lines which are not complete (interrupted while writing) are
+        ignored.
+
+        Return values:
+
+        * reports: Dict of the last report of every job name
+
+        Author: Matthias Lederle
+        """
+        reports = {}
+        if not os.path.exists(self.report_path):
+            return reports
+        with open(self.report_path) as file:
+            for line in file:
+                try:
+                    report = json.loads(line)
+                except ValueError:
+                    continue
+                reports[report["name"]] = report
+        return reports
+
+    def pending_jobs(self, reports):
+        """
+        H2 -- pending_jobs
+        ===================
+        **Returns the jobs which are not done yet or whose output is
+        missing.**
+
+        Author: Matthias Lederle
+        """
+        return [scene for scene in self.jobs if
+                reports.get(scene["name"], {}).get("status") != "done" or
+                not os.path.exists(scene["output"])]
+
+    def run(self, progress=None):
+        """
+        H2 -- run
+        ===================
+        **Renders all pending jobs with the worker pool and writes the
+        reports.**
+
+        progress is called with the report of every finished job.
+
+        Return values:
+
+        * summary: Dict with the number of jobs, done, failed and skipped
+          jobs, the wall time and the reports of all jobs
+
+        Author: Matthias Lederle
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        reports = self.read_report()
+        pending = self.pending_jobs(reports)
+        skipped = len(self.jobs) - len(pending)
+        begin = time.perf_counter()
+        if len(pending) > 0:
+            with concurrent.futures.ProcessPoolExecutor(
+                    min(self.workers, len(pending))) as pool, \
+                    open(self.report_path, "a") as report_file:
+                futures = [pool.submit(render_job, scene) for scene in
+                           pending]
+                for future in concurrent.futures.as_completed(futures):
+                    report = future.result()
+                    reports[report["name"]] = report
+                    # write the report at once: it marks the job as done
+                    # for a later run
+                    report_file.write(json.dumps(report) + "\n")
+                    report_file.flush()
+                    if progress is not None:
+                        progress(report)
+        job_reports = [reports[scene["name"]] for scene in self.jobs if
+                       scene["name"] in reports]
+        summary = {"jobs": len(self.jobs),
+                   "done": sum(report["status"] == "done" for report in
+                               job_reports),
+                   "failed": sum(report["status"] == "failed" for report in
+                                 job_reports),
+                   "skipped": skipped,
+                   "walltime": time.perf_counter() - begin,
+                   "reports": job_reports}
+        with open(self.summary_path, "w") as file:
+            json.dump(summary, file, indent=2)
+        return summary
+
+
+def main(argv=None):
+    """
+    H2 -- main
+    ===================
+    **Command line interface audio3d-batch: renders all jobs of a manifest
+    file and prints a summary.**
+
+    Author: Matthias Lederle
+    """
+    parser = argparse.ArgumentParser(
+        prog="audio3d-batch",
+        description="Render the scene jobs of a manifest (JSON) to binaural "
+                    "wave files with a pool of worker processes. Jobs which "
+                    "are already done are skipped.")
+    parser.add_argument("manifest", help="JSON manifest of scene jobs")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="number of worker processes (default: number "
+                             "of CPUs)")
+    args = parser.parse_args(argv)
+    try:
+        jobs, output_dir = load_manifest(args.manifest)
+    except (ValueError, KeyError, OSError) as error:
+        print("audio3d-batch: " + str(error), file=sys.stderr)
+        return 1
+
+    def progress(report):
+        if report["status"] == "done":
+            print("{}: {:.1f} s in {:.2f} s".format(
+                report["name"], report["seconds"], report["walltime"]))
+        else:
+            print("{}: failed: {}".format(report["name"], report["error"]),
+                  file=sys.stderr)
+
+    summary = BatchRenderer(jobs, output_dir, args.workers).run(progress)
+    print("{} jobs: {} done, {} failed, {} skipped in {:.1f} s".format(
+        summary["jobs"], summary["done"], summary["failed"],
+        summary["skipped"], summary["walltime"]))
+    return 0 if summary["failed"] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
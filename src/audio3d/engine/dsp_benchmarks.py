@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_decode
+import audio3d.engine.dsp_state
+import audio3d.engine.dsp
+import audio3d.engine.dsp_offline
+import audio3d.engine.dsp_resources
+import numpy as np
+import subprocess
+import tempfile
+import tracemalloc
+import json
+import time
+import gc
+import sys
+import os
+
+
+def benchmark_decode(sourcenumber=12, seconds=30, processes=None,
+                     file_format="FLAC"):
+    """
+    H2 -- benchmark_decode
+    ===================
+    **Measures the decoding throughput of the DecoderPool for sourcenumber
+    concurrent compressed sources.**
+
+    Creates sourcenumber compressed files with seconds of noise, decodes all
+    of them at the same time with the DecoderPool and reads the blocks as
+    fast as possible like the DSP thread does.
+
+    Return values:
+
+    * result: Dict with the wall time, the decoded seconds of audio per
+      second of wall time for all sources together (realtime_factor) and
+      per source
+
+    Author: Matthias Lederle
+    """
+    import soundfile
+    samplerate = 44100
+    hopsize = 256
+    directory = tempfile.mkdtemp()
+    ending = {"FLAC": ".flac", "OGG": ".ogg"}[file_format]
+    paths = []
+    for source in range(sourcenumber):
+        path = os.path.join(directory, "source" + str(source) + ending)
+        noise = (np.random.randn(seconds * samplerate) * 3000).astype(
+            np.int16)
+        soundfile.write(path, noise, samplerate, format=file_format)
+        paths.append(path)
+    pool = audio3d.engine.dsp_decode.DecoderPool(hopsize, samplerate,
+                                                 processes)
+    block = np.zeros((hopsize, ), dtype=np.float32)
+    begin = time.perf_counter()
+    sources = [pool.open(path) for path in paths]
+    active = [True for source in sources]
+    while any(active):
+        for number, source in enumerate(sources):
+            if active[number]:
+                if source.ring.fill_level() == 0 and \
+                        source.ring.header[source.ring.ended_flag] == 0:
+                    continue
+                active[number], _ = source.read_hop(block)
+    walltime = time.perf_counter() - begin
+    for source in sources:
+        source.stop()
+    pool.close()
+    for path in paths:
+        os.remove(path)
+    os.rmdir(directory)
+    return {"sources": sourcenumber, "walltime": walltime,
+            "realtime_factor": sourcenumber * seconds / walltime,
+            "realtime_factor_per_source": seconds / walltime}
+
+
+def benchmark_playback(sourcenumber=4, seconds=5, realtime=False,
+                       bufferblocks=5):
+    """
+    H2 -- benchmark_playback
+    ===================
+    **Measures the whole playback of Dsp.run() with sourcenumber speakers
+    on the null audio backend, without sound card.**
+
+    With realtime=False the blocks are played as fast as they are rendered,
+    so the real time factor of the dsp thread together with the playback
+    ring buffer and the callback is measured. With realtime=True the
+    playback is paced like a sound card and the underruns show whether the
+    buffer depth is sufficient.
+
+    Return values:
+
+    * result: Dict with the wall time, the played seconds per second of
+      wall time (realtime_factor), the playback status of DspOut and the
+      metrics snapshot
+
+    Author: Felix Pfreundtner
+    """
+    state = audio3d.engine.dsp_state.DspState()
+    path = audio3d.engine.dsp_resources.resource_filename(
+        "audio_in/sine_1kHz_(44.1,1,16).wav")
+    state.gui_sp = [{"angle": source * 360 // sourcenumber, "distance": 1,
+                     "path": path, "normalize": False, "loop": True,
+                     "length": seconds} for source in range(sourcenumber)]
+    state.gui_settings = {"hrtf_database": "kemar_normal_ear",
+                          "inverse_filter_active": False,
+                          "bufferblocks": bufferblocks, "record": False,
+                          "audio_backend": "null",
+                          "audio_backend_realtime": realtime}
+    state.dsp_stop = False
+    dsp_obj = audio3d.engine.dsp.Dsp(state)
+    begin = time.perf_counter()
+    dsp_obj.run()
+    # wait until the playback thread played the last block
+    state.wait_dsp(lambda: state.dsp_stop is True)
+    walltime = time.perf_counter() - begin
+    return {"sources": sourcenumber, "realtime": realtime,
+            "walltime": walltime, "realtime_factor": seconds / walltime,
+            "playback": dsp_obj.dspout_obj.playback_status(),
+            "metrics": state.dsp_metrics.snapshot()}
+
+
+def benchmark_render_threads(sourcenumbers=(1, 2, 4, 8, 16, 32),
+                             threadnumbers=(1, 2, 4, 8), blocks=200):
+    """
+    H2 -- benchmark_render_threads
+    ===================
+    **Measures the render time of the dsp algorithm for every number of
+    speakers in sourcenumbers rendered by every number of threads in
+    threadnumbers (see gui_settings["render_threads"]).**
+
+    blocks binaural blocks are rendered offline, without playback. The
+    automatic fallback to serial rendering for few speakers is switched
+    off, so the result shows from which number of speakers the thread pool
+    is faster.
+
+    Return values:
+
+    * results: List of dicts with the number of speakers and threads, the
+      wall time, the rendered seconds per second of wall time
+      (realtime_factor) and the speedup against one thread
+
+    Author: Felix Pfreundtner
+    """
+    path = audio3d.engine.dsp_resources.resource_filename(
+        "audio_in/sine_1kHz_(44.1,1,16).wav")
+    results = []
+    for sourcenumber in sourcenumbers:
+        serial_walltime = None
+        for threads in threadnumbers:
+            scene = {"sources": [{"path": path, "distance": 1, "loop": True,
+                                  "angle": source * 360 // sourcenumber,
+                                  "length": 60} for source in
+                                 range(sourcenumber)],
+                     "settings": {"render_threads": threads,
+                                  "render_threads_min_speakers": 1}}
+            renderer = audio3d.engine.dsp_offline.OfflineRenderer(scene)
+            begin = time.perf_counter()
+            renderer.render_blocks(0, blocks, lambda block: None)
+            walltime = time.perf_counter() - begin
+            renderer.dsp_obj.close_workers()
+            renderer.dsp_obj.dspin_obj.close_streams()
+            if serial_walltime is None:
+                serial_walltime = walltime
+            dspin_obj = renderer.dsp_obj.dspin_obj
+            results.append({"sources": sourcenumber, "threads": threads,
+                            "walltime": walltime,
+                            "realtime_factor": blocks * dspin_obj.hopsize /
+                            dspin_obj.samplerate / walltime,
+                            "speedup": serial_walltime / walltime})
+    return results
+
+
+def benchmark_render_processes(sourcenumbers=(4, 16, 32, 64),
+                               processnumbers=(1, 2, 4, 8), blocks=200):
+    """
+    H2 -- benchmark_render_processes
+    ===================
+    **Measures the render time of the dsp algorithm for every number of
+    speakers in sourcenumbers rendered by every number of worker processes
+    in processnumbers (see gui_settings["render_processes"] and
+    ShardedRenderer).**
+
+    blocks binaural blocks are rendered offline, without playback. One
+    process renders serially in the main process. A real time factor above
+    1 means that the speakers can be played in real time.
+
+    Return values:
+
+    * results: List of dicts with the number of speakers and processes, the
+      wall time, the rendered seconds per second of wall time
+      (realtime_factor), the speedup against one process and the number of
+      cpus
+
+    Author: Felix Pfreundtner
+    """
+    path = audio3d.engine.dsp_resources.resource_filename(
+        "audio_in/sine_1kHz_(44.1,1,16).wav")
+    results = []
+    for sourcenumber in sourcenumbers:
+        serial_walltime = None
+        for processes in processnumbers:
+            scene = {"sources": [{"path": path, "distance": 1, "loop": True,
+                                  "angle": source * 360 // sourcenumber,
+                                  "length": 60} for source in
+                                 range(sourcenumber)],
+                     "settings": {"render_processes": processes}}
+            renderer = audio3d.engine.dsp_offline.OfflineRenderer(scene)
+            begin = time.perf_counter()
+            renderer.render_blocks(0, blocks, lambda block: None)
+            walltime = time.perf_counter() - begin
+            renderer.dsp_obj.close_workers()
+            renderer.dsp_obj.dspin_obj.close_streams()
+            if serial_walltime is None:
+                serial_walltime = walltime
+            dspin_obj = renderer.dsp_obj.dspin_obj
+            results.append({"sources": sourcenumber, "processes": processes,
+                            "walltime": walltime,
+                            "realtime_factor": blocks * dspin_obj.hopsize /
+                            dspin_obj.samplerate / walltime,
+                            "speedup": serial_walltime / walltime,
+                            "cpus": os.cpu_count()})
+    return results
+
+
+def benchmark_offline_parallel(jobnumbers=(1, 2, 4), sourcenumber=4,
+                               seconds=300):
+    """
+    H2 -- benchmark_offline_parallel
+    ===================
+    **Measures how the offline rendering of a scene of seconds length with
+    sourcenumber speakers scales with the number of parallel time segments
+    in jobnumbers (see OfflineRenderer.render_parallel()).**
+
+    The scene is rendered to a temporary wave file with every number of
+    jobs. The efficiency is the speedup against one job divided by the
+    number of jobs, near 1 for linear scaling.
+
+    Return values:
+
+    * results: List of dicts with the number of jobs, the wall time, the
+      rendered seconds per second of wall time (realtime_factor), the
+      speedup against one job, the efficiency and the number of cpus
+
+    Author: Matthias Lederle
+    """
+    path = audio3d.engine.dsp_resources.resource_filename(
+        "audio_in/sine_1kHz_(44.1,1,16).wav")
+    scene = {"sources": [{"path": path, "distance": 1, "loop": True,
+                          "angle": source * 360 // sourcenumber}
+                         for source in range(sourcenumber)],
+             "duration": seconds}
+    directory = tempfile.mkdtemp()
+    output = os.path.join(directory, "binauralmix.wav")
+    results = []
+    serial_walltime = None
+    for jobs in jobnumbers:
+        renderer = audio3d.engine.dsp_offline.OfflineRenderer(scene)
+        result = renderer.render(output, jobs)
+        os.remove(output)
+        if serial_walltime is None:
+            serial_walltime = result["walltime"]
+        speedup = serial_walltime / result["walltime"]
+        results.append({"jobs": jobs, "walltime": result["walltime"],
+                        "realtime_factor": result["realtime_factor"],
+                        "speedup": speedup, "efficiency": speedup / jobs,
+                        "cpus": os.cpu_count()})
+    os.rmdir(directory)
+    return results
+
+
+def benchmark_render_allocations(sourcenumbers=(1, 4, 16), blocks=2000,
+                                 warmup_blocks=20, traced_blocks=50,
+                                 record=False):
+    """
+    H2 -- benchmark_render_allocations
+    ===================
+    **Measures the memory allocated while rendering the blocks in steady
+    state and the jitter of the render time of the blocks for every number
+    of speakers in sourcenumbers.**
+
+    After warmup_blocks blocks blocks are rendered offline and timed one by
+    one. Then traced_blocks further blocks are rendered with tracemalloc:
+    the peak of the traced memory above the memory before these blocks is
+    the memory a block allocates at most. Memory allocated per block lets
+    the garbage collector run and the render time jitter. With record=True
+    the blocks are also recorded to a temporary wave file like during a
+    playback with checked record box, the traced blocks wait for the record
+    writer thread.
+
+    Return values:
+
+    * results: List of dicts with the number of speakers, the memory
+      allocated by a block in bytes (allocated_bytes), the number of
+      garbage collections, the median, 99th percentile and maximum render
+      time of a block in seconds and the jitter (99th percentile - median)
+
+    Author: Felix Pfreundtner
+    """
+    path = audio3d.engine.dsp_resources.resource_filename(
+        "audio_in/sine_1kHz_(44.1,1,16).wav")
+    results = []
+    for sourcenumber in sourcenumbers:
+        scene = {"sources": [{"path": path, "distance": 1, "loop": True,
+                              "angle": source * 360 // sourcenumber,
+                              "length": 3600} for source in
+                             range(sourcenumber)]}
+        renderer = audio3d.engine.dsp_offline.OfflineRenderer(scene)
+        if record is True:
+            directory = tempfile.mkdtemp()
+            renderer.state.gui_settings["record_path"] = os.path.join(
+                directory, "binauralmix.wav")
+            renderer.dsp_obj.dspout_obj.open_recordfile(
+                renderer.dsp_obj.dspin_obj.samplerate)
+        # time after every written block
+        times = []
+        collections = sum(stats["collections"] for stats in gc.get_stats())
+        renderer.render_blocks(0, warmup_blocks + blocks,
+                               lambda block: times.append(
+                                   time.perf_counter()))
+        collections = sum(stats["collections"] for stats in
+                          gc.get_stats()) - collections
+        # memory traced before the first traced block
+        traced = []
+
+        def trace(block):
+            # recording: wait until the writer thread wrote the blocks, like
+            # the playback is paced by the sound card, so the pool of record
+            # buffers does not grow while tracing
+            recordwriter = renderer.dsp_obj.dspout_obj.recordwriter
+            while recordwriter is not None and len(
+                    recordwriter.free_buffers) < recordwriter.buffer_count:
+                time.sleep(0)
+            if len(traced) == 0:
+                tracemalloc.start()
+                traced.append(tracemalloc.get_traced_memory()[0])
+                tracemalloc.reset_peak()
+        first = warmup_blocks + blocks
+        renderer.render_blocks(first, first + traced_blocks + 1, trace)
+        allocated = tracemalloc.get_traced_memory()[1] - traced[0]
+        tracemalloc.stop()
+        renderer.dsp_obj.close_workers()
+        renderer.dsp_obj.dspin_obj.close_streams()
+        if record is True:
+            recordwriter = renderer.dsp_obj.dspout_obj.recordwriter
+            recordwriter.close()
+            os.remove(recordwriter.path)
+            os.rmdir(directory)
+        blocktimes = np.diff(times[warmup_blocks - 1:])
+        median = float(np.percentile(blocktimes, 50))
+        percentile = float(np.percentile(blocktimes, 99))
+        results.append({"sources": sourcenumber,
+                        "allocated_bytes": allocated,
+                        "gc_collections": collections,
+                        "median": median, "percentile_99": percentile,
+                        "max": float(np.amax(blocktimes)),
+                        "jitter": percentile - median})
+    return results
+
+
+def benchmark_import(modules=("audio3d.engine", "audio3d.engine.dsp",
+                              "audio3d.engine.dsp_offline",
+                              "audio3d.gui_utils"), repeats=5):
+    """
+    H2 -- benchmark_import
+    ===================
+    **Measures the import time of every module in modules in a new python
+    interpreter and checks which heavy optional modules it loads.**
+
+    The fastest of repeats imports is taken, so the file system cache does
+    not distort the result.
+
+    Return values:
+
+    * results: List of dicts with the module, the import time in seconds
+      (None if the import failed, e.g. without PySide) and the loaded
+      optional modules (PySide, OpenGL, pyaudio, pkg_resources,
+      scipy.signal)
+
+    Author: Matthias Lederle
+    """
+    code = ("import sys, time, json\n"
+            "begin = time.perf_counter()\n"
+            "import {}\n"
+            "seconds = time.perf_counter() - begin\n"
+            "print(json.dumps([seconds, [module for module in ['PySide', "
+            "'OpenGL', 'pyaudio', 'pkg_resources', 'scipy.signal'] if "
+            "module in sys.modules]]))")
+    # the directory which contains the audio3d package
+    path = os.path.dirname(audio3d.engine.dsp_resources.package_directory)
+    environment = dict(os.environ, PYTHONPATH=path)
+    results = []
+    for module in modules:
+        times = []
+        loaded = None
+        for repeat in range(repeats):
+            process = subprocess.run([sys.executable, "-c",
+                                      code.format(module)],
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL,
+                                     env=environment)
+            if process.returncode != 0:
+                break
+            seconds, loaded = json.loads(process.stdout.decode())
+            times.append(seconds)
+        results.append({"module": module,
+                        "seconds": min(times) if times else None,
+                        "loaded": loaded})
+    return results
+
+
+def main():
+    """
+    H2 -- main
+    ===================
+    **Runs all benchmarks and prints the results.**
+
+    Author: Matthias Lederle
+    """
+    for sourcenumber in (1, 4, 10, 16):
+        print("decode", benchmark_decode(sourcenumber))
+    for sourcenumber in (1, 4, 10, 16):
+        result = benchmark_playback(sourcenumber)
+        print("playback", {key: result[key] for key in
+                           ("sources", "walltime", "realtime_factor",
+                            "playback")})
+    for result in benchmark_import():
+        print("import", result)
+    for result in benchmark_render_threads():
+        print("render threads", result)
+    for result in benchmark_render_processes():
+        print("render processes", result)
+    for result in benchmark_offline_parallel():
+        print("offline parallel", result)
+    for result in benchmark_render_allocations():
+        print("render allocations", result)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
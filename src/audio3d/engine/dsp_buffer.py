@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import collections
+import math
+
+
+class BufferDepthController:
+    """
+    BufferDepthController
+    ************************
+    **This class adapts the number of blocks which the dsp thread renders
+    in advance of the PortAudio playback (buffer depth) at runtime.**
+
+    For every rendered block it gets the render time, the fill level of the
+    playback ring buffer and the number of underruns of the callback. The
+    mean and the variance of the render time are tracked as exponentially
+    weighted moving averages. The buffer depth grows at once after an
+    underrun or if a render time peak (mean plus safety times standard
+    deviation) would not be covered by the buffered blocks. It shrinks by
+    one block after shrink_blocks blocks without underrun, in which at least
+    one spare block was always buffered. So the latency of the head
+    tracking stays as low as possible without underruns. All decisions are
+    kept for the metrics.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # largest buffer depth if no limit is given in gui_settings
+    default_max_depth = 32
+
+    def __init__(self, hop_time, depth, min_depth=1, max_depth=None,
+                 alpha=0.05, safety=4.0, shrink_blocks=None):
+        """
+        **__init__ starts with depth blocks. hop_time is the time of one
+        block in seconds, shrink_blocks defaults to the number of blocks in
+        2 seconds.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        if max_depth is None:
+            max_depth = self.default_max_depth
+        if shrink_blocks is None:
+            shrink_blocks = max(1, int(2 / hop_time))
+        self.hop_time = hop_time
+        self.min_depth = min_depth
+        self.max_depth = max(min_depth, max_depth)
+        self.depth = min(max(depth, self.min_depth), self.max_depth)
+        self.alpha = alpha
+        self.safety = safety
+        self.shrink_blocks = shrink_blocks
+        # moving average and variance of the render time
+        self.render_mean = 0.0
+        self.render_var = 0.0
+        # number of blocks seen by the controller
+        self.blocks = 0
+        # underruns of the callback at the last update
+        self.underruns = 0
+        # blocks since the last decision and lowest fill level in them
+        self.stable_blocks = 0
+        self.min_fill = None
+        # number of decisions to grow and shrink the buffer
+        self.grows = 0
+        self.shrinks = 0
+        # last decisions: (block, old depth, new depth, reason)
+        self.decisions = collections.deque(maxlen=100)
+
+    def required_depth(self):
+        """
+        H2 -- required_depth
+        ===================
+        **Returns the buffer depth needed to cover a render time peak.**
+
+        A render time peak of mean + safety * standard deviation needs
+        ceil(peak / hop_time) block times, one more block is played while
+        the next one is rendered.
+
+        Author: Felix Pfreundtner
+        """
+        peak = self.render_mean + self.safety * math.sqrt(self.render_var)
+        return math.ceil(peak / self.hop_time) + 1
+
+    def update(self, render_time, fill_level, underruns):
+        """
+        H2 -- update
+        ===================
+        **Updates the statistics with one rendered block and decides on the
+        buffer depth.**
+
+        Return values:
+
+        * change: Number of blocks the buffer depth grew (positive) or
+          shrank (negative)
+
+        Author: Felix Pfreundtner
+        """
+        # exponentially weighted moving mean and variance of render time
+        if self.blocks == 0:
+            self.render_mean = render_time
+            self.render_var = 0.0
+        else:
+            diff = render_time - self.render_mean
+            self.render_mean += self.alpha * diff
+            self.render_var = (1 - self.alpha) * (self.render_var +
+                                                  self.alpha * diff * diff)
+        self.blocks += 1
+        required = self.required_depth()
+        depth = self.depth
+        reason = None
+        if underruns > self.underruns:
+            depth = self.depth + 1
+            reason = "underrun"
+        elif required > self.depth:
+            depth = required
+            reason = "render time"
+        else:
+            if self.min_fill is None or fill_level < self.min_fill:
+                self.min_fill = fill_level
+            self.stable_blocks += 1
+            if self.stable_blocks >= self.shrink_blocks:
+                # shrink only if a spare block was always buffered
+                if self.min_fill >= 2 and required < self.depth:
+                    depth = self.depth - 1
+                    reason = "stable"
+                self.stable_blocks = 0
+                self.min_fill = None
+        self.underruns = underruns
+        depth = min(max(depth, self.min_depth), self.max_depth)
+        change = depth - self.depth
+        if change != 0:
+            self.decisions.append((self.blocks, self.depth, depth, reason))
+            if change > 0:
+                self.grows += 1
+            else:
+                self.shrinks += 1
+            self.depth = depth
+            self.stable_blocks = 0
+            self.min_fill = None
+        return change
+
+    def metrics(self):
+        """
+        H2 -- metrics
+        ===================
+        **Returns the state and the decisions of the controller.**
+
+        Return values:
+
+        * metrics: Dict with the current buffer depth, its limits, the
+          moving mean and standard deviation of the render time in seconds,
+          the required depth, the number of grow and shrink decisions and
+          the last decisions as (block, old depth, new depth, reason)
+
+        Author: Felix Pfreundtner
+        """
+        return {"depth": self.depth, "min_depth": self.min_depth,
+                "max_depth": self.max_depth,
+                "render_mean": self.render_mean,
+                "render_std": math.sqrt(self.render_var),
+                "required_depth": self.required_depth(),
+                "blocks": self.blocks, "grows": self.grows,
+                "shrinks": self.shrinks,
+                "decisions": list(self.decisions)}
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_ring
+import numpy as np
+import multiprocessing
+import queue
+import time
+import os
+
+
+def fill_slot(file, slot, loop):
+    """
+    H2 -- fill_slot
+    ===================
+    **Decodes the next len(slot) mono samples of file into slot.**
+
+    If loop is True, decoding continues at the beginning of the file when
+    the end is reached, else the slot is zeropadded.
+
+    Return values:
+
+    * framenumber: Number of decoded samples
+
+    Author: Matthias Lederle
+    """
+    hopsize = slot.shape[0]
+    framenumber = 0
+    while framenumber < hopsize:
+        frames = file.read(hopsize - framenumber, dtype="int16",
+                           always_2d=True)
+        # make stereo files mono the same way as DspIn.read_sp()
+        if frames.shape[1] == 2:
+            slot[framenumber:framenumber + frames.shape[0]] = \
+                frames[:, 0] + frames[:, 1] / 2
+        else:
+            slot[framenumber:framenumber + frames.shape[0]] = frames[:, 0]
+        framenumber += frames.shape[0]
+        if framenumber < hopsize:
+            if not loop or file.frames == 0:
+                break
+            file.seek(0)
+    slot[framenumber:] = 0
+    return framenumber
+
+
+def decoder_worker(commands, hopsize, samplerate):
+    """
+    H2 -- decoder_worker
+    ===================
+    **Main loop of one decoder process.**
+
+    The process decodes all compressed files which were assigned to it
+    block by block into the shared memory ring buffers of the files. Every
+    ring buffer slot holds hopsize mono samples. If all ring buffers are
+    full the process waits for new commands. Commands are tuples:
+
+    * ("open", path, ring_name, slots, loop): start decoding path into ring,
+      if loop is True the file is decoded endlessly
+    * ("seek", ring_name, frame, generation): continue decoding at frame,
+      see CompressedSource.seek()
+    * ("close", ring_name): stop decoding into ring
+    * ("stop", ): end the process
+
+    Author: Matthias Lederle
+    """
+    import soundfile
+    # [file, ring, loop, finished] for every ring name
+    sources = {}
+    # decode at most this number of blocks of one source before the next
+    # source is served
+    batch = 8
+    # wait a quarter block when there is nothing to decode
+    idle_time = hopsize / samplerate / 4
+    while True:
+        try:
+            if len(sources) == 0:
+                command = commands.get()
+            else:
+                command = commands.get_nowait()
+        except queue.Empty:
+            command = None
+        if command is not None:
+            if command[0] == "stop":
+                break
+            if command[0] == "open":
+                _, path, ring_name, slots, loop = command
+                try:
+                    ring = audio3d.engine.dsp_ring.RingBuffer(
+                        slots, (hopsize, ), np.float32, name=ring_name)
+                except FileNotFoundError:
+                    # source was already closed by the DSP thread
+                    continue
+                sources[ring_name] = [soundfile.SoundFile(path), ring, loop,
+                                      False]
+            if command[0] == "seek" and command[1] in sources:
+                _, ring_name, frame, generation = command
+                source = sources[ring_name]
+                source[0].seek(min(frame, source[0].frames))
+                source[3] = False
+                # blocks written until now belong to the old position
+                ring = source[1]
+                ring.header[ring.ended_flag] = 0
+                ring.header[CompressedSource.seek_write_count] = \
+                    ring.header[ring.write_counter]
+                ring.header[CompressedSource.seek_generation] = generation
+            if command[0] == "close" and command[1] in sources:
+                file, ring, loop, finished = sources.pop(command[1])
+                file.close()
+                ring.close()
+            continue
+        decoded = False
+        for ring_name, source in sources.items():
+            file, ring, loop, finished = source
+            for block in range(batch):
+                if finished:
+                    break
+                slot = ring.write_slot()
+                if slot is None:
+                    break
+                framenumber = fill_slot(file, slot, loop)
+                del slot
+                decoded = True
+                ring.commit_write()
+                if framenumber < hopsize:
+                    # end of file: remember valid frames of last block and
+                    # mark the end after the last block is visible
+                    ring.header[ring.last_frames] = framenumber
+                    ring.header[ring.ended_flag] = 1
+                    source[3] = finished = True
+        if not decoded:
+            time.sleep(idle_time)
+    for file, ring, loop, finished in sources.values():
+        file.close()
+        ring.close()
+
+
+class DecoderPool:
+    """
+    DecoderPool
+    ************************
+    **This class holds a pool of decoder processes which decode compressed
+    (FLAC/Ogg) speaker files in the background.**
+
+    The compressed files are distributed over the processes, so the decoding
+    runs parallel to the DSP thread and is not limited by the global
+    interpreter lock. Every file is decoded into its own shared memory ring
+    buffer which is read by a CompressedSource in the DSP thread.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # file endings which are decoded by the pool
+    compressed_endings = (".flac", ".ogg", ".oga")
+
+    def __init__(self, hopsize, samplerate, processes=None):
+        """
+        **__init__ starts processes decoder processes (default: number of
+        CPUs - 1).**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        if processes is None:
+            processes = max(1, (os.cpu_count() or 2) - 1)
+        self.hopsize = hopsize
+        self.samplerate = samplerate
+        self.workers = []
+        for process in range(processes):
+            commands = multiprocessing.Queue()
+            worker = multiprocessing.Process(
+                target=decoder_worker, args=(commands, hopsize,
+                                             samplerate))
+            worker.daemon = True
+            worker.start()
+            self.workers.append((worker, commands))
+        # index of the process which gets the next file
+        self.next_worker = 0
+
+    @classmethod
+    def is_compressed_path(cls, path):
+        """
+        H2 -- is_compressed_path
+        ===================
+        **Checks whether a speaker file has to be decoded by the pool.**
+
+        Author: Matthias Lederle
+        """
+        return path.lower().endswith(cls.compressed_endings)
+
+    @staticmethod
+    def file_param(path):
+        """
+        H2 -- file_param
+        ===================
+        **Reads the header of a compressed file.**
+
+        Return values:
+
+        * frames: Total number of samples per channel
+        * samplerate: Samplerate of the file
+        * channels: Number of channels
+
+        Author: Matthias Lederle
+        """
+        import soundfile
+        info = soundfile.info(path)
+        return info.frames, info.samplerate, info.channels
+
+    def open(self, path, slots=64, loop=False):
+        """
+        H2 -- open
+        ===================
+        **Starts decoding path in the next process of the pool. If loop is
+        True the file is played endlessly.**
+
+        Return values:
+
+        * source: CompressedSource which reads the decoded blocks
+
+        Author: Matthias Lederle
+        """
+        ring = audio3d.engine.dsp_ring.RingBuffer(
+            slots, (self.hopsize, ), np.float32, shared=True)
+        commands = self.workers[self.next_worker][1]
+        self.next_worker = (self.next_worker + 1) % len(self.workers)
+        commands.put(("open", path, ring.name, slots, loop))
+        return CompressedSource(ring, commands)
+
+    def close(self):
+        """
+        H2 -- close
+        ===================
+        **Stops all decoder processes.**
+
+        Author: Matthias Lederle
+        """
+        for worker, commands in self.workers:
+            commands.put(("stop", ))
+        for worker, commands in self.workers:
+            worker.join(1)
+        self.workers = []
+
+
+class CompressedSource:
+    """
+    CompressedSource
+    ************************
+    **Speaker source which reads the blocks of a compressed file decoded by
+    the DecoderPool.**
+
+    It provides the same read_hop() method as the live sources in
+    audio3d.engine.dsp_stream, so DspIn.get_sp_block() reads it block by block.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # header entries of the ring buffer used for seeking: generation of the
+    # last executed seek and write counter at which the new position begins
+    seek_generation = 4
+    seek_write_count = 5
+
+    def __init__(self, ring, commands):
+        """
+        **__init__ gets the ring buffer and the command queue of the decoder
+        process.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.ring = ring
+        self.commands = commands
+        # number of blocks which were not decoded in time
+        self.underruns = 0
+        # whether all blocks of the file have been read
+        self.finished = False
+        # whether read_hop() waits for the decoder process instead of
+        # returning zeros (offline rendering)
+        self.blocking = False
+        # generation of the last requested seek and whether the decoder
+        # process has not executed it yet
+        self.generation = 0
+        self.seeking = False
+
+    def start(self):
+        """
+        H2 -- start
+        ===================
+        **Nothing to do: decoding started already when the file was opened
+        in the DecoderPool.**
+
+        Author: Matthias Lederle
+        """
+        pass
+
+    def wait_prefill(self, slots, timeout=5):
+        """
+        H2 -- wait_prefill
+        ===================
+        **Waits until slots blocks are decoded, the whole file is decoded or
+        timeout seconds are over.**
+
+        Author: Matthias Lederle
+        """
+        slots = min(slots, self.ring.slots)
+        end_time = time.perf_counter() + timeout
+        while not self.seek_done() and time.perf_counter() < end_time:
+            time.sleep(0.001)
+        while self.ring.fill_level() < slots and \
+                self.ring.header[self.ring.ended_flag] == 0 and \
+                time.perf_counter() < end_time:
+            time.sleep(0.001)
+
+    def read_hop(self, block):
+        """
+        H2 -- read_hop
+        ===================
+        **Reads the next decoded block into block.**
+
+        If the decoder process did not decode the block in time, zeros are
+        returned and the underrun is counted, unless blocking is True.
+
+        Return values:
+
+        * continue_input: False if the last block of the file was read
+        * capture_time: Always None (no live source)
+
+        Author: Matthias Lederle
+        """
+        if self.blocking is True:
+            self.wait_prefill(1, timeout=60)
+        if not self.seek_done():
+            # decoder process did not reach the new position yet
+            block[:] = 0
+            self.underruns += 1
+            return True, None
+        if self.finished:
+            block[:] = 0
+            return False, None
+        # read ended flag before the slot: the last slot is written before
+        # the flag is set
+        ended = self.ring.header[self.ring.ended_flag] != 0
+        slot = self.ring.read_slot()
+        if slot is None:
+            block[:] = 0
+            if ended:
+                self.finished = True
+                return False, None
+            self.underruns += 1
+            return True, None
+        block[:] = slot
+        del slot
+        self.ring.commit_read()
+        if ended and self.ring.fill_level() == 0:
+            self.finished = True
+            return False, None
+        return True, None
+
+    def seek(self, frame):
+        """
+        H2 -- seek
+        ===================
+        **Continues decoding at sample frame of the file.**
+
+        The decoder process is asked to seek in the file, which does not
+        need to decode the file from the beginning. Until the decoder
+        process reached the new position read_hop() returns zeros, then all
+        blocks of the old position are dropped at once (see seek_done()).
+
+        Author: Matthias Lederle
+        """
+        self.generation += 1
+        self.seeking = True
+        self.finished = False
+        self.commands.put(("seek", self.ring.name, frame, self.generation))
+
+    def seek_done(self):
+        """
+        H2 -- seek_done
+        ===================
+        **Checks whether the decoder process executed the last seek.**
+
+        When the seek was executed, all blocks which were decoded before the
+        seek are dropped at once.
+
+        Return values:
+
+        * done: False if the decoder process has not reached the new
+          position yet
+
+        Author: Matthias Lederle
+        """
+        if not self.seeking:
+            return True
+        if self.ring.header[self.seek_generation] != self.generation:
+            return False
+        # drop all blocks decoded before the seek
+        self.ring.header[self.ring.read_counter] = max(
+            self.ring.header[self.ring.read_counter],
+            self.ring.header[self.seek_write_count])
+        self.seeking = False
+        return True
+
+    def stop(self):
+        """
+        H2 -- stop
+        ===================
+        **Stops the decoding and removes the ring buffer.**
+
+        Author: Matthias Lederle
+        """
+        self.commands.put(("close", self.ring.name))
+        self.ring.close(unlink=True)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import collections
+import itertools
+import heapq
+import numpy as np
+
+# change of a speaker parameter at output sample sample: kind is "angle",
+# "distance", "gain" (factor on the distance gain of the speaker) or
+# "hrtf_database" (sp is None, value the name of the database). ramp is
+# the number of samples of the gain ramp or hrtf crossfade (None: default
+# of the settings)
+Event = collections.namedtuple("Event", ["sample", "kind", "sp", "value",
+                                         "ramp"])
+
+
+class EventQueue:
+    """
+    EventQueue
+    ************************
+    **This class transfers timestamped parameter changes from any thread to
+    the dsp thread, which applies them at their sample inside the block.**
+
+    The timestamps are output samples: block n of the playback renders the
+    samples n * hopsize to (n + 1) * hopsize - 1. rendered is the first
+    sample of the block the dsp thread renders at the moment, the playback
+    is bufferblocks blocks behind it. Events are pushed into a deque, whose
+    append() and popleft() are atomic, so neither the pushing threads nor
+    the dsp thread ever hold a lock. Only the dsp thread moves them into a
+    heap sorted by sample and takes the events of every block with
+    take(). Events which are due before the rendered block are applied at
+    its begin.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    kinds = ("angle", "distance", "gain", "hrtf_database")
+
+    def __init__(self):
+        # events pushed by any thread, not yet seen by the dsp thread
+        self.incoming = collections.deque()
+        # events seen by the dsp thread: heap of (sample, number, event),
+        # the number keeps the push order of events with the same sample
+        self.pending = []
+        self.counter = itertools.count()
+        # first output sample of the block which is rendered at the moment
+        self.rendered = 0
+
+    def push(self, sample, kind, value, sp=None, ramp=None):
+        """
+        H2 -- push
+        ===================
+        **Schedules the change of parameter kind of speaker sp to value at
+        output sample sample. Can be called by any thread.**
+
+        Author: Felix Pfreundtner
+        """
+        if kind not in self.kinds:
+            raise ValueError("Unknown parameter event: " + str(kind))
+        if (sp is None) != (kind == "hrtf_database"):
+            raise ValueError("Parameter event " + kind + " needs " +
+                             ("no speaker" if sp is None else "a speaker"))
+        self.incoming.append(Event(int(sample), kind, sp, value, ramp))
+
+    def take(self, end):
+        """
+        H2 -- take
+        ===================
+        **Returns all events before output sample end in the order of their
+        samples. Called by the dsp thread only.**
+
+        Author: Felix Pfreundtner
+        """
+        while len(self.incoming) > 0:
+            event = self.incoming.popleft()
+            heapq.heappush(self.pending,
+                           (event.sample, next(self.counter), event))
+        events = []
+        while len(self.pending) > 0 and self.pending[0][0] < end:
+            events.append(heapq.heappop(self.pending)[2])
+        return events
+
+
+class GainRamp:
+    """
+    GainRamp
+    ************************
+    **This class holds the gain factor of a speaker and ramps it linearly to
+    a new value over a number of samples, also across block borders.**
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, value=None):
+        # gain factor after the last rendered sample
+        self.value = value
+        self.target = value
+        self.step = 0.0
+        # number of samples until the target is reached
+        self.remaining = 0
+
+    def set(self, target, ramp=0):
+        """
+        H2 -- set
+        ===================
+        **Ramps the gain factor from its current value to target within
+        ramp samples (0: at once).**
+
+        Author: Felix Pfreundtner
+        """
+        self.target = target
+        if ramp <= 0 or self.value is None:
+            self.value = target
+            self.remaining = 0
+        else:
+            self.step = (target - self.value) / ramp
+            self.remaining = ramp
+
+    def render(self, curve, begin, end):
+        """
+        H2 -- render
+        ===================
+        **Writes the gain factors of the samples begin to end - 1 of the
+        block into curve.**
+
+        Author: Felix Pfreundtner
+        """
+        count = min(self.remaining, end - begin)
+        if count > 0:
+            curve[begin:begin + count] = self.value + self.step * \
+                np.arange(1, count + 1)
+            self.value += self.step * count
+            self.remaining -= count
+            begin += count
+            if self.remaining == 0:
+                self.value = self.target
+        curve[begin:end] = self.value
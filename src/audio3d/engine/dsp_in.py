@@ -0,0 +1,1500 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import scipy.io.wavfile
+import struct
+import numpy as np
+import math
+from numpy.fft import rfft, irfft
+import audio3d.engine.dsp_analysis
+import audio3d.engine.dsp_resources
+import audio3d.engine.dsp_stream
+import audio3d.engine.dsp_decode
+import audio3d.engine.dsp_state
+import os
+
+
+# numpy >= 2.0 writes the ffts into preallocated arrays (out argument)
+fft_out = np.lib.NumpyVersion(np.__version__) >= "2.0.0"
+
+
+def sp_rows(sps):
+    """
+    H2 -- sp_rows
+    ===================
+    **Returns the rows of the speakers sps, a speaker or a range of
+    speakers, as a slice: indexing the arrays with one row per speaker
+    with it gives views, which are written in place.**
+
+    Author: Felix Pfreundtner
+    """
+    if isinstance(sps, slice):
+        return sps
+    if isinstance(sps, range):
+        return slice(sps.start, sps.stop, sps.step)
+    return slice(sps, sps + 1)
+
+
+def contiguous_rows(rows):
+    """
+    H2 -- contiguous_rows
+    ===================
+    **Checks whether the slice rows of sp_rows() selects neighbouring
+    rows.**
+
+    numpy runs elementwise operations on neighbouring rows of the speaker
+    arrays as one operation on contiguous memory. On every second or third
+    row (the speakers of a render thread) it allocates iterator buffers, so
+    these speakers are processed one by one.
+
+    Author: Felix Pfreundtner
+    """
+    return rows.step is None or rows.step == 1
+
+
+def set_slot(values, sp, value):
+    """
+    H2 -- set_slot
+    ===================
+    **Sets the entry of speaker sp in values, a list or an array with one row
+    per speaker. With sp equal to the number of entries a new entry is
+    appended.**
+
+    Return values:
+
+    * values: values with the entry, a new array if a row was appended
+
+    Author: Felix Pfreundtner
+    """
+    if sp < len(values):
+        values[sp] = value
+    elif isinstance(values, np.ndarray):
+        values = np.concatenate((values, np.asarray(
+            value, dtype=values.dtype)[np.newaxis]))
+    else:
+        values.append(value)
+    return values
+
+
+class DspIn:
+    """
+    DspIn
+    ************************
+    **This class contains all input related variables and methods for
+    the dsp algorithm.**
+
+    It reads in all speaker wave files and hrtf databases and set up the main
+    parameters for FFT. It applies a Hanning window to Speakerinput and
+    provides a method to convolve the hrtf impulse response with the speaker
+    input in FFT Frequency domain.
+
+    The blocks and hrtfs of all speakers are rows of one array each
+    (sp_block, hrtf_block_fft, hrtf_max_amp), so window and convolution
+    run as one numpy operation over all speakers of a block.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # hrtf databases in time and frequency domain which were already loaded
+    # in this process: {(hrtf_database, fft_blocksize): (hrtf_database,
+    # hrtf_database_fft)}. So a new playback or a long living batch worker
+    # does not read the hrtf files again.
+    hrtf_cache = {}
+    # lists and arrays with one entry per speaker, which are filled by
+    # insert_sp()
+    sp_lists = ("hrtf_max_amp", "sp_max_amp", "sp_norm_amp", "sp_analysis",
+                "sp_stream", "sp_analysis_live", "sp_loop", "hrtf_block_fft",
+                "sp_param", "sp_start", "sp_offset", "sp_length", "sp_input",
+                "sp_block", "sp_stream_block", "sp_stream_capture_time",
+                "sp_stream_refill", "sp_block_padded", "sp_block_fft",
+                "sp_magnitude_spectrum", "sp_max_magnitude",
+                "hrtf_magnitude_spectrum", "hrtf_max_magnitude",
+                "sp_binaural_block_frequency", "sp_binaural_block_time",
+                "time_max_amp", "time_min_amp", "sp_hann", "sp_block_fft_l_r")
+
+    def __init__(self, state_init, decoder_pool=None):
+        """
+        **__init__ is called by DSP and creates all variables which
+        are relevant for the input part of DSP run() method's while loop. It
+        sets up Parameters for the FFT. It also sets up parameters for the read
+        in of the HRTF and Speaker wave files. After setting up all parameters
+        it reads in all speaker wave files. It also reads in the HRTF
+        Database which was selected by the GUI MainWindow and brings it for
+        higher algorithm performance directly into Frequency Domain with FFT.
+        Compressed files are decoded by decoder_pool if given (see
+        prepare_sp()).**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+
+        self.state = state_init
+        # snapshot of gui_sp and gui_settings of the current block, set by
+        # Dsp.update_scene()
+        self.scene = state_init.scene
+        # Number of all speakers
+        self.spn = len(self.state.gui_sp)
+        # Array with a row for every speaker with the max. values of the
+        # hrtfs of each ear.
+        self.hrtf_max_amp = np.zeros((self.spn, 2), dtype=np.float32)
+        # Dict with a key for every speaker and two values. These
+        # are the max. values fetched from the speaker-file.
+        self.sp_max_amp = [0 for sp in range(self.spn)]
+        # List with the maximum amplitude every speaker should have after
+        # normalization (peak or loudness normalization)
+        self.sp_norm_amp = [32767 for sp in range(self.spn)]
+        # List with the analysis index (peak, rms, loudness) of every speaker
+        self.sp_analysis = [None for sp in range(self.spn)]
+        # List with the source object of every speaker which is not read
+        # from a wave file but block by block from a PortAudio input, stdin,
+        # a FIFO or a compressed file decoded by the decoder pool
+        self.sp_stream = [None for sp in range(self.spn)]
+        # List whether the analysis index of a speaker is built during
+        # playback (no sidecar file available)
+        self.sp_analysis_live = [False for sp in range(self.spn)]
+        # Pool of decoder processes, created for the first compressed file
+        self.decoder_pool = decoder_pool
+        # List whether a speaker file is played endlessly
+        self.sp_loop = [bool(self.state.gui_sp[sp].get("loop", False)) for sp
+                        in range(self.spn)]
+        # standard samplerate
+        self.samplerate = 44100
+        # Standard sampledepth
+        self.sampledepth = 16
+        # Set number of output blocks per second
+        self.fft_blocksize = 1024
+        # Number of Samples of HRTFs (KEMAR Compact=128, KEMAR Full=512)
+        self.hrtf_blocksize, self.hrtf_blocksize_real, \
+            self.kemar_inverse_filter, self.kemar_inverse_filter_fft, \
+            self.kemar_inverse_filter_active = self.get_hrtf_param()
+        # hrtf database in time and frequency domain, loaded only once per
+        # process (see hrtf_cache)
+        self.hrtf_database, self.hrtf_database_fft = \
+            self.load_hrtf_database(self.state.gui_settings["hrtf_database"])
+        # Initialize an array for the hrtf block values of every speaker
+        self.hrtf_block_fft = np.zeros((self.spn, self.fft_blocksize // 2 + 1,
+                                        2), dtype=np.complex128)
+        # initialize fft magnitude spectrum array for every speaker signal
+        self.state.dsp_sp_spectrum = [np.zeros((self.fft_blocksize // 2 + 1,
+                                      2), dtype=np.float16) for
+                                      sp in range(self.spn)]
+
+        # initialize fft magnitude spectrum array of left and right hrtf for
+        # every speaker
+        self.state.dsp_hrtf_spectrum = [[np.zeros((
+                                        self.fft_blocksize // 2 + 1, 2),
+            dtype=np.float16), np.zeros((self.fft_blocksize // 2 + 1, 2),
+                                        dtype=np.float16)] for sp in range(
+            self.spn)]
+
+        # Get necessary parameters of input-file and store to sp_param.
+        self.sp_param = self.init_read_sp()
+        # Define blocksize, blocktime, overlap and hopsize
+        self.sp_blocksize, self.sp_blocktime, self.overlap, self.hopsize = \
+            self.get_block_param()
+        # start on the output clock, first played file sample and number of
+        # played samples of every speaker
+        self.sp_start, self.sp_offset, self.sp_length = \
+            self.get_sp_schedule()
+        # read in whole wave file of all speakers
+        self.sp_input = self.read_sp()
+        self.block_begin_end = self.init_set_block_begin_end()
+        # initialize numpy array where to save samples of each speaker
+        # block, one row per speaker
+        self.sp_block = np.zeros((self.spn, self.sp_blocksize),
+                                 dtype=np.float32)
+        # initialize the blocks of the live sources, which keep the last
+        # samples of the prior block for the overlap
+        self.sp_stream_block = [np.zeros((self.sp_blocksize,),
+                                         dtype=np.float32) if
+                                self.sp_stream[sp] is not None else None for
+                                sp in range(self.spn)]
+        # capture time of the newest live sample of the current block
+        self.sp_stream_capture_time = [None for sp in range(self.spn)]
+        # List whether the whole block of a compressed file has to be read
+        # (first block and first block after a seek), so the block covers
+        # the same samples as the block of a wave file
+        self.sp_stream_refill = [isinstance(
+            self.sp_stream[sp], audio3d.engine.dsp_decode.CompressedSource)
+            for sp in range(self.spn)]
+        # build a hann window with sp_blocksize, as float32 the window is
+        # applied without casting
+        self.hann = self.build_hann_window(self.sp_blocksize).astype(
+            np.float32)
+        # hann window in the row of every speaker: the window is applied to
+        # all speakers without broadcasting
+        self.sp_hann = np.tile(self.hann, (self.spn, 1))
+        # preallocated arrays of the convolution, one row per speaker: the
+        # render loop works in place and allocates no memory per block.
+        # sp_block zeropadded to fft_blocksize
+        self.sp_block_padded = np.zeros((self.spn, self.fft_blocksize))
+        self.sp_block_fft = rfft(self.sp_block_padded)
+        self.sp_magnitude_spectrum = np.abs(self.sp_block_fft)
+        self.sp_max_magnitude = np.amax(self.sp_magnitude_spectrum, axis=1)
+        self.hrtf_magnitude_spectrum = np.abs(self.hrtf_block_fft)
+        self.hrtf_max_magnitude = np.amax(self.hrtf_magnitude_spectrum,
+                                          axis=1)
+        self.sp_binaural_block_frequency = np.zeros_like(self.hrtf_block_fft)
+        # sp_block_fft for the left and the right ear: it is multiplied with
+        # the hrtfs of all speakers and both ears without broadcasting
+        self.sp_block_fft_l_r = np.zeros_like(self.hrtf_block_fft)
+        self.sp_binaural_block_time = irfft(
+            self.sp_binaural_block_frequency, self.fft_blocksize, axis=1)
+        self.time_max_amp = np.amax(self.sp_binaural_block_time, axis=1)
+        self.time_min_amp = np.amin(self.sp_binaural_block_time, axis=1)
+        # set fft frequency values of fft magnitude spectrum arrays
+        self.set_fftfreq(self.fft_blocksize, self.samplerate)
+
+    def rnd(self, value):
+        """
+        H2 -- rnd
+        ===================
+        **Rounds numbers arithmetically.**
+
+        This method does a normal school arithmetic round (choose lower
+        int until .4 and higher int from .5 on) and returns the rounded
+        value. It is NOT equal to pythons round() method.
+
+        Return values:
+
+        * value: Is the rounded int of any input number.
+
+        Author: Felix Pfreundtner
+        """
+        if value >= 0:
+            if value - math.floor(value) < 0.5:
+                value = math.floor(value)
+            else:
+                value = math.ceil(value)
+        else:
+            if value - math.floor(value) <= 0.5:
+                value = math.floor(value)
+            else:
+                value = math.ceil(value)
+        return value
+
+    def build_hann_window(self, sp_blocksize):
+        """
+        H2 -- build_hann_window
+        ===================
+        **Calculate and construct the hann window in dependency of
+        sp_blocksize.**
+
+        Return values:
+        * hann_window: Numpy-array of the length of sp_blocksize
+
+        Author: Felix Pfreundtner
+        """
+        x = sp_blocksize
+        hann_window = np.zeros((x,), dtype=np.float16)
+        for n in range(x):
+            hann_window[n, ] = 0.5 * (1 - math.cos(2 * math.pi * n / (x)))
+        return hann_window
+
+    def get_block_param(self):
+        """
+        H2 -- get_block_param
+        ===================
+        **Calculates blocksize and blocktime.**
+
+        This method uses the parameters of the input wav-file and the
+        blocksizes of the fft and the hrtf to calculate the blocksize
+        needed for the speaker.
+
+        Return values:
+
+        * sp_blocksize: Amount of samples taken from the input file per block
+        * sp_blocktime: Time it takes to play one input block in [s]
+        * overlap: overlap between two binaural output blocks in decimal
+            value [calculated default is 0.5]
+
+        Author: Felix Pfreundtner
+        """
+        sp_blocksize = self.fft_blocksize - self.hrtf_blocksize + 1
+        sp_blocktime = sp_blocksize / self.samplerate
+        # overlap in decimal 0
+        overlap = (self.fft_blocksize - sp_blocksize) / self.fft_blocksize
+        # overlap = 0
+        hopsize = self.rnd((1 - overlap) * sp_blocksize)
+        return sp_blocksize, sp_blocktime, overlap, hopsize
+
+    def get_sp_schedule(self):
+        """
+        H2 -- get_sp_schedule
+        ===================
+        **Reads the schedule of every speaker from gui_sp.**
+
+        All speakers are rendered on one common output clock given by
+        block_begin_end. Every speaker can start later on this clock
+        (gui_sp[sp]["start"]), begin at a later position in its file
+        (gui_sp[sp]["offset"]) and play only a part of its file
+        (gui_sp[sp]["length"]), all in seconds. Compressed files start at a
+        full hop, because they are read hop by hop. Live sources always
+        play from the start of the clock.
+
+        Return values:
+
+        * sp_start: Sample of the output clock where each speaker starts
+        * sp_offset: First played sample of each speaker file
+        * sp_length: Number of played samples of each speaker (None: until
+          the end of the file, endless for looping files)
+
+        Author: Matthias Lederle
+        """
+        sp_start = [0 for sp in range(self.spn)]
+        sp_offset = [0 for sp in range(self.spn)]
+        sp_length = [None for sp in range(self.spn)]
+        for sp in range(self.spn):
+            # live sources have no schedule
+            if self.sp_param[sp][0] is None:
+                continue
+            sp_start[sp] = max(0, self.rnd(self.state.gui_sp[sp].get(
+                "start", 0) * self.samplerate))
+            sp_offset[sp] = max(0, self.rnd(self.state.gui_sp[sp].get(
+                "offset", 0) * self.samplerate))
+            if self.state.gui_sp[sp].get("length") is not None:
+                sp_length[sp] = max(0, self.rnd(self.state.gui_sp[sp][
+                    "length"] * self.samplerate))
+            # compressed files: start at a full hop
+            if audio3d.engine.dsp_decode.DecoderPool.is_compressed_path(
+                    self.state.gui_sp[sp]["path"]):
+                sp_start[sp] = self.hopsize * self.rnd(sp_start[sp] /
+                                                       self.hopsize)
+        return sp_start, sp_offset, sp_length
+
+    def get_sp_play_end(self, sp):
+        """
+        H2 -- get_sp_play_end
+        ===================
+        **Returns the number of samples speaker sp plays after its start or
+        None if it plays endlessly.**
+
+        Author: Matthias Lederle
+        """
+        # live source
+        if self.sp_param[sp][0] is None:
+            return None
+        if self.sp_loop[sp]:
+            return self.sp_length[sp]
+        play_end = max(0, self.sp_param[sp][0] - self.sp_offset[sp])
+        if self.sp_length[sp] is not None:
+            play_end = min(play_end, self.sp_length[sp])
+        return play_end
+
+    def get_sp_block_count(self, sp):
+        """
+        H2 -- get_sp_block_count
+        ===================
+        **Returns the number of blocks which are rendered until speaker sp
+        reached its end or None if it plays endlessly.**
+
+        Block n ends at sample n * hopsize + sp_blocksize on the common
+        output clock. The last block of a wave file is the first block
+        ending after the last played sample (see get_sp_block()), the last
+        block of a compressed file the first block ending at or after it.
+
+        Author: Matthias Lederle
+        """
+        play_end = self.get_sp_play_end(sp)
+        if play_end is None:
+            return None
+        # last sample of the speaker on the common output clock minus the
+        # end of block 0
+        distance = play_end + self.sp_start[sp] - self.sp_blocksize
+        if self.sp_stream[sp] is not None:
+            last_block = max(0, -(-distance // self.hopsize))
+        else:
+            last_block = max(0, distance // self.hopsize + 1)
+        return last_block + 1
+
+    def sp_active(self, sp):
+        """
+        H2 -- sp_active
+        ===================
+        **Checks whether the current block reaches the start of speaker sp.**
+
+        Return values:
+
+        * active: False if the speaker starts after the current block, so
+          reading and convolution of its block can be skipped
+
+        Author: Matthias Lederle
+        """
+        return self.block_begin_end[1] > self.sp_start[sp]
+
+    def init_set_block_begin_end(self):
+        """
+        H2 -- init_set_block_begin_end
+        ===================
+        **Initializes a list with the number of the first and last sample
+        which needs to be read in from speaker input files.**
+
+        This method calculates a list called block_begin_end containing
+        two elements: [0] is the first sample of the block, [1] is
+        the last sample of the block; The entries of following block
+        will then be calculated by the set_block_begin_end-method.
+
+        Return value:
+
+        * block_begin_end: List of the first ([0]) and last ([0]) sample of
+                          the FIRST block.
+
+        Author: Felix Pfreundtner
+        """
+        block_begin_end = [int(-(self.sp_blocksize) * (1 - self.overlap)),
+                           int((self.sp_blocksize) * (self.overlap))]
+        return block_begin_end
+
+    def set_block_begin_end(self):
+        """
+        H2 -- set_block_begin_end
+        ===================
+        **In every iteration of the while loop the number of the new first and
+        last sample which needs to be read in from speaker input files is
+        calculated.**
+
+        This method replaces the values set by the
+        init_set_block_begin_end-method every while-loop according to the
+        current location in the speaker-file that needs to be read. Since
+        the values are replaced, there are no input and output variables.
+
+        Author: Felix Pfreundtner
+        """
+        self.block_begin_end[0] += int(self.sp_blocksize * (1 - self.overlap))
+        self.block_begin_end[1] += int(self.sp_blocksize * (1 - self.overlap))
+
+    def seek(self, sample):
+        """
+        H2 -- seek
+        ===================
+        **Sets the position of the next block to sample.**
+
+        The sample is a position on the common output clock. For wave files
+        only block_begin_end is changed, so the next block which is read
+        begins at sample without reading or rendering the samples before
+        (each speaker at its own position according to its schedule).
+        Compressed files ask their decoder process to seek and read their
+        whole next block after the new position. Live sources have no
+        position and are not changed.
+
+        Author: Matthias Lederle
+        """
+        # set_block_begin_end() moves the block by one hop before it is read
+        self.block_begin_end = [sample - self.hopsize,
+                                sample - self.hopsize + self.sp_blocksize]
+        for sp in range(self.spn):
+            self.seek_sp(sp, sample)
+        # wait until all decoder processes reached the new position
+        for sp in range(self.spn):
+            if self.sp_stream_refill[sp]:
+                self.sp_stream[sp].wait_prefill(
+                    self.sp_blocksize // self.hopsize, timeout=0.1)
+
+    def seek_sp(self, sp, sample):
+        """
+        H2 -- seek_sp
+        ===================
+        **Lets the decoder of the compressed file of speaker sp jump to the
+        position of the block which begins at sample (see seek()).**
+
+        Author: Matthias Lederle
+        """
+        if not isinstance(self.sp_stream[sp],
+                          audio3d.engine.dsp_decode.CompressedSource):
+            return
+        # position in the file according to the schedule of the speaker
+        frame = self.sp_offset[sp] + max(0, sample - self.sp_start[sp])
+        if self.sp_loop[sp] and self.sp_param[sp][0] > 0:
+            self.sp_stream[sp].seek(frame % self.sp_param[sp][0])
+        else:
+            self.sp_stream[sp].seek(frame)
+        self.sp_stream_refill[sp] = True
+        # analysis during playback is only valid for the whole file
+        # played once from the beginning
+        if self.sp_analysis_live[sp] and \
+                self.sp_analysis[sp].samplenumber < self.sp_param[sp][0]:
+            self.sp_analysis_live[sp] = False
+
+    def prepare_sp(self, sp):
+        """
+        H2 -- prepare_sp
+        ===================
+        **Reads a new speaker sp (speaker dict like in gui_sp) for
+        insert_sp() while the dsp thread keeps rendering.**
+
+        The speaker is read by a DspIn object of its own with the same
+        settings: header, wave file or decoder and analysis index. Live
+        sources are started already. Can be called by any thread.
+
+        Raises RuntimeError if the speaker can not be played, e.g. an
+        unsupported wave format.
+
+        Return values:
+
+        * sp_in: DspIn object holding only the new speaker
+
+        Author: Matthias Lederle
+        """
+        state = audio3d.engine.dsp_state.DspState().configure(
+            [sp], self.state.gui_settings)
+        state.publish_scene()
+        # compressed files are decoded by the pool of this object
+        if self.decoder_pool is None and \
+                audio3d.engine.dsp_decode.DecoderPool.is_compressed_path(
+                    sp["path"]):
+            self.decoder_pool = audio3d.engine.dsp_decode.DecoderPool(
+                self.hopsize, self.samplerate,
+                self.state.gui_settings.get("decoder_processes"))
+        sp_in = DspIn(state, self.decoder_pool)
+        if state.dsp_stop is True:
+            sp_in.close_sp(0)
+            raise RuntimeError("; ".join(state.gui_error))
+        return sp_in
+
+    def insert_sp(self, sp, sp_in):
+        """
+        H2 -- insert_sp
+        ===================
+        **Takes the speaker prepared by prepare_sp() as speaker sp: a free
+        slot of a removed speaker or, with sp equal to spn, a new slot after
+        the last speaker. Called by the dsp thread between two blocks.**
+
+        Author: Matthias Lederle
+        """
+        for name in self.sp_lists:
+            setattr(self, name, set_slot(getattr(self, name), sp,
+                                         getattr(sp_in, name)[0]))
+        set_slot(self.state.dsp_sp_spectrum, sp,
+                 sp_in.state.dsp_sp_spectrum[0])
+        set_slot(self.state.dsp_hrtf_spectrum, sp,
+                 sp_in.state.dsp_hrtf_spectrum[0])
+        self.spn = len(self.sp_param)
+
+    def close_sp(self, sp):
+        """
+        H2 -- close_sp
+        ===================
+        **Stops the live source or decoder of the removed speaker sp and
+        frees its input.**
+
+        Author: Matthias Lederle
+        """
+        if self.sp_stream[sp] is not None:
+            self.sp_stream[sp].stop()
+            self.sp_stream[sp] = None
+        self.sp_stream_refill[sp] = False
+        self.sp_input[sp] = None
+
+    def sp_finished(self, sp):
+        """
+        H2 -- sp_finished
+        ===================
+        **Checks whether the current block passes the last played sample of
+        the wave file of speaker sp, like get_sp_block() without reading
+        the block.**
+
+        Author: Matthias Lederle
+        """
+        play_end = self.get_sp_play_end(sp)
+        return play_end is not None and \
+            self.block_begin_end[1] - self.sp_start[sp] > play_end
+
+    def get_hrtf_param(self, database=None):
+        """
+        H2 -- get_hrtf_param
+        ===================
+        **Get all parameters for the hrtf set by the settings in gui.**
+
+        This method calculates all necessary parameters of the hrtf to be
+        later able to get the correct hrtf-files for the convolution with
+        the speaker-file signal.
+        database is the name of the hrtf database (default:
+        gui_settings["hrtf_database"]).
+
+        Return values:
+
+        * hrtf_blocksize: Set to default value 513 since
+        fft_blocksize is defaulted to 1024
+        * kemar_inverse_filter: Boolean value that tells whether
+        Measurement inverse filter check-box in gui was activated or not
+
+        Author: Felix Pfreundtner
+        """
+        if database is None:
+            database = self.state.gui_settings["hrtf_database"]
+        # write variable which contains whether inverse filter is
+        # activated in gui
+        kemar_inverse_filter_active = self.state.gui_settings[
+            "inverse_filter_active"]
+        if database == "kemar_normal_ear" or database == "kemar_big_ear":
+            # wave hrtf size 512 samples: zeropad hrtf to 513 samples to
+            # reach even sp_blocksize which is integer divisible by 2 (50%
+            # overlap needed -> sp_blocksize/2)
+            hrtf_blocksize_real = 512
+            hrtf_blocksize = 513
+            # get inverse minimum phase impulse response response of
+            # kemar measurement speaker optimus pro 7 and truncate to
+            # fft_blocksize (original size 2048 samples, last samples
+            # nearly zero, the kemar filter ist not well designed and produces
+            # distortion at low frequencies, even in the kemar compact
+            # database, where it is integrated in the wave impulse responses)
+            _, kemar_inverse_filter = scipy.io.wavfile.read(
+                audio3d.engine.dsp_resources.resource_filename(
+                    "kemar/full/headphones+spkr/Opti-minphase.wav"))
+            kemar_inverse_filter = \
+                kemar_inverse_filter[0:self.fft_blocksize, ]
+            # zeropad kemar_inverse_filter_fft to fft_blocksize and bring
+            # time domain into frequency domain
+            kemar_inverse_filter_fft = rfft(kemar_inverse_filter,
+                                            self.fft_blocksize)
+        if database == "kemar_compact":
+            # wave hrtf size 128 samples: zeropad hrtf to 513 samples to
+            # reach even sp_blocksize which is integer divisible by 2 (50%
+            # overlap needed -> sp_blocksize/2)
+            hrtf_blocksize_real = 128
+            hrtf_blocksize = 513
+            # no inverse speaker impulse response of measurement speaker
+            # needed (is already integrated in wave files of kemar compact
+            # hrtfs)
+            kemar_inverse_filter = np.zeros((self.fft_blocksize,),
+                                            dtype=np.float32)
+            kemar_inverse_filter_fft = np.zeros((self.fft_blocksize // 2 + 1,),
+                                                dtype=np.complex128)
+
+        return hrtf_blocksize, hrtf_blocksize_real, \
+            kemar_inverse_filter, kemar_inverse_filter_fft, \
+            kemar_inverse_filter_active
+
+    def read_hrtf_database(self, database=None, hrtf_blocksize_real=None):
+        """
+        H2 -- read_hrtf_database
+        ===================
+        **Preloads all hrtf Files.**
+
+        database is the name of the hrtf database and hrtf_blocksize_real
+        the length of its impulse responses (default: gui_settings and
+        hrtf_blocksize_real).
+
+        Return values:
+
+        * hrtf_database: A numpy array that contains either all azimut hrtf
+        impulse responses of the
+        kemar_normal_ear, kemar_big_ear or the kemar_compact HRTF Database.
+
+        Author: Felix Pfreundtner
+        """
+        if database is None:
+            database = self.state.gui_settings["hrtf_database"]
+        if hrtf_blocksize_real is None:
+            hrtf_blocksize_real = self.hrtf_blocksize_real
+        angle_stepsize = 5
+        # angle_begin = 0
+        # just look at horizontal plane
+        elevation = 0
+        number_of_hrtfs = 72
+        hrtf_database = np.zeros((self.hrtf_blocksize, number_of_hrtfs),
+                                 dtype=np.float32)
+        if database == "kemar_normal_ear":
+            angle_end = 360
+            for angle in range(0, angle_end, 5):
+                hrtf_filename = "kemar/full/elev" + str(elevation) + "/L" \
+                                + str(elevation) + "e" +\
+                                str(angle).zfill(3) + "a.wav"
+                _, hrtf_database[:hrtf_blocksize_real,
+                                 angle // angle_stepsize] = \
+                    scipy.io.wavfile.read(
+                        audio3d.engine.dsp_resources.resource_filename(
+                            hrtf_filename))
+
+        if database == "kemar_big_ear":
+            angle_end = 360
+            for angle in range(0, angle_end, 5):
+                hrtf_filename = "kemar/full/elev" + str(elevation) + "/R" \
+                                + str(elevation) + "e" +\
+                                str(angle).zfill(3) + "a.wav"
+                _, hrtf_database[:hrtf_blocksize_real,
+                                 angle // angle_stepsize] = \
+                    scipy.io.wavfile.read(
+                        audio3d.engine.dsp_resources.resource_filename(
+                            hrtf_filename))
+        if database == "kemar_compact":
+            angle_end = 180
+            for angle in range(0, angle_end, 5):
+                hrtf_filename = "kemar/compact/elev" + str(elevation) + \
+                                "/H" + str(elevation) + "e" +\
+                                str(angle).zfill(3) + "a.wav"
+                _, temp_hrtf_l_r = scipy.io.wavfile.read(
+                    audio3d.engine.dsp_resources.resource_filename(
+                        hrtf_filename))
+                hrtf_database[:hrtf_blocksize_real, angle
+                              // angle_stepsize] = temp_hrtf_l_r[:, 0]
+                hrtf_database[:hrtf_blocksize_real,
+                              (angle + 180) // angle_stepsize] =  \
+                    temp_hrtf_l_r[:, 1]
+        return hrtf_database
+
+    def hrtf_database_fft(self, hrtf_database=None):
+        """
+        H2 -- hrtf_database_fft
+        ===================
+        **Converts the whole selected HRTF-database in frequency domain with
+        FFT.**
+
+        Return values:
+
+        * hrtf_database_fft: The HRTF database converted to frequency domain.
+
+        Author: Felix Pfreundtner
+        """
+        if hrtf_database is None:
+            hrtf_database = self.hrtf_database
+        hrtf_database_fft = np.zeros((self.fft_blocksize // 2 + 1,
+                                      hrtf_database.shape[1]),
+                                     dtype=np.complex128)
+        # for the whole hrtf database (all angles)
+        for angle_index in range(hrtf_database.shape[1]):
+            # zeropad hrtf_database_fft[angle] to fft_blocksize and bring
+            # time domain into frequency domain
+            hrtf_database_fft[:, angle_index] = rfft(hrtf_database[:,
+                                                     angle_index],
+                                                     self.fft_blocksize)
+        return hrtf_database_fft
+
+    def load_hrtf_database(self, database):
+        """
+        H2 -- load_hrtf_database
+        ===================
+        **Returns the hrtf database database in time and frequency domain
+        from hrtf_cache, it is read in only at its first use in the
+        process.**
+
+        Return values:
+
+        * hrtf_database: read only array of the impulse responses
+        * hrtf_database_fft: read only array of the impulse responses in
+          frequency domain
+
+        Author: Felix Pfreundtner
+        """
+        hrtf_key = (database, self.fft_blocksize)
+        if hrtf_key not in DspIn.hrtf_cache:
+            hrtf_blocksize_real = self.get_hrtf_param(database)[1]
+            # read in whole hrtf datatabas from impulse responses in time
+            # domain
+            hrtf_database = self.read_hrtf_database(database,
+                                                    hrtf_blocksize_real)
+            # bring whole hrtf database to frequency domainv (called on the
+            # class: the attribute hrtf_database_fft hides the method)
+            hrtf_database_fft = DspIn.hrtf_database_fft(self, hrtf_database)
+            # the arrays are shared by all DspIn objects of the process
+            hrtf_database.flags.writeable = False
+            hrtf_database_fft.flags.writeable = False
+            DspIn.hrtf_cache[hrtf_key] = (hrtf_database, hrtf_database_fft)
+        return DspIn.hrtf_cache[hrtf_key]
+
+    def switch_hrtf_database(self, database):
+        """
+        H2 -- switch_hrtf_database
+        ===================
+        **Takes the hrtfs of all following hrtf changes from database, with
+        its inverse filter.**
+
+        Author: Felix Pfreundtner
+        """
+        self.hrtf_database, self.hrtf_database_fft = \
+            self.load_hrtf_database(database)
+        _, self.hrtf_blocksize_real, self.kemar_inverse_filter, \
+            self.kemar_inverse_filter_fft, self.kemar_inverse_filter_active = \
+            self.get_hrtf_param(database)
+
+    def init_read_sp(self):
+        """
+        H2 -- init_read_sp
+        ===================
+        **Get 10 important parameters of the files to be played by the
+        get_block_method.**
+
+        This method gets all important data from the .wav files that will
+        be played by the speakers. The output is another list called sp_param,
+        which holds one of the properties as values for each speaker given
+        by the gui_sp.
+
+        Return values:
+
+        * sp_param: Returns a list containing 10 properties of each
+        speaker-file.
+
+        Author: Matthias Lederle
+        """
+        # List of the Parameters:
+        # sp_param[sp][0] = total number of samples in the file
+        # sp_param[sp][1] = sample-rate, default: 44100
+        # sp_param[sp][2] = number of bits per sample (8-/16-/??-int for one
+        #                   sample)
+        # sp_param[sp][3] = number of channels (mono = 1, stereo = 2)
+        # sp_param[sp][4] = format of file (< = RIFF, > = RIFX)
+        # sp_param[sp][5] = size of data-chunk in bytes
+        # sp_param[sp][6] = total-header-size (= number of bytes until data
+        #  begins)
+        # sp_param[sp][7] = bitfactor (8-bit --> 1, 16-bit --> 2)
+        # sp_param[sp][8] = total number of bytes until data-chunk ends
+        # sp_param[sp][9] = format character for correct encoding of data
+        # For live sources (PortAudio input, stdin, FIFO) the total number of
+        # samples and the sizes of the data are unknown (None).
+
+        # initialize list with 10 (empty) values per key with list
+        # comprehension
+        sp_param = [[None] * 10 for sp in range(self.spn)]
+        # go through all speakers
+        for sp in range(self.spn):
+            if self.state.gui_sp[sp]["path"] == 'unknown' or \
+               self.state.gui_sp[sp]["path"] == '':
+                # ERROR message -- no file selected
+                self.state.send_error("No file selected")
+                # errmsg = "No audio source was selected. Please press " \
+                # "'Reset' and add speaker(s) with valid pathname again."
+                # self.signal_handler.send_error(errmsg)
+            elif audio3d.engine.dsp_stream.StreamSource.is_stream_path(
+                    self.state.gui_sp[sp]["path"]):
+                # live sources deliver mono 16-bit samples with the standard
+                # samplerate, their length is unknown
+                sp_param[sp] = [None, self.samplerate, self.sampledepth, 1,
+                                '<', None, None, 2, None, "h"]
+            elif audio3d.engine.dsp_decode.DecoderPool.is_compressed_path(
+                    self.state.gui_sp[sp]["path"]):
+                # compressed files are decoded to 16-bit samples
+                try:
+                    frames, samplerate, channels = \
+                        audio3d.engine.dsp_decode.DecoderPool.file_param(
+                            self.state.gui_sp[sp]["path"])
+                except ImportError:
+                    errmsg = "Compressed input files need the python " \
+                             "package soundfile. Please install it or " \
+                             "choose a wave file."
+                    self.state.send_error(errmsg)
+                    # stop playback
+                    self.state.dsp_stop = True
+                    break
+                sp_param[sp] = [frames, samplerate, self.sampledepth,
+                                channels, '<', None, None, 2, None, "h"]
+            else:
+                # open the file
+                file = open(self.state.gui_sp[sp]["path"], 'rb')
+                # checks whether file is RIFX or RIFF
+                _big_endian = False
+                str1 = file.read(4)
+                if str1 == b'RIFX':
+                    _big_endian = True
+                if _big_endian:
+                    sp_param[sp][4] = '>'
+                else:
+                    sp_param[sp][4] = '<'
+                # jump to byte number 22
+                file.seek(22)
+                # get number of channels from header
+                sp_param[sp][3] = struct.unpack(sp_param[sp][4] + "H",
+                                                file.read(2))[0]
+                # get samplerate from header (always 44100)
+                sp_param[sp][1] = struct.unpack(sp_param[sp][4] + "I",
+                                                file.read(4))[0]
+                file.seek(34)  # got to byte 34
+                # get number of sp_param_sp[2] per sample from header
+                sp_param[sp][2] = struct.unpack(sp_param[sp][4] + "H",
+                                                file.read(2))[0]
+                # check in 2-byte steps, where the actual data begins
+                # save distance from end of header in "counter"
+                counter = 0
+                checkbytes = b'aaaa'
+                # go to byte where data-chunk begins and save distance in
+                # "counter"
+                while checkbytes != b'data':
+                    file.seek(-2, 1)
+                    checkbytes = file.read(4)
+                    counter += 1
+                # get data-chunk-size from the data-chunk-header
+                sp_param[sp][5] = struct.unpack(sp_param[sp][4] + 'i',
+                                                file.read(4))[0]
+                # calculate total-header-size (no. of bytes until data begins)
+                sp_param[sp][6] = 40 + (counter * 2)
+                # calculate bitfactor
+                sp_param[sp][7] = int(sp_param[sp][2] / 8)
+                # calculate the total numbers of bytes until the end of
+                # data-chunk
+                sp_param[sp][8] = sp_param[sp][6] + sp_param[sp][5]
+                # choose correct format character depending on number of bits
+                # per sample
+                if sp_param[sp][7] == 1:    # if bitfactor == 1
+                    sp_param[sp][9] = "B"   # use format character "B"
+                elif sp_param[sp][7] == 2:  # if bitfactor == 2
+                    sp_param[sp][9] = "h"   # use format character "h"
+                # calculate total number of samples of the file
+                sp_param[sp][0] = int(sp_param[sp][5] / (sp_param[sp][2] / 8 *
+                                                         sp_param[sp][3]))
+                file.close()  # close file opened in the beginning
+
+            # If bit format is not common bitformat 16-bit/sample
+            if self.sampledepth != sp_param[sp][2]:
+                errmsg = "The bit-format of one input signal is not 16-bit " \
+                         "and can't be processed. Please choose another input" \
+                         " file."
+                self.state.send_error(errmsg)
+                # stop playback
+                self.state.dsp_stop = True
+                break
+
+            # If signal is neither mono nor stereo, send error message to gui.
+            if sp_param[sp][3] != 1 and sp_param[sp][3] != 2:
+                errmsg = "One Input signal is neither mono nor stereo and " \
+                         "can't be processed. Please choose another input" \
+                         " file."
+                self.state.send_error(errmsg)
+                # stop playback
+                self.state.dsp_stop = True
+                break
+            # If sample rate is not the common samplerate 44100 Hz
+            if self.samplerate != sp_param[sp][1]:
+                errmsg = "The sample rate of one input signal ist not 44100 " \
+                         "Hz and can't be processed. Please choose " \
+                         "another input file."
+                self.state.send_error(errmsg)
+                # stop playback
+                self.state.dsp_stop = True
+                break
+
+        return sp_param
+
+    def read_sp(self):
+        """
+        H2 -- read_sp
+        ===================
+        **Reads one block of samples.**
+
+        This method reads all samples of all speaker-.wav-files and
+        writes them in a numpyarray sp_block[sp] (containing one 16-bit-int
+        for each sample). This method will be applied before the while loop
+        of the dsp-class: I.e. a optimum performance is required. The
+        maximum amplitude of every speaker is taken from the analysis index
+        in the sidecar file of the wave file, so the whole signal only needs
+        to be scanned once when the file is played the first time.
+
+        Author: Matthias Lederle
+        """
+
+        sp_input = []
+        # read in wave audio input files for every speaker
+        for sp in range(self.spn):
+            # live sources are not read in but started, they are analysed
+            # block by block in get_sp_block()
+            if audio3d.engine.dsp_stream.StreamSource.is_stream_path(
+                    self.state.gui_sp[sp]["path"]):
+                self.sp_stream[sp] = \
+                    audio3d.engine.dsp_stream.StreamSource.from_path(
+                        self.state.gui_sp[sp]["path"], self.samplerate,
+                        self.hopsize, self.state.gui_settings.get(
+                            "jitter_blocks", 4))
+                self.sp_stream[sp].start()
+                sp_input.append(None)
+                self.sp_analysis[sp] = audio3d.engine.dsp_analysis.DspAnalysis(
+                    self.samplerate)
+                self.sp_analysis_live[sp] = True
+                # maximum amplitude is unknown: assume int16 full scale
+                self.sp_max_amp[sp] = 32767
+                continue
+            # compressed files are decoded block by block by the decoder
+            # pool, the analysis index is taken from the sidecar file
+            if audio3d.engine.dsp_decode.DecoderPool.is_compressed_path(
+                    self.state.gui_sp[sp]["path"]):
+                if self.decoder_pool is None:
+                    self.decoder_pool = audio3d.engine.dsp_decode.DecoderPool(
+                        self.hopsize, self.samplerate,
+                        self.state.gui_settings.get("decoder_processes"))
+                self.sp_stream[sp] = self.decoder_pool.open(
+                    self.state.gui_sp[sp]["path"],
+                    self.state.gui_settings.get("decoder_blocks", 64),
+                    self.sp_loop[sp])
+                # offline rendering waits for the decoder
+                self.sp_stream[sp].blocking = \
+                    self.state.gui_settings.get("offline", False)
+                if self.sp_offset[sp] > 0:
+                    self.sp_stream[sp].seek(self.sp_offset[sp])
+                sp_input.append(None)
+                self.sp_analysis[sp] = \
+                    audio3d.engine.dsp_analysis.DspAnalysis.load(
+                        audio3d.engine.dsp_analysis.DspAnalysis.sidecar_path(
+                            self.state.gui_sp[sp]["path"],
+                            self.state.gui_settings.get("analysis_cache")),
+                        os.stat(self.state.gui_sp[sp]["path"]))
+                if self.sp_analysis[sp] is None:
+                    # no sidecar yet: analyse during playback (only
+                    # possible when the file is played from its beginning)
+                    # and assume int16 full scale
+                    self.sp_analysis[sp] = \
+                        audio3d.engine.dsp_analysis.DspAnalysis(
+                            self.samplerate)
+                    self.sp_analysis_live[sp] = self.sp_offset[sp] == 0
+                    self.sp_max_amp[sp] = 32767
+                else:
+                    self.sp_max_amp[sp] = self.sp_analysis[sp].peak
+                    self.sp_norm_amp[sp] = \
+                        self.sp_analysis[sp].normalize_amp(
+                            self.state.gui_settings.get("normalize_mode",
+                                                        "peak"),
+                            self.state.gui_settings.get("normalize_loudness",
+                                                        -18.0))
+                continue
+
+            _, sp_input_scipy = \
+                scipy.io.wavfile.read(self.state.gui_sp[sp]["path"])
+
+            # create a output array which is divideable by sp_blocksize
+            sp_input.append(
+                np.zeros((self.sp_param[sp][0] + self.sp_blocksize -
+                          self.sp_param[sp][0] % self.sp_blocksize, ),
+                         dtype=np.float32))
+            # if speaker has two channels make it mono
+            if self.sp_param[sp][3] == 2:
+                sp_input[sp][0:self.sp_param[sp][0], ]\
+                    = sp_input_scipy[:, 0] + sp_input_scipy[:, 1] / 2
+            else:
+                sp_input[sp][0:self.sp_param[sp][0], ] = sp_input_scipy
+            # get analysis index of speaker wave signal
+            self.sp_analysis[sp] = \
+                audio3d.engine.dsp_analysis.DspAnalysis.for_file(
+                    self.state.gui_sp[sp]["path"], self.samplerate,
+                    sp_input[sp][0:self.sp_param[sp][0], ],
+                    self.state.gui_settings.get("analysis_cache"))
+            # get maximum amplitude in speaker wave signal
+            self.sp_max_amp[sp] = self.sp_analysis[sp].peak
+            # get maximum amplitude after normalization
+            self.sp_norm_amp[sp] = self.sp_analysis[sp].normalize_amp(
+                self.state.gui_settings.get("normalize_mode", "peak"),
+                self.state.gui_settings.get("normalize_loudness", -18.0))
+        # wait until the decoder pool decoded the first blocks
+        for sp in range(self.spn):
+            if isinstance(self.sp_stream[sp],
+                          audio3d.engine.dsp_decode.CompressedSource):
+                self.sp_stream[sp].wait_prefill(
+                    self.state.gui_settings.get("decoder_blocks", 64) // 2)
+        return sp_input
+
+    def get_hrtf_block_fft(self, sp, angle=None):
+        """
+        H2 -- get_hrtf_block_fft
+        ===================
+        **Gets and reads the correct hrtf_file from database dependend on the
+        current azimuth angle position shown in the GUI MainWindow.**
+
+        Author: Felix Pfreundtner
+        """
+        # angle of the speaker in the scene if no angle of a parameter event
+        # is given
+        if angle is None:
+            angle = self.scene.sp[sp]["angle"]
+        # get filename of the relevant hrtf for each ear
+        # version according to settings in gui
+        rounddifference = angle % 5
+        # if angle from gui exactly matches angle of the file
+        if rounddifference == 0:
+            angle_exact = angle
+
+        # If gui's angle doesn't exactly match, go to closest angle
+        # available in database
+        else:
+            if rounddifference < 2.5:
+                angle_exact = angle - rounddifference
+            else:
+                angle_exact = angle + 5 - rounddifference
+
+        # get rounded integer angle
+        angle = self.rnd(angle_exact)
+        # if angle is 360°
+        if angle == 360:
+            # -> identical to angle = 0°
+            angle = 0
+        # get the maximum amplitude of the left ear hrtf time signal
+        self.hrtf_max_amp[sp][0] = np.amax(np.abs(self.hrtf_database[:,
+                                                  angle // 5]))
+        # get left ear hrtf fft values
+        self.hrtf_block_fft[sp][:, 0] = self.hrtf_database_fft[:, angle // 5]
+
+        # calculate the symectrical angle for the right ear
+        angle = 360 - angle
+        # if angle is 360°
+        if angle == 360:
+            # -> identical to angle = 0°
+            angle = 0
+        # get the maximum amplitude of the right ear hrtf time signal
+        self.hrtf_max_amp[sp][1] = np.amax(np.abs(
+            self.hrtf_database[:, angle // 5]))
+        # get right ear hrtf fft values
+        self.hrtf_block_fft[sp][:, 1] = self.hrtf_database_fft[:, angle // 5]
+
+    def get_sp_block(self, sp):
+        """
+        get_sp_block
+        ===================
+        **Gets the block for the speaker sp dependent on the current
+        position block_begin_end in the complete wave file.**
+
+        The position in the file is the position of the block on the
+        common output clock relative to the start of the speaker plus the
+        offset of the speaker (see get_sp_schedule()). Before the start and
+        after the length of the speaker the block is zero. For live sources
+        the prior block is shifted by hopsize and the next hopsize samples
+        are read from the jitter buffer of the source. Looping wave files
+        continue at their beginning when the block passes their end.
+
+        Return value:
+
+        * Continue input: Boolean that tells whether its the last block of
+        the file or not
+
+        Author: Matthias Lederle
+        """
+        # position of the current block end in the timeline of the speaker
+        end = self.block_begin_end[1] - self.sp_start[sp]
+        # number of samples the speaker plays in its timeline
+        play_end = self.get_sp_play_end(sp)
+        # live source or compressed file: read next hop from the source
+        if self.sp_stream[sp] is not None:
+            stream_block = self.sp_stream_block[sp]
+            # read one hop or the whole block after a seek
+            if self.sp_stream_refill[sp]:
+                hops = self.sp_blocksize // self.hopsize
+                self.sp_stream_refill[sp] = False
+            else:
+                hops = 1
+            continue_input = True
+            for hop in range(hops):
+                stream_block[0:self.sp_blocksize - self.hopsize] = \
+                    stream_block[self.hopsize:]
+                stream_hop = stream_block[self.sp_blocksize - self.hopsize:]
+                # timeline position of the first sample of the hop
+                hop_begin = end - (hops - hop) * self.hopsize
+                # compressed file before its start or after its length: the
+                # hop stays silent and nothing is read from the decoder
+                if self.sp_param[sp][0] is not None and (
+                        hop_begin < 0 or play_end is not None and
+                        hop_begin >= play_end):
+                    stream_hop[:] = 0
+                    self.sp_stream_capture_time[sp] = None
+                    continue
+                continue_input, self.sp_stream_capture_time[sp] = \
+                    self.sp_stream[sp].read_hop(stream_hop)
+                if play_end is not None and \
+                        hop_begin + self.hopsize > play_end:
+                    stream_hop[play_end - hop_begin:] = 0
+                if self.sp_analysis_live[sp]:
+                    samples = stream_hop
+                    # compressed files are analysed only once up to their
+                    # last sample, also when they are looping
+                    if self.sp_param[sp][0] is not None:
+                        samples = samples[0:max(
+                            0, self.sp_param[sp][0] -
+                            self.sp_analysis[sp].samplenumber)]
+                    self.sp_analysis[sp].add_samples(samples)
+            if play_end is not None and end >= play_end:
+                continue_input = False
+            self.sp_block[sp] = stream_block
+            return continue_input
+        begin = end - self.sp_blocksize
+        # first and last sample of the block which are played
+        valid_begin = max(begin, 0)
+        valid_end = end if play_end is None else min(end, play_end)
+        # first sample in the speaker file
+        first = self.sp_offset[sp] + valid_begin
+        count = valid_end - valid_begin
+        if self.sp_loop[sp] and self.sp_param[sp][0] > 0:
+            # looping file: read block modulo the file length
+            first %= self.sp_param[sp][0]
+        # whole block lies in the file
+        if count == self.sp_blocksize and \
+                first + count <= self.sp_param[sp][0]:
+            self.sp_block[sp] = self.sp_input[sp][first:first + count, ]
+        # block begins before the start, ends after the length or the end
+        # of the file or wraps around the end of a looping file
+        else:
+            self.sp_block[sp] = 0
+            if count > 0 and self.sp_loop[sp]:
+                self.sp_block[sp][valid_begin - begin:valid_end - begin, ] = \
+                    np.take(self.sp_input[sp][0:self.sp_param[sp][0], ],
+                            range(first, first + count), mode="wrap")
+            elif count > 0:
+                self.sp_block[sp][valid_begin - begin:valid_end - begin, ] = \
+                    self.sp_input[sp][first:first + count, ]
+        # if current block end is LARGER than the last played sample this is
+        # the last block of the speaker
+        continue_input = play_end is None or end <= play_end
+        return continue_input
+
+    def normalize(self, sp):
+        """
+        H2 -- normalize
+        ===================
+        **Normalizes the audio input.**
+
+        If the input-flag normalize_flag_sp is True, take the maximum
+        amplitude occurring in the .wav-file from the analysis index. After
+        that, reduce all entries of sp_block by the ratio that decreases the
+        max value to 2^15-1. If gui_settings["normalize_mode"] is
+        "loudness" the max value is chosen so that the file reaches the
+        loudness gui_settings["normalize_loudness"] in LUFS instead (limited
+        to 2^15-1).
+
+        Author: Felix Pfreundtner
+        """
+        if self.scene.sp[sp]["normalize"] is True:
+            # take maximum amplitude of original wave file of raw sp block
+            max_amplitude_input = self.sp_max_amp[sp]
+            # normalize to have the maximum int16 amplitude (or the
+            # amplitude which reaches the requested loudness)
+            max_amplitude_output = self.sp_norm_amp[sp]
+            if max_amplitude_input != 0:
+                np.divide(self.sp_block[sp], float(max_amplitude_input /
+                                                   max_amplitude_output),
+                          out=self.sp_block[sp])
+            self.sp_max_amp[sp] = max_amplitude_output
+
+    def apply_window_on_sp_block(self, sp):
+        """
+        H2 -- apply_window_on_sp_block
+        ===================
+        **Applys the Hann Window to the input speaker block. sp is one
+        speaker or a range of speakers, whose blocks are windowed at
+        once.**
+
+        Author: Felix Pfreundtner
+        """
+        rows = sp_rows(sp)
+        if contiguous_rows(rows):
+            np.multiply(self.sp_block[rows], self.sp_hann[rows],
+                        out=self.sp_block[rows])
+            return
+        for sp_block in self.sp_block[rows]:
+            np.multiply(sp_block, self.hann, out=sp_block)
+
+    def close_streams(self):
+        """
+        H2 -- close_streams
+        ===================
+        **Stops the capture of all live sources and the decoding of all
+        compressed files.**
+
+        If a compressed file was played completely (at least once when
+        looping) without a sidecar file, the analysis index built during
+        playback is saved as sidecar file.
+
+        Author: Matthias Lederle
+        """
+        for sp in range(self.spn):
+            if self.sp_stream[sp] is not None:
+                self.sp_stream[sp].stop()
+                if isinstance(self.sp_stream[sp],
+                              audio3d.engine.dsp_decode.CompressedSource) and \
+                        self.sp_analysis_live[sp] and \
+                        self.sp_analysis[sp].samplenumber >= \
+                        self.sp_param[sp][0]:
+                    self.sp_analysis[sp].finish()
+                    self.sp_analysis[sp].save_sidecar(
+                        self.state.gui_sp[sp]["path"],
+                        self.state.gui_settings.get("analysis_cache"))
+        if self.decoder_pool is not None:
+            self.decoder_pool.close()
+            self.decoder_pool = None
+
+    # @author Felix Pfreundtner
+    def set_fftfreq(self, fft_blocksize, samplerate):
+        """
+        H2 -- set_fftfreq
+        ===================
+        **Sets a array with frequencies points of the
+        Fast-Fourier-Transformation which is used in GUI Spectrum Plot.**
+
+        Author: Felix Pfreundtner
+        """
+        freq_spacing = samplerate / fft_blocksize
+        freq_number = fft_blocksize // 2 + 1
+        freq = np.arange(0, freq_number, dtype=np.float16) * freq_spacing
+        # set frequency values of speaker spectrum
+        for dsp_sp_spectrum_sp in self.state.dsp_sp_spectrum:
+            dsp_sp_spectrum_sp[:, 0] = freq
+        # set frequency values of hrtf spectrum
+        for dsp_hrtf_spectrum_sp in self.state.dsp_hrtf_spectrum:
+            for dsp_hrtf_spectrum_sp_l_r in dsp_hrtf_spectrum_sp:
+                dsp_hrtf_spectrum_sp_l_r[:, 0] = freq
+
+    def fft_convolution(self, sp, l_r):
+        """
+        H2 -- fft_convolution
+        ===================
+        **Convolves the block of speaker sp with its hrtf of the left (l_r =
+        0) or right (l_r = 1) ear (see fft_convolution_block()).**
+
+        Author: Felix Pfreundtner
+        """
+        return self.fft_convolution_block(sp)[0, :, l_r]
+
+    def fft_convolution_block(self, sps, out=None):
+        """
+        H2 -- fft_convolution_block
+        ===================
+        **Function convolves hrtf and data of the music file of all speakers
+        sps (a speaker or a range of speakers) for both ears at once.**
+
+        Method takes the hrtf blocks (left and right) and the data blocks of
+        the speakers, zeropadds them to fft_blocksize and executes the FFT
+        Fast convolution with one FFT, one multiplication and one inverse
+        FFT over all speakers. After that, the signal is retransformed to
+        time-domain and normalized for every speaker and ear. The method
+        also saves the magnitude spectrum values for GUI Spectrum Plot in
+        the state object. All steps work in the preallocated rows of the
+        speakers, the result is written into out.
+
+        Return values:
+
+        * sp_binaural_block: out or a new array with the binaural block of
+          every speaker of sps (speaker, sample, left / right ear)
+
+        Author: Felix Pfreundtner
+        """
+        rows = sp_rows(sps)
+        # zeropad sp_block of all speakers to fft_blocksize and bring time
+        # domain into frequency domain
+        sp_block_padded = self.sp_block_padded[rows]
+        np.copyto(sp_block_padded[:, 0:self.sp_blocksize],
+                  self.sp_block[rows])
+        sp_block_fft = self.sp_block_fft[rows]
+        if fft_out:
+            rfft(sp_block_padded, out=sp_block_fft)
+        else:
+            sp_block_fft[:] = rfft(sp_block_padded)
+        hrtf_block_fft = self.hrtf_block_fft[rows]
+        # save fft magnitude spectrum of sp_block in dsp_sp_spectrum and
+        # hrtf_block in dsp_hrtf_spectrum to be shown by gui
+        self.set_spectrum(rows, sp_block_fft, hrtf_block_fft)
+
+        # execute convolution of speaker input and hrtf input: multiply
+        # complex frequency domain vectors
+        sp_binaural_block_frequency = self.sp_binaural_block_frequency[rows]
+        if contiguous_rows(rows):
+            # all speakers and both ears at once
+            sp_block_fft_l_r = self.sp_block_fft_l_r[rows]
+            for l_r in range(2):
+                np.copyto(sp_block_fft_l_r[:, :, l_r], sp_block_fft)
+            np.multiply(sp_block_fft_l_r, hrtf_block_fft,
+                        out=sp_binaural_block_frequency)
+        else:
+            for index in range(len(sp_block_fft)):
+                for l_r in range(2):
+                    np.multiply(sp_block_fft[index],
+                                hrtf_block_fft[index, :, l_r],
+                                out=sp_binaural_block_frequency[index, :, l_r])
+        # if kemar full is selected furthermore convolve with (approximated
+        # 1024 samples) inverse impulse response of optimus pro 7 speaker
+        if self.kemar_inverse_filter_active:
+            for index in range(len(sp_block_fft)):
+                for l_r in range(2):
+                    sp_binaural_block_frequency_l_r = \
+                        sp_binaural_block_frequency[index, :, l_r]
+                    np.multiply(sp_binaural_block_frequency_l_r,
+                                self.kemar_inverse_filter_fft,
+                                out=sp_binaural_block_frequency_l_r)
+
+        # bring multiplied spectrum back to time domain
+        sp_binaural_block_time = self.sp_binaural_block_time[rows]
+        if fft_out:
+            irfft(sp_binaural_block_frequency, self.fft_blocksize, axis=1,
+                  out=sp_binaural_block_time)
+        else:
+            sp_binaural_block_time[:] = irfft(sp_binaural_block_frequency,
+                                              self.fft_blocksize, axis=1)
+
+        # normalize multiplied spectrum back to 16bit integer, consider
+        # maximum amplitude value of sp block and hrtf impulse to get
+        # dynamical volume output. The maximum absolute amplitude is the
+        # maximum of the maximum and the negative minimum.
+        time_max_amp = self.time_max_amp[rows]
+        time_min_amp = self.time_min_amp[rows]
+        for l_r in range(2):
+            np.amax(sp_binaural_block_time[:, :, l_r], axis=1,
+                    out=time_max_amp[:, l_r])
+            np.amin(sp_binaural_block_time[:, :, l_r], axis=1,
+                    out=time_min_amp[:, l_r])
+        np.negative(time_min_amp, out=time_min_amp)
+        np.maximum(time_max_amp, time_min_amp, out=time_max_amp)
+        for index, sp in enumerate(range(self.spn)[rows]):
+            for l_r in range(2):
+                sp_binaural_block_sp_time_max_amp = int(
+                    time_max_amp[index, l_r])
+                if sp_binaural_block_sp_time_max_amp != 0 and \
+                        self.sp_max_amp[sp] != 0:
+                    sp_binaural_block_time[index, :, l_r] /= (
+                        sp_binaural_block_sp_time_max_amp /
+                        self.sp_max_amp[sp] / self.hrtf_max_amp[sp][l_r] *
+                        32767)
+        if out is None:
+            return sp_binaural_block_time.astype(np.float32)
+        np.copyto(out, sp_binaural_block_time, casting="same_kind")
+        return out
+
+    def set_spectrum(self, sps, sp_block_fft, hrtf_block_fft):
+        """
+        H2 -- set_spectrum
+        ===================
+        **Saves the magnitude spectra of the speaker blocks sp_block_fft and
+        the hrtfs hrtf_block_fft of the speakers sps (a speaker or a range of
+        speakers) for GUI Spectrum Plot.**
+
+        Author: Felix Pfreundtner
+        """
+        rows = sp_rows(sps)
+        # get magnitum spectrum of sp_block and hrtf blocks, like the
+        # convolution for all speakers at once or speaker by speaker
+        sp_magnitude_spectrum = self.sp_magnitude_spectrum[rows]
+        hrtf_magnitude_spectrum = self.hrtf_magnitude_spectrum[rows]
+        if contiguous_rows(rows):
+            np.abs(sp_block_fft, out=sp_magnitude_spectrum)
+            np.abs(hrtf_block_fft, out=hrtf_magnitude_spectrum)
+        else:
+            for index in range(len(sp_block_fft)):
+                np.abs(sp_block_fft[index], out=sp_magnitude_spectrum[index])
+                np.abs(hrtf_block_fft[index],
+                       out=hrtf_magnitude_spectrum[index])
+        sp_max_magnitude = np.amax(sp_magnitude_spectrum, axis=1,
+                                   out=self.sp_max_magnitude[rows])
+        hrtf_max_magnitude = self.hrtf_max_magnitude[rows]
+        for l_r in range(2):
+            np.amax(hrtf_magnitude_spectrum[:, :, l_r], axis=1,
+                    out=hrtf_max_magnitude[:, l_r])
+        # normalize spectrum to get int16 values
+        max_amplitude_output = 32767
+        for index, sp in enumerate(range(self.spn)[rows]):
+            max_amplitude_sp_magnitude_spectrum = sp_max_magnitude[index]
+            if max_amplitude_sp_magnitude_spectrum != 0 and \
+                    self.sp_max_amp[sp] != 0:
+                np.divide(sp_magnitude_spectrum[index], (
+                    max_amplitude_sp_magnitude_spectrum /
+                    self.sp_max_amp[sp] * max_amplitude_output),
+                    out=sp_magnitude_spectrum[index])
+                np.copyto(self.state.dsp_sp_spectrum[sp][:, 1],
+                          sp_magnitude_spectrum[index], casting="same_kind")
+            else:
+                self.state.dsp_sp_spectrum[sp][:, 1] = 0
+            # set FFT DC Value to zero
+            self.state.dsp_sp_spectrum[sp][0, 1] = 0
+            for l_r in range(2):
+                max_amplitude_hrtf_magnitude_spectrum = \
+                    hrtf_max_magnitude[index, l_r]
+                if max_amplitude_hrtf_magnitude_spectrum != 0 and \
+                        max_amplitude_sp_magnitude_spectrum != 0:
+                    hrtf_magnitude_spectrum_l_r = \
+                        hrtf_magnitude_spectrum[index, :, l_r]
+                    np.divide(hrtf_magnitude_spectrum_l_r, (
+                        max_amplitude_hrtf_magnitude_spectrum /
+                        self.hrtf_max_amp[sp][l_r] * max_amplitude_output),
+                        out=hrtf_magnitude_spectrum_l_r)
+                    np.copyto(self.state.dsp_hrtf_spectrum[sp][l_r][:, 1],
+                              hrtf_magnitude_spectrum_l_r,
+                              casting="same_kind")
+                else:
+                    self.state.dsp_hrtf_spectrum[sp][l_r][:, 1] = 0
+                self.state.dsp_hrtf_spectrum[sp][l_r][0, 1] = 0
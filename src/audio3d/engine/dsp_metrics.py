@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import numpy as np
+import threading
+import json
+import time
+
+
+class Metrics:
+    """
+    Metrics
+    ************************
+    **This class collects the runtime performance counters of the dsp
+    algorithm.**
+
+    The dsp thread records the time of every render stage (read, hrtf,
+    convolution, overlap add, mix, queue, whole block) in a histogram with
+    logarithmic buckets from 10 us to 1 s, the PortAudio callback records
+    the fill level of the playback ring buffer, underruns and its status
+    flags. All counters are guarded by one lock, so snapshot() can be
+    called from any thread, e.g. by the GUI or the MetricsExporter.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # upper edges of the render time histogram buckets in seconds, the last
+    # bucket counts all longer times
+    bucket_edges = np.logspace(-5, 0, 26)
+    # PortAudio callback status flags
+    status_flags = {1: "input_underflow", 2: "input_overflow",
+                    4: "output_underflow", 8: "output_overflow",
+                    16: "priming_output"}
+
+    def __init__(self, block_time):
+        """
+        **__init__ creates empty counters. block_time is the played time of
+        one binaural block in seconds.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.block_time = block_time
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        # per stage: histogram counts, number, sum and maximum of times
+        self.stages = {}
+        # number of rendered blocks and their total render time
+        self.blocks = 0
+        self.render_time = 0.0
+        # fill level of the playback ring buffer seen by the callback
+        self.queue_depth = 0
+        self.queue_depth_min = None
+        # callback calls without a block
+        self.underruns = 0
+        # number of callbacks per PortAudio status flag
+        self.status = {name: 0 for name in self.status_flags.values()}
+        # number of hrtf changes
+        self.hrtf_switches = 0
+        # blocks whose mixed amplitude exceeded the int16 range and their
+        # highest amplitude
+        self.overloads = 0
+        self.overload_max = 0.0
+
+    def record_stage(self, stage, seconds):
+        """
+        H2 -- record_stage
+        ===================
+        **Adds the time of one render stage to its histogram. The stage
+        "block" is the render time of a whole binaural block.**
+
+        Author: Felix Pfreundtner
+        """
+        bucket = int(np.searchsorted(self.bucket_edges, seconds))
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = {
+                    "histogram": [0] * (len(self.bucket_edges) + 1),
+                    "count": 0, "sum": 0.0, "max": 0.0}
+            entry = self.stages[stage]
+            entry["histogram"][bucket] += 1
+            entry["count"] += 1
+            entry["sum"] += seconds
+            if seconds > entry["max"]:
+                entry["max"] = seconds
+            if stage == "block":
+                self.blocks += 1
+                self.render_time += seconds
+
+    def record_callback(self, queue_depth, underrun, status):
+        """
+        H2 -- record_callback
+        ===================
+        **Records the fill level of the playback ring buffer, an underrun
+        and the PortAudio status flags of one callback.**
+
+        Author: Felix Pfreundtner
+        """
+        with self.lock:
+            self.queue_depth = queue_depth
+            if self.queue_depth_min is None or \
+                    queue_depth < self.queue_depth_min:
+                self.queue_depth_min = queue_depth
+            if underrun is True:
+                self.underruns += 1
+            if status:
+                for flag, name in self.status_flags.items():
+                    if status & flag:
+                        self.status[name] += 1
+
+    def record_hrtf_switch(self):
+        """
+        H2 -- record_hrtf_switch
+        ===================
+        **Counts one change of the hrtf of a speaker.**
+
+        Author: Felix Pfreundtner
+        """
+        with self.lock:
+            self.hrtf_switches += 1
+
+    def record_overload(self, amplitude):
+        """
+        H2 -- record_overload
+        ===================
+        **Counts one binaural block whose amplitude exceeded the int16
+        range.**
+
+        Author: Felix Pfreundtner
+        """
+        with self.lock:
+            self.overloads += 1
+            if amplitude > self.overload_max:
+                self.overload_max = float(amplitude)
+
+    def snapshot(self):
+        """
+        H2 -- snapshot
+        ===================
+        **Returns a consistent copy of all counters.**
+
+        Return values:
+
+        * snapshot: Dict with the elapsed time, the render time statistics
+          and histograms per stage, the number of rendered blocks, the real
+          time factor (played time of the rendered blocks per render time),
+          queue depth, underruns, status flags, hrtf switches (total and per
+          second) and overloads
+
+        Author: Felix Pfreundtner
+        """
+        with self.lock:
+            elapsed = time.perf_counter() - self.start_time
+            stages = {}
+            for stage, entry in self.stages.items():
+                stages[stage] = {
+                    "count": entry["count"],
+                    "mean": entry["sum"] / entry["count"],
+                    "max": entry["max"],
+                    "histogram": list(entry["histogram"])}
+            if self.render_time > 0:
+                realtime_factor = self.blocks * self.block_time / \
+                    self.render_time
+            else:
+                realtime_factor = None
+            return {"time": time.time(), "elapsed": elapsed,
+                    "bucket_edges": [float(edge) for edge in
+                                     self.bucket_edges],
+                    "stages": stages, "blocks": self.blocks,
+                    "realtime_factor": realtime_factor,
+                    "queue_depth": self.queue_depth,
+                    "queue_depth_min": self.queue_depth_min,
+                    "underruns": self.underruns,
+                    "status": dict(self.status),
+                    "hrtf_switches": self.hrtf_switches,
+                    "hrtf_switches_per_second": self.hrtf_switches / elapsed
+                    if elapsed > 0 else 0.0,
+                    "overloads": self.overloads,
+                    "overload_max": self.overload_max}
+
+
+class MetricsExporter:
+    """
+    MetricsExporter
+    ************************
+    **This class appends a snapshot of the Metrics every interval seconds as
+    one JSON line to a file.**
+
+    The export runs in its own daemon thread, so the dsp thread and the
+    PortAudio callback are not delayed by file access.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, metrics, path, interval=1.0):
+        """
+        **__init__ gets the Metrics object, the path of the JSON lines file
+        and the export interval in seconds.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        H2 -- start
+        ===================
+        **Starts the export thread.**
+
+        Author: Felix Pfreundtner
+        """
+        self.thread = threading.Thread(target=self.export_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def export(self):
+        """
+        H2 -- export
+        ===================
+        **Appends one snapshot to the file.**
+
+        Author: Felix Pfreundtner
+        """
+        with open(self.path, "a") as file:
+            file.write(json.dumps(self.metrics.snapshot()) + "\n")
+
+    def export_loop(self):
+        """
+        H2 -- export_loop
+        ===================
+        **Exports a snapshot every interval seconds until stop() is
+        called.**
+
+        Author: Felix Pfreundtner
+        """
+        while not self.stop_event.wait(self.interval):
+            self.export()
+
+    def stop(self):
+        """
+        H2 -- stop
+        ===================
+        **Stops the export thread and exports a last snapshot.**
+
+        Author: Felix Pfreundtner
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.export()
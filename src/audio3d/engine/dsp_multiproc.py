@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_state
+import numpy as np
+import multiprocessing
+import threading
+import atexit
+from multiprocessing import shared_memory
+
+
+class ShardedRenderer:
+    """
+    ShardedRenderer
+    ************************
+    **This class renders the speakers of a Dsp object in several worker
+    processes.**
+
+    The speakers are split into contiguous shards, one per worker process.
+    Every worker holds its own Dsp object for its speakers and renders
+    their binaural block output (read, normalize, window, convolution,
+    overlap add) with Dsp.render_sps(). The outputs of all speakers are
+    written into one stereo array per speaker in shared memory, which is
+    mixed by the main process with DspOut.mix_binaural_block() in speaker
+    order, so the mixed block is the same as with serial rendering. Main
+    process and workers are synchronised per block with two barriers: the
+    main process writes the angles of the current scene snapshot and starts
+    the block, the workers report the rendered block.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # entries of the control array: command for the workers (0: render
+    # block, 1: stop), sample to seek to before the block (-1: no seek) and
+    # whether the seek crossfades, followed by angle and normalize flag of
+    # every speaker
+    command = 0
+    seek_sample = 1
+    seek_crossfade = 2
+    control_size = 3
+    # seconds to wait for a worker before the rendering is given up
+    timeout = 10
+
+    def __init__(self, dsp_obj, processes):
+        """
+        **__init__ starts processes worker processes for the speakers of
+        dsp_obj (at most one per speaker).**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.dsp_obj = dsp_obj
+        self.spn = dsp_obj.spn
+        hopsize = dsp_obj.dspin_obj.hopsize
+        processes = max(1, min(processes, self.spn))
+        # speakers of every worker
+        self.shards = [list(shard) for shard in
+                       np.array_split(np.arange(self.spn), processes)]
+        control_bytes = (self.control_size + 2 * self.spn) * 8
+        flags_bytes = self.spn * 8
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=control_bytes + flags_bytes +
+            self.spn * hopsize * 2 * 4)
+        self.control, self.flags, self.outs = shared_arrays(
+            self.shm.buf, self.spn, hopsize)
+        self.control[:] = 0
+        self.control[self.seek_sample] = -1
+        self.flags[:] = 1
+        self.barrier = multiprocessing.Barrier(processes + 1)
+        # the workers render without recording, metrics export and further
+        # worker processes
+        settings = dict(dsp_obj.state.gui_settings, record=False,
+                        metrics_file=None, render_processes=1)
+        self.workers = []
+        for shard in self.shards:
+            worker = multiprocessing.Process(
+                target=sharded_worker, args=(
+                    self.shm.name, self.spn, hopsize, shard,
+                    [dict(dsp_obj.state.gui_sp[sp]) for sp in shard],
+                    settings, self.barrier))
+            # no daemon process: the worker may start decoder processes for
+            # compressed files (see DspIn.decoder_pool)
+            worker.start()
+            self.workers.append(worker)
+        self.closed = False
+        self.unlinked = False
+        # stop the workers also if the dsp algorithm ends by an exception
+        atexit.register(self.close)
+
+    def seek(self, sample, crossfade=True):
+        """
+        H2 -- seek
+        ===================
+        **Lets the workers jump to sample before the next block (see
+        Dsp.seek()).**
+
+        Author: Matthias Lederle
+        """
+        self.control[self.seek_sample] = sample
+        self.control[self.seek_crossfade] = 1 if crossfade is True else 0
+        self.flags[:] = 1
+
+    def render(self, blocknumber):
+        """
+        H2 -- render
+        ===================
+        **Renders the next block of all speakers in the workers and hands
+        the outputs to the DspOut object of the main process.**
+
+        If a worker failed or did not answer within timeout seconds, all
+        speakers are ended and an error is sent to the gui.
+
+        Author: Felix Pfreundtner
+        """
+        scene = self.dsp_obj.scene
+        for sp in range(self.spn):
+            self.control[self.control_size + 2 * sp] = scene.sp[sp]["angle"]
+            self.control[self.control_size + 2 * sp + 1] = \
+                1 if scene.sp[sp]["normalize"] is True else 0
+        self.control[self.command] = 0
+        dspout_obj = self.dsp_obj.dspout_obj
+        try:
+            # start the block and wait until all workers rendered it
+            self.barrier.wait(self.timeout)
+            self.barrier.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            self.dsp_obj.state.send_error("Render process failed - "
+                                          "Playback Stopped")
+            for sp in range(self.spn):
+                dspout_obj.continue_convolution[sp] = False
+            self.closed = True
+            return
+        self.control[self.seek_sample] = -1
+        for sp in range(self.spn):
+            # finished speakers keep the zero output set by the mix
+            if dspout_obj.continue_convolution[sp]:
+                dspout_obj.sp_binaural_block_out[sp] = self.outs[sp]
+                dspout_obj.continue_convolution[sp] = bool(self.flags[sp])
+
+    def close(self):
+        """
+        H2 -- close
+        ===================
+        **Stops the workers and frees the shared memory.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.unlinked is True:
+            return
+        atexit.unregister(self.close)
+        if self.closed is False:
+            self.control[self.command] = 1
+            try:
+                self.barrier.wait(self.timeout)
+            except threading.BrokenBarrierError:
+                pass
+            self.closed = True
+        for worker in self.workers:
+            worker.join(self.timeout)
+            if worker.is_alive():
+                worker.terminate()
+        del self.control, self.flags, self.outs
+        self.shm.close()
+        self.shm.unlink()
+        self.unlinked = True
+
+
+def shared_arrays(buffer, spn, hopsize):
+    """
+    H2 -- shared_arrays
+    ===================
+    **Creates the numpy arrays of ShardedRenderer in the shared memory
+    buffer.**
+
+    Return values:
+
+    * control: float64 array of commands and speaker angles
+    * flags: int64 array whether every speaker continues
+    * outs: float32 array of the binaural block output of every speaker
+
+    Author: Felix Pfreundtner
+    """
+    control_size = ShardedRenderer.control_size + 2 * spn
+    control = np.ndarray((control_size, ), dtype=np.float64, buffer=buffer)
+    flags = np.ndarray((spn, ), dtype=np.int64, buffer=buffer,
+                       offset=control_size * 8)
+    outs = np.ndarray((spn, hopsize, 2), dtype=np.float32, buffer=buffer,
+                      offset=control_size * 8 + spn * 8)
+    return control, flags, outs
+
+
+def sharded_worker(name, spn, hopsize, shard, gui_sp, settings, barrier):
+    """
+    H2 -- sharded_worker
+    ===================
+    **Main loop of a worker process of ShardedRenderer.**
+
+    The worker renders the speakers shard (indices of all speakers) with gui_sp
+    (their speaker dicts) block by block until the main process stops it.
+
+    Author: Felix Pfreundtner
+    """
+    # deferred import: audio3d.engine.dsp imports this module
+    import audio3d.engine.dsp
+    # the worker shares the resource tracker of the main process, which
+    # owns the block and removes it in ShardedRenderer.close()
+    shm = shared_memory.SharedMemory(name=name)
+    control, flags, outs = shared_arrays(shm.buf, spn, hopsize)
+    state = audio3d.engine.dsp_state.DspState()
+    state.gui_sp = gui_sp
+    state.gui_settings = settings
+    state.dsp_stop = False
+    try:
+        dsp_obj = audio3d.engine.dsp.Dsp(state)
+    except Exception:
+        barrier.abort()
+        raise
+    try:
+        while True:
+            barrier.wait()
+            if control[ShardedRenderer.command] == 1:
+                break
+            # speaker angles and normalize flags of the current block
+            for local, sp in enumerate(shard):
+                base = ShardedRenderer.control_size + 2 * sp
+                state.gui_sp[local]["angle"] = control[base]
+                state.gui_sp[local]["normalize"] = bool(control[base + 1])
+            state.publish_scene()
+            dsp_obj.update_scene()
+            if control[ShardedRenderer.seek_sample] >= 0:
+                sample = int(control[ShardedRenderer.seek_sample])
+                dsp_obj.dspin_obj.seek(sample)
+                for local in range(len(shard)):
+                    dsp_obj.dspout_obj.seek_overlap_add(
+                        local, bool(control[ShardedRenderer.seek_crossfade]))
+            dsp_obj.dspin_obj.set_block_begin_end()
+            dsp_obj.render_sps(range(len(shard)), 0)
+            for local, sp in enumerate(shard):
+                outs[sp] = dsp_obj.dspout_obj.sp_binaural_block_out[local]
+                flags[sp] = dsp_obj.dspout_obj.continue_convolution[local]
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    except Exception:
+        barrier.abort()
+        raise
+    finally:
+        dsp_obj.dspin_obj.close_streams()
+        del control, flags, outs
+        shm.close()
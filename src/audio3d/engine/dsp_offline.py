@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp
+import audio3d.engine.dsp_state
+import audio3d.engine.dsp_record
+import audio3d.engine.dsp_stream
+import numpy as np
+import concurrent.futures
+import argparse
+import tempfile
+import json
+import math
+import time
+import sys
+import os
+
+
+def load_scene(path):
+    """
+    H2 -- load_scene
+    ===================
+    **Reads a scene description from a JSON file.**
+
+    The scene is a dict with a list "sources" of speakers (keys of gui_sp:
+    path, angle, distance, normalize and optionally loop, start, offset,
+    length), optionally "settings" (keys of gui_settings, e.g.
+    hrtf_database), "duration" in seconds and "output" (path of the wave
+    file). Relative paths are relative to the scene file.
+
+    Return values:
+
+    * scene: Dict of the scene description
+
+    Author: Matthias Lederle
+    """
+    with open(path) as file:
+        scene = json.load(file)
+    return resolve_scene_paths(scene, os.path.dirname(os.path.abspath(path)))
+
+
+def resolve_scene_paths(scene, directory):
+    """
+    H2 -- resolve_scene_paths
+    ===================
+    **Makes the relative source and output paths of scene relative to
+    directory.**
+
+    Return values:
+
+    * scene: The same dict with the resolved paths
+
+    Author: Matthias Lederle
+    """
+    for source in scene.get("sources", []):
+        if not audio3d.engine.dsp_stream.StreamSource.is_stream_path(
+                source["path"]):
+            source["path"] = os.path.join(directory, source["path"])
+    if scene.get("output") is not None:
+        scene["output"] = os.path.join(directory, scene["output"])
+    return scene
+
+
+class OfflineRenderer:
+    """
+    OfflineRenderer
+    ************************
+    **This class renders a scene to a binaural wave file as fast as the CPU
+    allows.**
+
+    It uses the same DspIn / DspOut pipeline as the playback through
+    Dsp.render_block(), but with a DspState instead of the GUI State and
+    without PortAudio: every rendered block is taken directly out of the
+    playback ring buffer and written to the output file.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # gui_settings which are used if the scene does not set them
+    default_settings = audio3d.engine.dsp_state.DspState.default_settings
+    # number of blocks which are copied at once from the segment files to
+    # the output file
+    join_blocks = 1024
+
+    def __init__(self, scene):
+        """
+        **__init__ creates the state and the Dsp object for scene (see
+        load_scene()).**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.scene = scene
+        self.state = audio3d.engine.dsp_state.DspState()
+        for source in scene["sources"]:
+            if audio3d.engine.dsp_stream.StreamSource.is_stream_path(
+                    source["path"]):
+                raise ValueError("Live sources can not be rendered offline: "
+                                 + source["path"])
+            if source.get("loop", False) is True and \
+                    source.get("length") is None and \
+                    scene.get("duration") is None:
+                raise ValueError("Looping sources need a length or a scene "
+                                 "duration: " + source["path"])
+        self.state.configure(scene["sources"], scene.get("settings"))
+        # blocks are written by render() and compressed files are decoded
+        # without underruns
+        self.state.gui_settings["record"] = False
+        self.state.gui_settings["pull_mode"] = False
+        self.state.gui_settings["offline"] = True
+        self.state.dsp_stop = False
+        self.dsp_obj = audio3d.engine.dsp.Dsp(self.state)
+        if self.state.dsp_stop is True:
+            self.dsp_obj.close_workers()
+            self.dsp_obj.dspin_obj.close_streams()
+            raise RuntimeError("; ".join(self.state.gui_error))
+
+    def warmup_blocks(self):
+        """
+        H2 -- warmup_blocks
+        ===================
+        **Returns the number of blocks which have to be rendered before a
+        segment, so that its overlap add state equals the state of a serial
+        render.**
+
+        The remaining block output of prior ffts holds fft_blocksize -
+        hopsize samples and is moved by hopsize every block, so after this
+        number of blocks nothing of the state before is left.
+
+        Author: Felix Pfreundtner
+        """
+        dspin_obj = self.dsp_obj.dspin_obj
+        return -(-(dspin_obj.fft_blocksize - dspin_obj.hopsize) //
+                 dspin_obj.hopsize)
+
+    def block_count(self):
+        """
+        H2 -- block_count
+        ===================
+        **Returns the number of blocks of the scene: until the duration of
+        the scene or until all speakers reached their end.**
+
+        Author: Matthias Lederle
+        """
+        dspin_obj = self.dsp_obj.dspin_obj
+        counts = [dspin_obj.get_sp_block_count(sp) for sp in
+                  range(dspin_obj.spn)]
+        maxblocks = None
+        if self.scene.get("duration") is not None:
+            maxblocks = math.ceil(self.scene["duration"] *
+                                  dspin_obj.samplerate / dspin_obj.hopsize)
+        if None in counts:
+            return maxblocks
+        if maxblocks is None:
+            return max(counts)
+        return min(maxblocks, max(counts))
+
+    def render_blocks(self, first, last, write):
+        """
+        H2 -- render_blocks
+        ===================
+        **Renders the blocks first to last - 1 (all remaining blocks if last
+        is None) and hands every int16 block to the function write.**
+
+        If first is not 0 the speaker inputs jump to the position of the
+        warm up blocks before first, which are rendered but not written.
+
+        Return values:
+
+        * blocks: Number of written blocks
+
+        Author: Felix Pfreundtner
+        """
+        dspin_obj = self.dsp_obj.dspin_obj
+        dspout_obj = self.dsp_obj.dspout_obj
+        blocknumber = max(0, first - self.warmup_blocks())
+        if blocknumber > 0:
+            dspin_obj.seek(blocknumber * dspin_obj.hopsize)
+        written = 0
+        while any(dspout_obj.continue_convolution) is True and \
+                self.state.dsp_stop is False:
+            if last is not None and blocknumber >= last:
+                break
+            self.dsp_obj.render_block(blocknumber)
+            # take the block out of the playback ring buffer
+            slot = dspout_obj.playring.read_slot()
+            if blocknumber >= first:
+                write(slot)
+                written += 1
+            del slot
+            dspout_obj.playring.commit_read()
+            blocknumber += 1
+        return written
+
+    def render(self, path, jobs=1):
+        """
+        H2 -- render
+        ===================
+        **Renders the scene to the wave file path.**
+
+        Rendering ends when all speakers reached their end or after the
+        duration of the scene. With jobs > 1 the timeline is split into
+        jobs segments which are rendered by a pool of processes (see
+        render_segment()) and joined afterwards. Every segment starts with
+        warm up blocks, so the result equals the serial render sample by
+        sample.
+
+        Return values:
+
+        * result: Dict with the output path, the number of blocks, the
+          rendered seconds, the wall time and the real time factor
+          (rendered seconds per second of wall time)
+
+        Author: Matthias Lederle
+        """
+        dspin_obj = self.dsp_obj.dspin_obj
+        begin = time.perf_counter()
+        writer = audio3d.engine.dsp_record.RecordWriter(path,
+                                                        dspin_obj.samplerate)
+        if jobs > 1:
+            self.dsp_obj.close_workers()
+            dspin_obj.close_streams()
+            blocknumber = self.render_parallel(writer, jobs)
+        else:
+            blocknumber = self.render_blocks(
+                0, self.block_count(),
+                lambda block: writer.write(block.copy(), wait=True))
+            self.dsp_obj.close_workers()
+            dspin_obj.close_streams()
+        writer.close()
+        walltime = time.perf_counter() - begin
+        seconds = blocknumber * dspin_obj.hopsize / dspin_obj.samplerate
+        return {"path": path, "blocks": blocknumber, "seconds": seconds,
+                "walltime": walltime,
+                "realtime_factor": seconds / walltime if walltime > 0
+                else None}
+
+    def render_parallel(self, writer, jobs):
+        """
+        H2 -- render_parallel
+        ===================
+        **Renders the scene in jobs segments in parallel processes and
+        writes the segments in order with writer.**
+
+        Every process writes its segment to a temporary raw file, which is
+        copied chunk by chunk to the output file, so the memory use does not
+        grow with the length of the scene.
+
+        Return values:
+
+        * blocks: Number of written blocks
+
+        Author: Matthias Lederle
+        """
+        blocks = self.block_count()
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        # segment borders in blocks
+        borders = [blocks * job // jobs for job in range(jobs + 1)]
+        directory = tempfile.mkdtemp(prefix="audio3d_render_")
+        paths = [os.path.join(directory, "segment_" + str(job) + ".raw")
+                 for job in range(jobs)]
+        written = 0
+        try:
+            with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+                futures = [pool.submit(render_segment, self.scene,
+                                       borders[job], borders[job + 1],
+                                       paths[job]) for job in range(jobs)
+                           if borders[job + 1] > borders[job]]
+                for future in futures:
+                    future.result()
+            for segment in paths:
+                if not os.path.exists(segment):
+                    continue
+                with open(segment, "rb") as file:
+                    while True:
+                        chunk = np.fromfile(file, dtype=np.int16,
+                                            count=self.join_blocks *
+                                            hopsize * 2)
+                        if chunk.size == 0:
+                            break
+                        writer.write(chunk, wait=True)
+                        written += chunk.size // (hopsize * 2)
+        finally:
+            for segment in paths:
+                if os.path.exists(segment):
+                    os.remove(segment)
+            os.rmdir(directory)
+        return written
+
+
+def render_segment(scene, first, last, path):
+    """
+    H2 -- render_segment
+    ===================
+    **Renders the blocks first to last - 1 of scene to the raw int16 file
+    path. Runs in a process of the pool of OfflineRenderer.render().**
+
+    Return values:
+
+    * blocks: Number of written blocks
+
+    Author: Matthias Lederle
+    """
+    renderer = OfflineRenderer(scene)
+    with open(path, "wb") as file:
+        blocks = renderer.render_blocks(first, last, file.write)
+    renderer.dsp_obj.close_workers()
+    renderer.dsp_obj.dspin_obj.close_streams()
+    return blocks
+
+
+def main(argv=None):
+    """
+    H2 -- main
+    ===================
+    **Command line interface audio3d-render: renders a scene file to a
+    binaural wave file and prints the real time factor.**
+
+    Author: Matthias Lederle
+    """
+    parser = argparse.ArgumentParser(
+        prog="audio3d-render",
+        description="Render a scene description (JSON) to a binaural wave "
+                    "file without audio device.")
+    parser.add_argument("scene", help="JSON scene description")
+    parser.add_argument("-o", "--output", help="output wave file (default: "
+                        "output of the scene)")
+    parser.add_argument("-d", "--duration", type=float,
+                        help="rendered seconds (default: until all sources "
+                             "ended)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of processes rendering segments of "
+                             "the scene in parallel (default: 1)")
+    parser.add_argument("--hrtf-database", choices=["kemar_normal_ear",
+                                                    "kemar_big_ear",
+                                                    "kemar_compact"],
+                        help="hrtf database (default: setting of the scene)")
+    args = parser.parse_args(argv)
+    scene = load_scene(args.scene)
+    if args.duration is not None:
+        scene["duration"] = args.duration
+    if args.hrtf_database is not None:
+        scene.setdefault("settings", {})["hrtf_database"] = \
+            args.hrtf_database
+    output = args.output or scene.get("output")
+    if output is None:
+        parser.error("no output file given")
+    try:
+        renderer = OfflineRenderer(scene)
+    except (ValueError, RuntimeError) as error:
+        print("audio3d-render: " + str(error), file=sys.stderr)
+        return 1
+    result = renderer.render(output, max(1, args.jobs))
+    for message in renderer.state.gui_error:
+        print(message, file=sys.stderr)
+    print("Rendered {:.1f} s to {} in {:.2f} s (real time factor "
+          "{:.1f})".format(result["seconds"], result["path"],
+                           result["walltime"], result["realtime_factor"] or 0))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,767 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import numpy as np
+import math
+import time
+import audio3d.engine.dsp_stream
+import audio3d.engine.dsp_ring
+import audio3d.engine.dsp_buffer
+import audio3d.engine.dsp_metrics
+import audio3d.engine.dsp_record
+import audio3d.engine.dsp_resources
+import audio3d.engine.dsp_backend
+import audio3d.engine.dsp_events
+import audio3d.engine.dsp_in
+
+
+def ring_parts(begin, length, size):
+    """
+    H2 -- ring_parts
+    ===================
+    **Splits length samples from position begin of a circular array with
+    size samples into at most two contiguous parts.**
+
+    Return values:
+
+    * parts: List of (slice of the circular array, slice of the samples)
+
+    Author: Felix Pfreundtner
+    """
+    first = min(length, size - begin)
+    parts = [(slice(begin, begin + first), slice(0, first))]
+    if first < length:
+        parts.append((slice(0, length - first), slice(first, length)))
+    return parts
+
+
+class DspOut:
+    """
+    DspOut
+    ************************
+    **This class contains all otuput related variables and methods for
+    the dsp algorithm.**
+
+    It enables the overlap add algorithm and mix all binaural speaker
+    output arrays to one final binaural output block. It holds the
+    PortAudio methods, which are called through a Callback Thread. It also
+    enables the interaction between DSP Thread and PortAudio Thread.
+
+    The binaural blocks of all speakers are stored by sample in one array
+    each (sample, speaker, ear) and whether a speaker continues is a
+    boolean mask, so overlap add and mix run as one numpy operation on
+    contiguous memory over all speakers. The arrays are used through views
+    with one row per speaker (speaker, sample, ear).
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # arrays stored by sample in <name>_by_sample, <name> is their view with
+    # one row per speaker
+    sp_arrays_by_sample = ("sp_binaural_block", "sp_binaural_block_out",
+                           "sp_binaural_block_add", "sp_gain_factor",
+                           "sp_binaural_block_gained")
+
+    def __init__(self, state_init, fft_blocksize, hopsize, metrics=None):
+        """
+        **__init__ is called by DSP and creates all variables which
+        are relevant for the output part of DSP run() method's while loop.
+        It setups up the format of the output block related varialbles and
+        provides the playback ring buffer and record writer. The runtime
+        counters are recorded in metrics (a new Metrics object if None).**
+
+        Authors: Felix  Pfreundtner, Matthias Lederle
+        """
+        self.state = state_init
+        # snapshot of gui_sp and gui_settings of the current block, set by
+        # Dsp.update_scene()
+        self.scene = state_init.scene
+        # Number of all speakers
+        self.spn = len(self.state.gui_sp)
+        # binaural block of the current fft, binaural block output of the
+        # current block and remaining block output of prior ffts of every
+        # speaker (sample, speaker, left / right ear)
+        self.sp_binaural_block_by_sample = np.zeros(
+            (fft_blocksize, self.spn, 2), dtype=np.float32)
+        self.sp_binaural_block_out_by_sample = np.zeros(
+            (hopsize, self.spn, 2), dtype=np.float32)
+        self.sp_binaural_block_add_by_sample = np.zeros(
+            (fft_blocksize - hopsize, self.spn, 2), dtype=np.float32)
+        # sp_binaural_block_add is circular: position of the remaining block
+        # output which is played next of every speaker
+        self.sp_binaural_block_add_begin = np.zeros((self.spn, ),
+                                                    dtype=np.int64)
+        self.binaural_block = np.zeros((hopsize, 2), dtype=np.float32)
+        # preallocated arrays of overlap add and mix: the render loop works
+        # in place and allocates no memory per block. gain factor of every
+        # sample and gained block output of every speaker
+        self.sp_gain_factor_by_sample = np.zeros((hopsize, self.spn, 2),
+                                                 dtype=np.float32)
+        self.sp_binaural_block_gained_by_sample = np.zeros(
+            (hopsize, self.spn, 2), dtype=np.float32)
+        self.set_sp_rows()
+        # mask of the speakers which are still convolved
+        self.continue_convolution = np.ones((self.spn, ), dtype=bool)
+        # distance and gain of every speaker which are mixed: the newest
+        # value of the scene or of a parameter event
+        self.sp_distance = [None for sp in range(self.spn)]
+        self.sp_gain = [1 for sp in range(self.spn)]
+        # distance and gain of every speaker in the last scene snapshot
+        self.scene_distance = [None for sp in range(self.spn)]
+        self.scene_gain = [None for sp in range(self.spn)]
+        # gain factor of every speaker, ramped after parameter events
+        self.sp_gain_ramp = [audio3d.engine.dsp_events.GainRamp() for sp in
+                             range(self.spn)]
+        # distance and gain events of every speaker in the current block:
+        # list of (sample in block, event), set by Dsp.dispatch_events()
+        self.gain_events = [[] for sp in range(self.spn)]
+        # mask of the muted speakers: their gain factor ramps to zero
+        self.sp_muted = np.zeros((self.spn, ), dtype=bool)
+        # factor 1 / spn of the mix (1 without speakers), ramped within one
+        # block when a speaker is added in a new slot, and its gain factor
+        # of every sample
+        self.mix_ramp = audio3d.engine.dsp_events.GainRamp(
+            1 / max(self.spn, 1))
+        self.mix_curve = np.zeros((hopsize, ), dtype=np.float32)
+        self.played_frames_end = 0
+        self.played_block_counter = 0
+        self.prior_played_block_counter = 0
+        self.playback_successful = True
+        # whether the playback callback completed the audio stream
+        self.playback_complete = False
+        # preallocated ring buffer of int16 binaural blocks, written by the
+        # dsp thread and read by the PortAudio callback without a lock. The
+        # dsp thread renders at most bufferblocks + 2 blocks in advance,
+        # with adaptive buffer depth at most bufferblocks_max + 2.
+        maxblocks = self.state.gui_settings.get("bufferblocks", 5)
+        if self.state.gui_settings.get("adaptive_buffer", False) is True:
+            maxblocks = max(maxblocks, self.state.gui_settings.get(
+                "bufferblocks_max", audio3d.engine.dsp_buffer
+                .BufferDepthController.default_max_depth))
+        self.playring = audio3d.engine.dsp_ring.RingBuffer(
+            maxblocks + 4, (hopsize, 2), np.int16)
+        # whether the callback plays silence instead of stopping the
+        # playback when no block is available (adaptive buffer depth)
+        self.underrun_silence = False
+        # whether the callback still has to free the slot it returned last
+        self.playring_pending = False
+        # lowest number of buffered blocks seen by the callback
+        self.playring_min_fill = None
+        # pull mode: the callback renders every block with pull_render()
+        # (set by Dsp) within pull_deadline seconds
+        self.pull_mode = False
+        self.pull_render = None
+        self.pull_deadline = hopsize / 44100
+        # number of missed deadlines in a row, after pull_max_misses the
+        # playback falls back to the queued mode
+        self.pull_misses = 0
+        self.pull_max_misses = self.state.gui_settings.get("pull_max_misses",
+                                                           3)
+        # total number of missed deadlines
+        self.pull_deadline_misses = 0
+        # whether the dsp thread is taking over from the pull mode: silence
+        # is played until its first block is available
+        self.pull_handover = False
+        self.silence_block = np.zeros((hopsize, 2), dtype=np.int16)
+        # writer of the record file, created by open_recordfile()
+        self.recordwriter = None
+        # capture to output latency of live sources
+        self.stream_latency = audio3d.engine.dsp_stream.StreamLatency()
+        # runtime performance counters
+        if metrics is None:
+            metrics = audio3d.engine.dsp_metrics.Metrics(hopsize / 44100)
+        self.metrics = metrics
+
+    def set_sp_rows(self):
+        """
+        H2 -- set_sp_rows
+        ===================
+        **Sets the views with one row per speaker of the arrays stored by
+        sample (see sp_arrays_by_sample).**
+
+        Author: Felix Pfreundtner
+        """
+        for name in self.sp_arrays_by_sample:
+            setattr(self, name,
+                    getattr(self, name + "_by_sample").transpose(1, 0, 2))
+
+    def overlap_add(self, fft_blocksize, hopsize, sp):
+        """
+        **Applies the overlap-add-method to the signal.**
+
+        Adds a part of the prior generated binaural block to the beginning
+        of the new generated binaural block (reason: convert fft circular
+        convolution to linear convolution). sp is one speaker or a range
+        of speakers, whose blocks are overlap added in their preallocated
+        rows.
+
+        The remaining block output of prior ffts is a circular accumulator
+        of fft_blocksize - hopsize samples per speaker, which begins at
+        sp_binaural_block_add_begin: the played hop is read and zeroed and
+        the remaining block output of the current fft is added in place,
+        nothing is shifted. All speakers at the same position are overlap
+        added at once in the arrays stored by sample, the speakers of a
+        render thread one by one.
+
+        Author: Felix Pfreundtner
+        """
+        add_sp_arraysize = (fft_blocksize - hopsize)
+        rows = audio3d.engine.dsp_in.sp_rows(sp)
+        sps = range(self.spn)[rows]
+        begins = self.sp_binaural_block_add_begin[rows]
+        if len(sps) < self.spn or len(sps) == 0 or \
+                begins.min() != begins.max():
+            for sp in sps:
+                self.overlap_add_sp(add_sp_arraysize, hopsize, sp)
+            return
+        sp_binaural_block = self.sp_binaural_block_by_sample
+        sp_binaural_block_add = self.sp_binaural_block_add_by_sample
+        sp_binaural_block_out = self.sp_binaural_block_out_by_sample
+        begin = int(begins[0])
+        # get current binaural block output of all speakers: see
+        # overlap_add_sp()
+        for add, block in ring_parts(begin, hopsize, add_sp_arraysize):
+            np.add(sp_binaural_block[block], sp_binaural_block_add[add],
+                   out=sp_binaural_block_out[block])
+            sp_binaural_block_add[add] = 0
+        # normalize the speakers whose output exceeds the int16 range
+        if max(np.amax(sp_binaural_block_out),
+               -np.amin(sp_binaural_block_out)) > 32767:
+            for sp in sps:
+                self.normalize_sp_out(sp)
+        # add remaining block output of current fft to the accumulator
+        begin = (begin + hopsize) % add_sp_arraysize
+        sp_binaural_block_remaining = sp_binaural_block[hopsize:]
+        for add, block in ring_parts(begin, add_sp_arraysize,
+                                     add_sp_arraysize):
+            np.add(sp_binaural_block_add[add],
+                   sp_binaural_block_remaining[block],
+                   out=sp_binaural_block_add[add])
+        self.sp_binaural_block_add_begin[:] = begin
+
+    def overlap_add_sp(self, add_sp_arraysize, hopsize, sp):
+        """
+        H2 -- overlap_add_sp
+        ===================
+        **Overlap adds the binaural block of speaker sp (see
+        overlap_add()).**
+
+        Author: Felix Pfreundtner
+        """
+        sp_binaural_block_sp = self.sp_binaural_block[sp]
+        sp_binaural_block_add_sp = self.sp_binaural_block_add[sp]
+        sp_binaural_block_sp_out = self.sp_binaural_block_out[sp]
+        begin = self.sp_binaural_block_add_begin[sp]
+        # get current binaural block output of sp
+        # 1. take binaural block output of current fft which don't
+        # overlap with next blocks and
+        # 2. add relevant still remaining block output of prior ffts to
+        # binaural block output of current block, then zero it in the
+        # accumulator
+        for add, block in ring_parts(begin, hopsize, add_sp_arraysize):
+            np.add(sp_binaural_block_sp[block],
+                   sp_binaural_block_add_sp[add],
+                   out=sp_binaural_block_sp_out[block])
+            sp_binaural_block_add_sp[add] = 0
+        self.normalize_sp_out(sp)
+        # add remaining block output of current fft to the accumulator,
+        # which begins after the played hop: its zeroed samples take
+        # the end of the block output
+        begin = (begin + hopsize) % add_sp_arraysize
+        sp_binaural_block_sp_remaining = sp_binaural_block_sp[hopsize:]
+        for add, block in ring_parts(begin, add_sp_arraysize,
+                                     add_sp_arraysize):
+            np.add(sp_binaural_block_add_sp[add],
+                   sp_binaural_block_sp_remaining[block],
+                   out=sp_binaural_block_add_sp[add])
+        self.sp_binaural_block_add_begin[sp] = begin
+
+    def normalize_sp_out(self, sp):
+        """
+        H2 -- normalize_sp_out
+        ===================
+        **Normalizes the binaural block output of speaker sp if overlap add
+        led to an amplitude higher than int16 max.**
+
+        Author: Felix Pfreundtner
+        """
+        sp_binaural_block_sp_out = self.sp_binaural_block_out[sp]
+        # the maximum absolute amplitude is the maximum of the maximum and
+        # the negative minimum
+        sp_binaural_block_sp_out_max_amp = max(
+            np.amax(sp_binaural_block_sp_out),
+            -np.amin(sp_binaural_block_sp_out))
+        # if yes normalize maximum output amplitude to maximum int16
+        # range to prevent uncontrolled clipping
+        if sp_binaural_block_sp_out_max_amp > 32767:
+            sp_binaural_block_sp_out /= \
+                sp_binaural_block_sp_out_max_amp * 32767
+
+    def insert_sp(self, sp, fft_blocksize, hopsize):
+        """
+        H2 -- insert_sp
+        ===================
+        **Resets the output state of speaker sp for a new speaker: a free
+        slot of a removed speaker or, with sp equal to spn, a new slot after
+        the last speaker (see DspIn.insert_sp()).**
+
+        Author: Felix Pfreundtner
+        """
+        # the accumulator of the new speaker is empty: it takes the position
+        # of the other speakers, so all speakers are overlap added at once
+        values = {"continue_convolution": True,
+                  "sp_distance": None, "sp_gain": 1, "scene_distance": None,
+                  "scene_gain": None,
+                  "sp_gain_ramp": audio3d.engine.dsp_events.GainRamp(),
+                  "gain_events": [], "sp_muted": False,
+                  "sp_binaural_block_add_begin": np.amax(
+                      self.sp_binaural_block_add_begin, initial=0)}
+        for name, value in values.items():
+            sp_values = getattr(self, name)
+            # a new row of an array is filled with value
+            if isinstance(sp_values, np.ndarray):
+                value = np.full(sp_values.shape[1:], value,
+                                dtype=sp_values.dtype)
+            setattr(self, name, audio3d.engine.dsp_in.set_slot(
+                sp_values, sp, value))
+        # arrays stored by sample: the speaker is a column
+        for name in self.sp_arrays_by_sample:
+            sp_values = getattr(self, name + "_by_sample")
+            if sp < sp_values.shape[1]:
+                sp_values[:, sp] = 0
+            else:
+                setattr(self, name + "_by_sample", np.concatenate(
+                    (sp_values, np.zeros((sp_values.shape[0], 1, 2),
+                                         dtype=sp_values.dtype)), axis=1))
+        self.set_sp_rows()
+        self.spn = len(self.continue_convolution)
+
+    def mute(self, sp, muted, ramp=None):
+        """
+        H2 -- mute
+        ===================
+        **Mutes or unmutes speaker sp: its gain factor ramps to zero or back
+        within ramp samples (default gui_settings["event_gain_ramp"], 64
+        samples).**
+
+        Author: Felix Pfreundtner
+        """
+        self.sp_muted[sp] = muted
+        if ramp is None:
+            ramp = self.scene.settings.get("event_gain_ramp", 64)
+        # a speaker which was not mixed yet gets its factor in the mix
+        if self.sp_distance[sp] is not None:
+            self.sp_gain_ramp[sp].set(self.gain_factor(sp), ramp)
+
+    def seek_overlap_add(self, sp, crossfade=True):
+        """
+        H2 -- seek_overlap_add
+        ===================
+        **Prepares the overlap add state of speaker sp for a jump to a new
+        position in the speaker input.**
+
+        The remaining block output of the prior ffts belongs to the old
+        position. With crossfade it is kept: it was windowed with the
+        falling half of the Hann window and the first block of the new
+        position is windowed with the rising half, so overlap add fades
+        from the old to the new position within one hop with constant gain.
+        Without crossfade it is dropped and the new position starts hard.
+
+        Author: Felix Pfreundtner
+        """
+        if crossfade is False:
+            self.sp_binaural_block_add[sp][:, :] = 0
+        # a speaker which has reached its end plays again after a seek
+        self.continue_convolution[sp] = True
+
+    def mix_binaural_block(self, hopsize):
+        """
+        H2 -- mix_binaural_block
+        ===================
+        **Calculate a mixed binaural output for all speakers taking into
+        account the distance of the head to each speaker.**
+
+        The mix is divided by the number of speaker slots. When a speaker
+        is added in a new slot, the factor ramps to the new number of slots
+        within this block, so the level of the playing speakers does not
+        jump.
+
+        Author: Felix Pfreundtner
+        """
+        sp_gain_factor = self.sp_gain_factor
+        mix_ramp = self.mix_ramp
+        if mix_ramp.target != 1 / max(self.spn, 1):
+            mix_ramp.set(1 / max(self.spn, 1), hopsize)
+        for sp in range(self.spn):
+            # take changed distance or gain of the speaker from the scene
+            distance_sp = self.scene.sp[sp]["distance"]
+            gain_sp = self.scene.sp[sp].get("gain", 1)
+            if distance_sp != self.scene_distance[sp] or \
+                    gain_sp != self.scene_gain[sp]:
+                if distance_sp != self.scene_distance[sp]:
+                    self.sp_distance[sp] = distance_sp
+                if gain_sp != self.scene_gain[sp]:
+                    self.sp_gain[sp] = gain_sp
+                self.scene_distance[sp] = distance_sp
+                self.scene_gain[sp] = gain_sp
+                self.sp_gain_ramp[sp].set(self.gain_factor(sp))
+            if len(self.gain_events[sp]) == 0 and \
+                    self.sp_gain_ramp[sp].remaining == 0:
+                sp_gain_factor[sp] = self.sp_gain_ramp[sp].value
+            else:
+                # gain changes inside the block: one factor per sample
+                sp_gain_factor[sp] = self.gain_curve(sp, hopsize)[
+                    :, np.newaxis]
+        # add gained sp block outputs to a summarized block output of all
+        # speakers
+        sp_binaural_block_gained = np.multiply(
+            self.sp_binaural_block_out_by_sample,
+            self.sp_gain_factor_by_sample,
+            out=self.sp_binaural_block_gained_by_sample)
+        if mix_ramp.remaining == 0:
+            np.divide(sp_binaural_block_gained, self.spn,
+                      out=sp_binaural_block_gained)
+        else:
+            mix_ramp.render(self.mix_curve, 0, hopsize)
+            np.multiply(sp_binaural_block_gained,
+                        self.mix_curve[:, np.newaxis, np.newaxis],
+                        out=sp_binaural_block_gained)
+        np.sum(sp_binaural_block_gained, axis=1, out=self.binaural_block)
+        # if convolution for a speaker will be skipped on the next
+        # iteration set its binaural_block_out to zeros
+        if not self.continue_convolution.all():
+            self.sp_binaural_block_out[~self.continue_convolution] = 0
+        sp_binaural_block_time_max_amp = max(
+            np.amax(self.sp_binaural_block_out_by_sample),
+            -np.amin(self.sp_binaural_block_out_by_sample))
+        if sp_binaural_block_time_max_amp > 35000:
+            self.metrics.record_overload(sp_binaural_block_time_max_amp)
+
+    def gain_factor(self, sp):
+        """
+        H2 -- gain_factor
+        ===================
+        **Returns the factor of speaker sp in the mix for its distance and
+        gain, zero if it is muted.**
+
+        Author: Felix Pfreundtner
+        """
+        # maximum distance of a speaker to head in window with borderlength
+        # 3.5[m] is sqrt(3.5^2+3.5^2)[m]=3.5*sqrt(2)
+        # max([gui_sp[sp][1] for sp in gui_sp])
+        distance_max = 3.5 * math.sqrt(2)
+        if self.sp_muted[sp]:
+            return 0
+        # sound pressure decreases with distance 1/r
+        sp_gain_factor = 1 - self.sp_distance[sp] / distance_max
+        if self.sp_gain[sp] != 1:
+            sp_gain_factor *= self.sp_gain[sp]
+        return sp_gain_factor
+
+    def gain_curve(self, sp, hopsize):
+        """
+        H2 -- gain_curve
+        ===================
+        **Applies the distance and gain events of speaker sp in the current
+        block at their samples.**
+
+        Every event ramps the gain factor linearly to its new value within
+        its ramp samples (default gui_settings["event_gain_ramp"], 64
+        samples), so the gain changes without clicks.
+
+        Return values:
+
+        * curve: Gain factor of every sample of the block
+
+        Author: Felix Pfreundtner
+        """
+        curve = np.empty((hopsize, ), dtype=np.float32)
+        ramp = self.sp_gain_ramp[sp]
+        position = 0
+        for offset, event in self.gain_events[sp]:
+            ramp.render(curve, position, offset)
+            position = offset
+            if event.kind == "distance":
+                self.sp_distance[sp] = event.value
+            else:
+                self.sp_gain[sp] = event.value
+            if event.ramp is not None:
+                length = event.ramp
+            else:
+                length = self.scene.settings.get("event_gain_ramp", 64)
+            ramp.set(self.gain_factor(sp), length)
+        ramp.render(curve, position, hopsize)
+        self.gain_events[sp] = []
+        return curve
+
+    def add_to_playqueue(self):
+        """
+        H2 -- add_to_playqueue
+        ===================
+        **Sends the created binaural block of the dsp thread to the play
+        thread with the playback ring buffer.**
+
+        The block is converted to int16 directly into the next free slot, so
+        no memory is allocated per block. If the ring buffer is full the dsp
+        thread waits until the callback freed a slot, the block is counted
+        as one overrun however often the dsp thread tries again.
+
+        Author: Felix Pfreundtner
+        """
+        slot = self.playring.write_slot()
+        while slot is None and self.state.dsp_stop is False:
+            self.state.wait_dsp(lambda: self.playring.fill_level() <
+                                self.playring.slots)
+            slot = self.playring.write_slot(count=False)
+        if slot is None:
+            return
+        np.copyto(slot, self.binaural_block, casting="unsafe")
+        del slot
+        self.playring.commit_write()
+        # wake up an output backend waiting for the block
+        self.state.notify_dsp()
+
+    def playback_status(self):
+        """
+        H2 -- playback_status
+        ===================
+        **Returns the counters of the playback ring buffer.**
+
+        Return values:
+
+        * status: Dict with the number of currently buffered blocks
+          (fill_level), the lowest number of buffered blocks seen by the
+          callback (min_fill_level), the number of callbacks which found no
+          block (underruns) and the number of blocks the dsp thread had to
+          wait for a free slot (overruns) and the number of blocks which
+          missed their deadline in pull mode (pull_deadline_misses)
+
+        Author: Felix Pfreundtner
+        """
+        return {"fill_level": self.playring.fill_level(),
+                "min_fill_level": self.playring_min_fill,
+                "underruns": self.playring.underruns,
+                "overruns": self.playring.overruns,
+                "pull_deadline_misses": self.pull_deadline_misses}
+
+    def add_to_recordqueue(self):
+        """
+        H2 -- add_to_recordqueue
+        ===================
+        **Adds the binaural block to the record file.**
+
+        Sends the created binaural block of the dsp thread to the queue of
+        the record writer, which appends it to the record file in its own
+        thread. The block is converted into a reused int16 buffer of the
+        record writer, so recording allocates no memory per block.
+
+        Author: Felix Pfreundtner
+        """
+        self.recordwriter.write_converted(self.binaural_block)
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """
+        H2 -- callback
+        ===================
+        ** Plays the audio blocks. The function is always called by PortAudio
+        when a new block is needed. The blocks are exchanged between DSP Thread
+         and Play Thread through the ring buffer playring **
+
+        The slot of the ring buffer is returned without a copy. PortAudio
+        copies it after the callback returned, so the slot is freed at the
+        next call of the callback.
+
+        In pull mode the callback renders the block itself just before it is
+        played, so the head position of the block is as new as possible.
+        If the rendering misses its deadline pull_max_misses times in a
+        row, the dsp thread takes over in queued mode and silence is played
+        until its first block is ready.
+
+        Author: Felix Pfreundtner
+        """
+        # measure latency of live samples in this block: time until now
+        # plus time until the block reaches the digital analog converter
+        self.stream_latency.played_block(
+            self.played_block_counter, max(0, time_info.get(
+                "output_buffer_dac_time", 0) - time_info.get(
+                "current_time", 0)))
+        # played_frames_begin = self.played_frames_end
+        # self.played_frames_end += frame_count
+        # free the slot which was played by the last call
+        if self.playring_pending is True:
+            self.playring.commit_read()
+            self.playring_pending = False
+        # whether the block of this call is rendered in pull mode
+        pulled = False
+        if self.pull_mode is True and self.playring.fill_level() == 0:
+            self.pull_block()
+            pulled = True
+        fill_level = self.playring.fill_level()
+        if self.playring_min_fill is None or \
+                fill_level < self.playring_min_fill:
+            self.playring_min_fill = fill_level
+        slot = self.playring.read_slot()
+        # record fill level, underrun and status flags (playback errors)
+        self.metrics.record_callback(fill_level, slot is None, status)
+        if slot is not None:
+            data = slot
+            self.playring_pending = True
+            returnflag = audio3d.engine.dsp_backend.paContinue
+            # the handover ends with the first block of the dsp thread
+            if pulled is False:
+                self.pull_handover = False
+        elif (self.pull_mode is True or self.pull_handover is True or
+              self.underrun_silence is True) and \
+                any(self.continue_convolution) is True:
+            # block missed in pull mode, dsp thread has not rendered its
+            # first block yet or underrun with adaptive buffer depth
+            self.state.notify_dsp()
+            return self.silence_block, audio3d.engine.dsp_backend.paContinue
+        else:
+            data = bytes([0])
+            returnflag = audio3d.engine.dsp_backend.paComplete
+            self.playback_complete = True
+        # print("Played Block: " + str(self.played_block_counter))
+        self.played_block_counter += 1
+        # wake up the dsp thread waiting for the played block
+        self.state.notify_dsp()
+        # print("Play: " + str(self.played_block_counter))
+        return data, returnflag
+
+    def pull_block(self):
+        """
+        H2 -- pull_block
+        ===================
+        **Renders the next block in pull mode and checks its deadline.**
+
+        Author: Felix Pfreundtner
+        """
+        begin = time.perf_counter()
+        rendered = self.pull_render()
+        if rendered is True and \
+                time.perf_counter() - begin <= self.pull_deadline:
+            self.pull_misses = 0
+            return
+        # nothing left to render
+        if rendered is False and any(self.continue_convolution) is False:
+            return
+        self.pull_misses += 1
+        self.pull_deadline_misses += 1
+        if self.pull_misses >= self.pull_max_misses:
+            # fall back to queued mode: wake up the dsp thread
+            self.pull_handover = True
+            self.pull_mode = False
+            self.state.notify_dsp()
+
+    def wait_block(self):
+        """
+        H2 -- wait_block
+        ===================
+        **Waits until the callback can take the next block: a block is in the
+        playback ring buffer, the callback renders it itself (pull mode) or
+        the playback ends. Called by output backends which do not play in
+        real time.**
+
+        The slot played last is still in the ring buffer until the callback
+        frees it.
+
+        Author: Felix Pfreundtner
+        """
+        played = 1 if self.playring_pending is True else 0
+        self.state.wait_dsp(lambda: self.playring.fill_level() > played or
+                            self.pull_mode is True or
+                            any(self.continue_convolution) is False or
+                            self.state.dsp_stop is True)
+
+    def audiooutput(self, samplerate, hopsize):
+        """
+        H2 -- audiooutput
+        ===================
+        **Starts the audio output backend and handles play and pause button
+        presses through the user in GUI MainWindow.**
+
+        The backend is a PortAudio stream or, selected with
+        gui_settings["audio_backend"], a null, raw file or wave file sink
+        without sound card (see dsp_backend.create_backend()). All of them
+        call callback() for every block.
+
+        Author: Felix Pfreundtner
+        """
+        backend = audio3d.engine.dsp_backend.create_backend(
+            self.state.gui_settings)
+        backend.open(samplerate, hopsize, self.callback, self.wait_block)
+        # start audio stream
+        backend.start()
+        paused = False
+        # as long as stream is active (enough input) or audiostream has been
+        # stopped by user: sleep until pause, resume, stop or the end of
+        # the stream
+        while True:
+            self.state.wait_dsp(lambda: self.state.dsp_pause is not paused or
+                                self.playback_complete is True)
+            # handle playblack stop or end of stream: break while loop
+            if self.state.dsp_stop is True or self.playback_complete is True:
+                break
+            # handle playblack pause: stop audio playback again (outside of
+            # the condition, the callback needs it)
+            if self.state.dsp_pause is True:
+                backend.stop()
+                paused = True
+            # handle playblack continue: start audio playback again
+            else:
+                backend.start()
+                paused = False
+        # stop playback
+        backend.close()
+
+        # if stop button was not pressed
+        if self.state.dsp_stop is False:
+            # when not the whole input has been convolved
+            if any(self.continue_convolution) is True:
+                self.state.send_error("Error PC to slow - Playback Stopped")
+                # set playback to unsuccessful
+                self.playback_successful = False
+
+        # finally mark audio as not paused
+        self.state.dsp_pause = False
+        # finally mark audio as stopped
+        self.state.dsp_stop = True
+
+    def open_recordfile(self, samplerate):
+        """
+        H2 -- open_recordfile
+        ===================
+        **Creates the record file and starts its writer thread.**
+
+        The file is gui_settings["record_path"] or audio_out/binauralmix.wav
+        of the package.
+
+        Author: Felix Pfreundtner
+        """
+        path = self.state.gui_settings.get("record_path")
+        if path is None:
+            path = audio3d.engine.dsp_resources.resource_filename(
+                "audio_out/binauralmix.wav")
+        self.recordwriter = audio3d.engine.dsp_record.RecordWriter(
+            path, samplerate)
+
+    def writerecordfile(self, samplerate, hopsize):
+        """
+        H2 -- writerecordfile
+        ===================
+        **Finishes the wave file of the binaural output.**
+
+        All blocks were already written during playback by the writer
+        thread, only the remaining blocks and the final header are written.
+
+        Author: Felix Pfreundtner
+        """
+        if self.recordwriter is None:
+            return
+        self.recordwriter.close()
+        message = "Audio Recorded to File: " + self.recordwriter.path
+        if self.recordwriter.dropped_blocks > 0:
+            message += " ({} blocks lost, disk too slow)".format(
+                self.recordwriter.dropped_blocks)
+        self.state.send_error(message)
+        self.recordwriter = None
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import numpy as np
+import collections
+import threading
+import struct
+import queue
+import time
+
+
+class RecordWriter:
+    """
+    RecordWriter
+    ************************
+    **This class writes the binaural output block by block to a wave file
+    while it is played.**
+
+    The blocks are handed over by the dsp thread through a bounded queue
+    and written by an own writer thread, so the memory use does not grow
+    with the length of the recording and no time is lost at the end of the
+    playback. The header contains a JUNK chunk which is turned into a ds64
+    chunk (RF64 format) when the file grows beyond 4 GiB. The sizes in the
+    header are updated every patch_interval seconds, so the file can be read
+    up to the last update if the process crashes. write_converted() converts
+    the blocks of the dsp thread into int16 buffers of a pool, which are
+    returned by the writer thread after writing, so a recording allocates
+    no memory per block once the pool has grown.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # largest size which fits in the 32 bit size fields of a RIFF file
+    riff_limit = 0xFFFFFFFF
+    # bytes of the header: RIFF header, JUNK / ds64 chunk, fmt chunk and
+    # data chunk header
+    header_size = 12 + 36 + 24 + 8
+
+    def __init__(self, path, samplerate, channels=2, sampledepth=16,
+                 queue_blocks=1024, patch_interval=1.0):
+        """
+        **__init__ creates the file path with an empty header and starts the
+        writer thread. The queue holds at most queue_blocks blocks.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.path = path
+        self.samplerate = samplerate
+        self.channels = channels
+        self.sampledepth = sampledepth
+        self.patch_interval = patch_interval
+        self.blockqueue = queue.Queue(maxsize=queue_blocks)
+        # int16 buffers of write_converted() which are not queued, and the
+        # number of allocated buffers (at most queue_blocks)
+        self.free_buffers = collections.deque()
+        self.buffer_count = 0
+        # number of written data bytes
+        self.data_bytes = 0
+        # number of blocks which were dropped because the queue was full
+        self.dropped_blocks = 0
+        self.file = open(path, "wb")
+        self.file.write(self.header(0))
+        self.thread = threading.Thread(target=self.write_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def header(self, data_bytes):
+        """
+        H2 -- header
+        ===================
+        **Builds the header for data_bytes bytes of samples.**
+
+        Return values:
+
+        * header: Bytes of the RIFF header or of the RF64 header if the file
+          is larger than 4 GiB
+
+        Author: Matthias Lederle
+        """
+        blockalign = self.channels * self.sampledepth // 8
+        riff_size = self.header_size - 8 + data_bytes
+        if riff_size <= self.riff_limit:
+            header = b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+            # placeholder for the ds64 chunk
+            header += b"JUNK" + struct.pack("<I", 28) + bytes(28)
+            data_size = data_bytes
+        else:
+            header = b"RF64" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            header += b"ds64" + struct.pack("<IQQQI", 28, riff_size,
+                                            data_bytes,
+                                            data_bytes // blockalign, 0)
+            data_size = 0xFFFFFFFF
+        header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, self.channels,
+                                        self.samplerate,
+                                        self.samplerate * blockalign,
+                                        blockalign, self.sampledepth)
+        header += b"data" + struct.pack("<I", data_size)
+        return header
+
+    def write(self, block, wait=False):
+        """
+        H2 -- write
+        ===================
+        **Hands one int16 block over to the writer thread.**
+
+        During playback the dsp thread never waits for the disk: if the
+        queue is full the block is dropped and counted. With wait=True
+        (offline rendering) the caller waits for a free place instead.
+
+        Author: Felix Pfreundtner
+        """
+        if wait is True:
+            self.blockqueue.put((block, False))
+            return
+        try:
+            self.blockqueue.put_nowait((block, False))
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    def write_converted(self, block):
+        """
+        H2 -- write_converted
+        ===================
+        **Converts block (e.g. float32 samples) into a free int16 buffer of
+        the pool and hands the buffer over to the writer thread.**
+
+        Like write() the dsp thread never waits: if all queue_blocks buffers
+        are queued the block is dropped and counted.
+
+        Author: Felix Pfreundtner
+        """
+        try:
+            buffer = self.free_buffers.pop()
+        except IndexError:
+            if self.buffer_count >= self.blockqueue.maxsize:
+                self.dropped_blocks += 1
+                return
+            buffer = np.empty(block.shape, dtype=np.int16)
+            self.buffer_count += 1
+        np.copyto(buffer, block, casting="unsafe")
+        try:
+            self.blockqueue.put_nowait((buffer, True))
+        except queue.Full:
+            self.free_buffers.append(buffer)
+            self.dropped_blocks += 1
+
+    def patch_header(self):
+        """
+        H2 -- patch_header
+        ===================
+        **Writes the current sizes into the header and flushes the file.**
+
+        Author: Matthias Lederle
+        """
+        self.file.seek(0)
+        self.file.write(self.header(self.data_bytes))
+        self.file.seek(0, 2)
+        self.file.flush()
+
+    def write_loop(self):
+        """
+        H2 -- write_loop
+        ===================
+        **Writes the blocks of the queue until close() is called.**
+
+        Author: Matthias Lederle
+        """
+        last_patch = time.perf_counter()
+        while True:
+            try:
+                entry = self.blockqueue.get(timeout=self.patch_interval)
+            except queue.Empty:
+                entry = (b"", False)
+            if entry is None:
+                break
+            block, pooled = entry
+            data = memoryview(block)
+            self.file.write(data)
+            self.data_bytes += data.nbytes
+            # the buffer can be filled again by the dsp thread
+            if pooled is True:
+                self.free_buffers.append(block)
+            if time.perf_counter() - last_patch >= self.patch_interval:
+                self.patch_header()
+                last_patch = time.perf_counter()
+
+    def close(self):
+        """
+        H2 -- close
+        ===================
+        **Writes all remaining blocks, the final header and closes the
+        file.**
+
+        Author: Matthias Lederle
+        """
+        self.blockqueue.put(None)
+        self.thread.join()
+        self.patch_header()
+        self.file.close()
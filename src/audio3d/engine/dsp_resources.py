@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import os
+
+# directory of the audio3d package with the hrtf databases, the example
+# wave files and the images (parent of the engine package)
+package_directory = os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__)))
+
+
+def resource_filename(name):
+    """
+    H2 -- resource_filename
+    ===================
+    **Returns the path of the package file name (path relative to the
+    audio3d package, e.g. "kemar/compact/H0e000a.wav").**
+
+    Replaces pkg_resources.resource_filename(), whose import alone takes
+    longer than the import of numpy.
+
+    Author: Felix Pfreundtner
+    """
+    return os.path.join(package_directory, *name.split("/"))
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+
+class RingBuffer:
+    """
+    RingBuffer
+    ************************
+    **This class is a preallocated single producer / single consumer ring
+    buffer of equally sized numpy blocks (slots).**
+
+    The slots and two counters are held in one numpy array, which can lie
+    in shared memory, so producer and consumer can be different threads or
+    different processes. The producer only changes the write counter, the
+    consumer only changes the read counter, therefore no lock is needed.
+    Data is written directly into a slot returned by write_slot() and made
+    visible with commit_write(), the consumer reads a slot returned by
+    read_slot() and frees it with commit_read().
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # header entries of the counter array
+    write_counter = 0
+    read_counter = 1
+    # producer marks that no more slots will be written
+    ended_flag = 2
+    # number of valid frames in the last written slot
+    last_frames = 3
+    # size of the header, remaining entries are reserved
+    header_size = 8
+
+    def __init__(self, slots, slot_shape, dtype=np.float32, shared=False,
+                 name=None):
+        """
+        **__init__ creates a ring buffer with slots of slot_shape. If shared
+        is True, the buffer is created in a new shared memory block, if name
+        is given, the existing shared memory block name is attached.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.slots = slots
+        self.slot_shape = tuple(slot_shape)
+        self.dtype = np.dtype(dtype)
+        header_bytes = self.header_size * 8
+        data_bytes = int(slots * np.prod(self.slot_shape)) * \
+            self.dtype.itemsize
+        self.shm = None
+        if name is not None:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # the creating process owns the block and removes it, the
+            # attaching process must not remove it at its exit
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+            buffer = self.shm.buf
+        elif shared:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=header_bytes + data_bytes)
+            buffer = self.shm.buf
+        else:
+            buffer = np.zeros((header_bytes + data_bytes, ),
+                              dtype=np.uint8).data
+        self.header = np.ndarray((self.header_size, ), dtype=np.int64,
+                                 buffer=buffer)
+        self.data = np.ndarray((slots, ) + self.slot_shape, dtype=self.dtype,
+                               buffer=buffer, offset=header_bytes)
+        if name is None:
+            self.header[:] = 0
+        self.underruns = 0
+        self.overruns = 0
+
+    @property
+    def name(self):
+        """
+        H2 -- name
+        ===================
+        **Name of the shared memory block or None for a local buffer.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.shm is None:
+            return None
+        return self.shm.name
+
+    def fill_level(self):
+        """
+        H2 -- fill_level
+        ===================
+        **Returns the number of written and not yet read slots.**
+
+        Author: Felix Pfreundtner
+        """
+        return int(self.header[self.write_counter] -
+                   self.header[self.read_counter])
+
+    def write_slot(self, count=True):
+        """
+        H2 -- write_slot
+        ===================
+        **Returns the next free slot to be filled by the producer or None if
+        the buffer is full.**
+
+        A full buffer is counted as overrun unless count is False, e.g. when
+        the producer tries again to write the same block.
+
+        Author: Felix Pfreundtner
+        """
+        write_count = self.header[self.write_counter]
+        if write_count - self.header[self.read_counter] >= self.slots:
+            if count is True:
+                self.overruns += 1
+            return None
+        return self.data[write_count % self.slots]
+
+    def commit_write(self):
+        """
+        H2 -- commit_write
+        ===================
+        **Makes the slot returned by write_slot() visible to the consumer.**
+
+        Author: Felix Pfreundtner
+        """
+        self.header[self.write_counter] += 1
+
+    def read_slot(self):
+        """
+        H2 -- read_slot
+        ===================
+        **Returns the oldest written slot or None if the buffer is empty.**
+
+        Author: Felix Pfreundtner
+        """
+        read_count = self.header[self.read_counter]
+        if self.header[self.write_counter] - read_count <= 0:
+            self.underruns += 1
+            return None
+        return self.data[read_count % self.slots]
+
+    def commit_read(self):
+        """
+        H2 -- commit_read
+        ===================
+        **Frees the slot returned by read_slot() for the producer.**
+
+        Author: Felix Pfreundtner
+        """
+        self.header[self.read_counter] += 1
+
+    def flush(self):
+        """
+        H2 -- flush
+        ===================
+        **Drops all written slots. Must be called by the consumer.**
+
+        Author: Felix Pfreundtner
+        """
+        self.header[self.read_counter] = self.header[self.write_counter]
+
+    def close(self, unlink=False):
+        """
+        H2 -- close
+        ===================
+        **Closes the shared memory block and removes it if unlink is True.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.shm is not None:
+            # numpy views have to be released before the memory is closed
+            self.header = None
+            self.data = None
+            self.shm.close()
+            if unlink:
+                self.shm.unlink()
+            self.shm = None
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import audio3d.engine.dsp_events
+import collections
+import threading
+import types
+
+# immutable snapshot of the scene: tuple of read only speaker dicts, read
+# only settings dict and a number which counts the published snapshots
+Scene = collections.namedtuple("Scene", ["sp", "settings", "version"])
+
+
+class DspState(object):
+    """
+    DspState
+    ************************
+    **This is the exchange class for all variables which are exchanged
+    between the DSP algorithm and its controller and the corresponding mutex
+    locks.**
+
+    It does not depend on Qt, so the DSP algorithm can also run headless
+    (see audio3d.engine.dsp_offline). The GUI uses its subclass
+    audio3d.gui_utils.State.
+
+    The speaker and settings variables gui_sp and gui_settings belong to the
+    gui thread. After every change the gui publishes them with
+    publish_scene() as an immutable snapshot (Scene), which replaces the
+    prior snapshot with one atomic assignment. The dsp thread takes the
+    newest snapshot at the beginning of every block and keeps it for the
+    whole block, so neither the gui nor the dsp thread ever waits for the
+    other one.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    # gui_settings which are used by configure() if they are not given
+    default_settings = {"hrtf_database": "kemar_normal_ear",
+                        "inverse_filter_active": False,
+                        "bufferblocks": 5}
+    # speaker values which are used by configure() if a source does not set
+    # them
+    default_sp = {"angle": 0, "distance": 0, "normalize": False}
+
+    def __init__(self):
+        # variables which are shared between gui and dsp algorithm
+        # at creation of the dsp object in GUI MainWindow play() the dsp thread
+        # gets access to the same instance which gui thread uses
+
+        # list with a dictionary for every speaker, which saves current
+        # azimuth angle between head and speaker position, the distance
+        # to the head, the file path to the speaker wave input file and an
+        # information whether normalize box was checked
+        self.gui_sp = []
+        # in this variable is saved how many bufferblocks are selected,
+        # whether inverse filter was activated and which hrtf database is
+        # selected
+        self.gui_settings = {}
+        # newest published snapshot of gui_sp and gui_settings, read by the
+        # dsp thread
+        self.scene = Scene((), types.MappingProxyType({}), 0)
+        # a error variable which is read from gui to show an error box
+        self.gui_error = []
+        # condition which is notified whenever dsp_stop or dsp_pause
+        # change or a block was played: dsp and playback thread wait on it
+        # instead of polling
+        self.cnd_dsp = threading.Condition()
+        # variables which shows whether dsp algorithm is currently running
+        self.dsp_run = False
+        # variables wich shows whether dsp algorithm was stopped
+        self.dsp_stop = True
+        # variables wich shows whether dsp algorithm is paused
+        self.dsp_pause = False
+        # variable with current block magnitude spectrum values for all speakers
+        self.dsp_sp_spectrum = []
+        # variable with current block magnitude spectrum values for all
+        # speakers and there corresponding current hrtfs for the left and
+        # right ear
+        self.dsp_hrtf_spectrum = []
+        # measured capture to output latency of live sources
+        self.dsp_stream_latency = {}
+        # fill level, underrun and overrun counters of the playback ring
+        # buffer of the last playback
+        self.dsp_playback_status = {}
+        # buffer depth decisions of the adaptive buffer controller
+        self.dsp_buffer_status = {}
+        # runtime performance counters of the running dsp algorithm
+        # (audio3d.engine.dsp_metrics.Metrics), read them with snapshot()
+        self.dsp_metrics = None
+        # sample position the dsp algorithm should jump to (None: no jump
+        # requested)
+        self.dsp_seek = None
+        # timestamped parameter changes which the dsp algorithm applies at
+        # their sample inside the block (audio3d.engine.dsp_events.EventQueue)
+        self.dsp_events = audio3d.engine.dsp_events.EventQueue()
+
+        # mutex for the error list and for the buttons of the gui, the dsp
+        # thread never holds them during the rendering of a block
+        self.mtx_error = threading.Lock()
+        self.mtx_run = threading.Lock()
+        self.mtx_stop = threading.Lock()
+        self.mtx_pause = threading.Lock()
+
+    @property
+    def dsp_stop(self):
+        """
+        H2 -- dsp_stop
+        ===================
+        **Whether the dsp algorithm was stopped. Setting the variable wakes
+        up the waiting dsp and playback thread.**
+        """
+        return self.dsp_stop_flag
+
+    @dsp_stop.setter
+    def dsp_stop(self, value):
+        with self.cnd_dsp:
+            self.dsp_stop_flag = value
+            self.cnd_dsp.notify_all()
+
+    @property
+    def dsp_pause(self):
+        """
+        H2 -- dsp_pause
+        ===================
+        **Whether the dsp algorithm is paused. Setting the variable wakes up
+        the waiting dsp and playback thread.**
+        """
+        return self.dsp_pause_flag
+
+    @dsp_pause.setter
+    def dsp_pause(self, value):
+        with self.cnd_dsp:
+            self.dsp_pause_flag = value
+            self.cnd_dsp.notify_all()
+
+    def wait_dsp(self, predicate, timeout=None):
+        """
+        H2 -- wait_dsp
+        ===================
+        **Blocks the calling thread until predicate() is True, the dsp
+        algorithm is stopped or timeout seconds are over.**
+
+        The thread sleeps on the condition cnd_dsp and is woken up by the
+        next stop, pause, resume or played block, so no cpu time is used
+        while waiting.
+
+        Return values:
+
+        * woken: False if timeout seconds are over
+        """
+        with self.cnd_dsp:
+            return self.cnd_dsp.wait_for(
+                lambda: self.dsp_stop_flag is True or predicate(), timeout)
+
+    def notify_dsp(self):
+        """
+        H2 -- notify_dsp
+        ===================
+        **Wakes up all threads waiting in wait_dsp(), called by the playback
+        thread after every played block.**
+        """
+        with self.cnd_dsp:
+            self.cnd_dsp.notify_all()
+
+    def configure(self, sources, settings=None):
+        """
+        H2 -- configure
+        ===================
+        **Sets the speakers and settings without gui: sources is a list of
+        speaker dicts (at least "path"), settings a dict of gui_settings.
+        Missing values are taken from default_sp and default_settings.**
+
+        Return values:
+
+        * state: The DspState object itself, ready for the Dsp object
+        """
+        self.gui_sp = []
+        for source in sources:
+            sp = dict(self.default_sp)
+            sp.update(source)
+            self.gui_sp.append(sp)
+        self.gui_settings = dict(self.default_settings)
+        if settings is not None:
+            self.gui_settings.update(settings)
+        self.dsp_stop = False
+        return self
+
+    def switch_stop_playback(self):
+        """
+        H2 -- switch_stop_playback
+        ===================
+        **This function is called from the MainWindow Play/Stop button and
+        remembers the state and transfers to a DSP command.**
+        """
+        self.mtx_stop.acquire()
+        if self.dsp_stop is False:
+            self.dsp_stop = True
+        else:
+            self.dsp_stop = False
+        self.mtx_stop.release()
+
+    def switch_pause_playback(self):
+        """
+        H2 -- switch_pause_playback
+        ===================
+        **This function is called from the MainWindow Pause button and
+        remembers the state and transfers to respective DSP command.**
+        """
+        # start pause
+        self.mtx_pause.acquire()
+        if self.dsp_pause is False:
+            self.dsp_pause = True
+        # end pause
+        else:
+            self.dsp_pause = False
+        self.mtx_pause.release()
+
+    def seek_playback(self, sample):
+        """
+        H2 -- seek_playback
+        ===================
+        **This function requests a jump of the playback to sample, which is
+        done by the DSP before its next block.**
+        """
+        # a single assignment: the dsp thread reads it at the next block
+        self.dsp_seek = int(sample)
+
+    def publish_scene(self):
+        """
+        H2 -- publish_scene
+        ===================
+        **Publishes the current gui_sp and gui_settings as a new immutable
+        snapshot for the dsp thread. Called by the gui after every change.**
+
+        The dicts are copied, so later changes of gui_sp and gui_settings do
+        not change the snapshot the dsp thread is rendering with.
+
+        Return values:
+
+        * scene: The published snapshot
+        """
+        scene = Scene(tuple(types.MappingProxyType(dict(sp)) for sp in
+                            self.gui_sp),
+                      types.MappingProxyType(dict(self.gui_settings)),
+                      self.scene.version + 1)
+        # publish with one atomic assignment
+        self.scene = scene
+        return scene
+
+    def send_error(self, message):
+        """
+        H2 -- send_error
+        ===================
+        **The function can be used by the DSP classes to create case-specific
+        error messages.**
+        """
+
+        self.mtx_error.acquire()
+        if message not in self.gui_error:
+            self.gui_error.append(message)
+        self.mtx_error.release()
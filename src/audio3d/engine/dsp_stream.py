@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import numpy as np
+import threading
+import collections
+import time
+import select
+import stat
+import sys
+import os
+
+
+class JitterBuffer:
+    """
+    JitterBuffer
+    ************************
+    **This class buffers the samples of a live source between the capture
+    thread and the DSP thread.**
+
+    The capture thread writes chunks of any size, the DSP thread reads
+    blocks of hopsize samples. Reading starts only when prefill samples
+    are buffered, so an irregular arrival of the chunks does not lead to
+    gaps in the output. If the buffer runs empty it returns zeros and waits
+    for prefill samples again, if it overflows the oldest samples are
+    dropped to keep the latency bounded. For every chunk the capture time
+    is remembered to measure the capture to output latency.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, capacity, prefill):
+        """
+        **__init__ creates an empty buffer for capacity samples.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.capacity = capacity
+        self.prefill = prefill
+        self.buffer = np.zeros((capacity, ), dtype=np.float32)
+        # total number of written and read samples
+        self.written = 0
+        self.read = 0
+        # capture time of every chunk: (sample number after chunk, time)
+        self.capture_times = collections.deque()
+        # whether prefill samples have to be buffered before reading
+        self.prefilling = True
+        # whether the writer will not deliver any more samples
+        self.ended = False
+        self.underruns = 0
+        self.overflows = 0
+        self.mtx = threading.Lock()
+
+    def write(self, samples, capture_time):
+        """
+        H2 -- write
+        ===================
+        **Appends a chunk of captured samples to the buffer.**
+
+        Author: Felix Pfreundtner
+        """
+        samples = samples[-self.capacity:]
+        self.mtx.acquire()
+        # drop the oldest samples if the buffer would overflow
+        overflow = self.written - self.read + samples.shape[0] - \
+            self.capacity
+        if overflow > 0:
+            self.read += overflow
+            self.overflows += 1
+        position = self.written % self.capacity
+        first_part = min(samples.shape[0], self.capacity - position)
+        self.buffer[position:position + first_part] = samples[:first_part]
+        self.buffer[:samples.shape[0] - first_part] = samples[first_part:]
+        self.written += samples.shape[0]
+        self.capture_times.append((self.written, capture_time))
+        self.mtx.release()
+
+    def end(self):
+        """
+        H2 -- end
+        ===================
+        **Marks that the writer will not deliver any more samples.**
+
+        Author: Felix Pfreundtner
+        """
+        self.mtx.acquire()
+        self.ended = True
+        self.mtx.release()
+
+    def read_block(self, block):
+        """
+        H2 -- read_block
+        ===================
+        **Reads len(block) samples into the array block.**
+
+        Return values:
+
+        * continue_input: False if the writer ended and all samples have
+          been read
+        * capture_time: Capture time of the newest read sample or None if
+          only zeros were read
+
+        Author: Felix Pfreundtner
+        """
+        blocksize = block.shape[0]
+        self.mtx.acquire()
+        available = self.written - self.read
+        if self.prefilling and (available >= self.prefill or self.ended):
+            self.prefilling = False
+        if self.prefilling or available == 0:
+            block[:] = 0
+            if not self.prefilling and not self.ended:
+                # buffer ran empty: count underrun and fill again
+                self.underruns += 1
+                self.prefilling = True
+            continue_input = not self.ended
+            self.mtx.release()
+            return continue_input, None
+        # at the end of the stream the last block is zeropadded
+        readsize = min(blocksize, available)
+        if readsize < blocksize and not self.ended:
+            block[:] = 0
+            self.underruns += 1
+            self.prefilling = True
+            self.mtx.release()
+            return True, None
+        position = self.read % self.capacity
+        first_part = min(readsize, self.capacity - position)
+        block[:first_part] = self.buffer[position:position + first_part]
+        block[first_part:readsize] = self.buffer[:readsize - first_part]
+        block[readsize:] = 0
+        self.read += readsize
+        # find capture time of the newest read sample
+        capture_time = None
+        while len(self.capture_times) > 0 and \
+                self.capture_times[0][0] <= self.read:
+            capture_time = self.capture_times.popleft()[1]
+        if capture_time is None and len(self.capture_times) > 0:
+            capture_time = self.capture_times[0][1]
+        continue_input = not (self.ended and self.written == self.read)
+        self.mtx.release()
+        return continue_input, capture_time
+
+
+class StreamSource:
+    """
+    StreamSource
+    ************************
+    **Base class of all speaker sources which deliver their samples live
+    block by block and have no known total length.**
+
+    A capture thread writes the samples into a JitterBuffer which is read
+    by DspIn.get_sp_block() with hopsize samples per block. The samples have
+    to be mono 16-bit integers with the samplerate of the dsp algorithm.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, samplerate, hopsize, jitter_blocks=4):
+        """
+        **__init__ creates the jitter buffer of the source.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.samplerate = samplerate
+        self.hopsize = hopsize
+        # buffer one second or at least 4 times the prefill
+        self.jitterbuffer = JitterBuffer(
+            max(samplerate, 4 * jitter_blocks * hopsize),
+            jitter_blocks * hopsize)
+        self.capture_thread = None
+        self.running = False
+
+    @staticmethod
+    def is_stream_path(path):
+        """
+        H2 -- is_stream_path
+        ===================
+        **Checks whether a speaker path describes a live source.**
+
+        Live sources are "portaudio" or "portaudio:<input device index>" for
+        a PortAudio input device, "-" or "stdin" for the standard input and
+        the path of a named pipe (FIFO).
+
+        Author: Matthias Lederle
+        """
+        if path in ("-", "stdin") or path.startswith("portaudio"):
+            return True
+        try:
+            return stat.S_ISFIFO(os.stat(path).st_mode)
+        except OSError:
+            return False
+
+    @staticmethod
+    def from_path(path, samplerate, hopsize, jitter_blocks=4):
+        """
+        H2 -- from_path
+        ===================
+        **Creates the fitting live source for a speaker path.**
+
+        Author: Matthias Lederle
+        """
+        if path.startswith("portaudio"):
+            device = path.partition(":")[2]
+            if device == "":
+                device = None
+            else:
+                device = int(device)
+            return PortAudioSource(samplerate, hopsize, jitter_blocks,
+                                   device)
+        return PipeSource(samplerate, hopsize, jitter_blocks, path)
+
+    def start(self):
+        """
+        H2 -- start
+        ===================
+        **Starts the capture thread of the source.**
+
+        Author: Matthias Lederle
+        """
+        self.running = True
+        self.capture_thread = threading.Thread(target=self.capture)
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
+
+    def stop(self):
+        """
+        H2 -- stop
+        ===================
+        **Stops the capture of the source.**
+
+        Author: Matthias Lederle
+        """
+        self.running = False
+
+    def capture(self):
+        """
+        H2 -- capture
+        ===================
+        **Capture loop which has to be implemented by every source.**
+
+        Author: Matthias Lederle
+        """
+        raise NotImplementedError
+
+    def read_hop(self, block):
+        """
+        H2 -- read_hop
+        ===================
+        **Reads the next hopsize samples of the source into block.**
+
+        Return values:
+
+        * continue_input: False if the source ended
+        * capture_time: time.perf_counter() time, at which the newest sample
+          was captured or None
+
+        Author: Matthias Lederle
+        """
+        return self.jitterbuffer.read_block(block)
+
+
+class PipeSource(StreamSource):
+    """
+    PipeSource
+    ************************
+    **Live source which reads raw mono 16-bit little endian samples from the
+    standard input or a named pipe.**
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, samplerate, hopsize, jitter_blocks, path):
+        """
+        **__init__ remembers which pipe has to be read.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        super(PipeSource, self).__init__(samplerate, hopsize, jitter_blocks)
+        self.path = path
+
+    def capture(self):
+        """
+        H2 -- capture
+        ===================
+        **Reads the pipe in blocks of hopsize samples until the writing
+        process closes the pipe or the source is stopped.**
+
+        The pipe is polled with select() and a timeout of 0.1 s, so a stopped
+        source leaves the loop and closes its pipe even if the writing
+        process neither writes nor closes it. A named pipe is opened non
+        blocking for the same reason. select() does not support pipes on
+        Windows, there the standard input is read blocking.
+
+        Author: Matthias Lederle
+        """
+        stdin = self.path in ("-", "stdin")
+        if stdin is True:
+            fd = sys.stdin.fileno()
+        else:
+            fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        poll = sys.platform != "win32"
+        rest = b""
+        while self.running:
+            if poll is True:
+                readable, _, _ = select.select([fd], [], [], 0.1)
+                if len(readable) == 0:
+                    continue
+            try:
+                data = os.read(fd, self.hopsize * 2)
+            except BlockingIOError:
+                continue
+            if len(data) == 0:
+                break
+            # keep odd byte of an incomplete sample for the next read
+            data = rest + data
+            samplebytes = len(data) - len(data) % 2
+            rest = data[samplebytes:]
+            self.jitterbuffer.write(
+                np.frombuffer(data[:samplebytes], dtype="<i2").astype(
+                    np.float32), time.perf_counter())
+        if stdin is False:
+            os.close(fd)
+        self.jitterbuffer.end()
+
+
+class PortAudioSource(StreamSource):
+    """
+    PortAudioSource
+    ************************
+    **Live source which reads a PortAudio input device (e.g. a
+    microphone).**
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, samplerate, hopsize, jitter_blocks, device=None):
+        """
+        **__init__ remembers which input device has to be opened.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        super(PortAudioSource, self).__init__(samplerate, hopsize,
+                                              jitter_blocks)
+        self.device = device
+        self.input_latency = 0
+        # PortAudio callback return flags, set when the stream is opened
+        self.pa_continue = 0
+        self.pa_complete = 1
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """
+        H2 -- callback
+        ===================
+        **Is called by PortAudio with every captured block and writes it
+        into the jitter buffer.**
+
+        Author: Matthias Lederle
+        """
+        self.jitterbuffer.write(
+            np.frombuffer(in_data, dtype=np.int16).astype(np.float32),
+            time.perf_counter() - self.input_latency)
+        if self.running:
+            return None, self.pa_continue
+        return None, self.pa_complete
+
+    def capture(self):
+        """
+        H2 -- capture
+        ===================
+        **Opens the PortAudio input stream and keeps it open until the
+        source is stopped.**
+
+        Author: Matthias Lederle
+        """
+        import pyaudio
+        self.pa_continue = pyaudio.paContinue
+        self.pa_complete = pyaudio.paComplete
+        pa = pyaudio.PyAudio()
+        audiostream = pa.open(format=pyaudio.paInt16,
+                              channels=1,
+                              rate=self.samplerate,
+                              input=True,
+                              input_device_index=self.device,
+                              frames_per_buffer=self.hopsize,
+                              stream_callback=self.callback)
+        self.input_latency = audiostream.get_input_latency()
+        audiostream.start_stream()
+        while self.running and audiostream.is_active():
+            time.sleep(0.1)
+        audiostream.stop_stream()
+        audiostream.close()
+        pa.terminate()
+        self.jitterbuffer.end()
+
+
+class StreamLatency:
+    """
+    StreamLatency
+    ************************
+    **This class measures the latency between the capture of live source
+    samples and their playback.**
+
+    The DSP thread marks every block which contains live samples with their
+    capture time, the PortAudio callback measures the latency when the
+    block is played.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self):
+        """
+        **__init__ creates empty latency statistics.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        # (block number, capture time) of all not yet played blocks
+        self.block_capture_time = collections.deque()
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+        self.last = 0
+
+    def mark_block(self, blocknumber, capture_time):
+        """
+        H2 -- mark_block
+        ===================
+        **Remembers the capture time of the newest live sample in block
+        blocknumber.**
+
+        Author: Felix Pfreundtner
+        """
+        self.block_capture_time.append((blocknumber, capture_time))
+
+    def played_block(self, blocknumber, output_latency=0):
+        """
+        H2 -- played_block
+        ===================
+        **Measures the latency of block blocknumber which is played now and
+        reaches the speakers after output_latency seconds.**
+
+        Author: Felix Pfreundtner
+        """
+        now = time.perf_counter()
+        while len(self.block_capture_time) > 0 and \
+                self.block_capture_time[0][0] <= blocknumber:
+            marked_block, capture_time = self.block_capture_time.popleft()
+            if marked_block == blocknumber:
+                self.last = now - capture_time + output_latency
+                self.count += 1
+                self.sum += self.last
+                self.max = max(self.max, self.last)
+
+    def report(self):
+        """
+        H2 -- report
+        ===================
+        **Returns the latency statistics in seconds.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.count == 0:
+            return {"count": 0, "mean": 0, "max": 0, "last": 0}
+        return {"count": self.count, "mean": self.sum / self.count,
+                "max": self.max, "last": self.last}
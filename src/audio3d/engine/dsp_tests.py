@@ -0,0 +1,1703 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import unittest
+import audio3d.engine.dsp
+import audio3d.engine.dsp_in
+import audio3d.engine.dsp_out
+import audio3d.engine.dsp_analysis
+import audio3d.engine.dsp_stream
+import audio3d.engine.dsp_ring
+import audio3d.engine.dsp_decode
+import audio3d.engine.dsp_buffer
+import audio3d.engine.dsp_metrics
+import audio3d.engine.dsp_record
+import audio3d.engine.dsp_offline
+import audio3d.engine.dsp_batch
+import audio3d.engine.dsp_state
+import audio3d.engine.dsp_benchmarks
+import audio3d.engine.dsp_async
+import audio3d.engine.dsp_events
+import audio3d.engine.dsp_resources
+import numpy as np
+import scipy.io.wavfile
+import asyncio
+import copy
+import tempfile
+import time
+import os
+
+
+class DspTests(unittest.TestCase):
+    """
+    H1 -- DspTests
+    ************************
+    **Testclass for all Dsp-Classes (Dsp, DspIn, DspOut) of the project.**
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, *args, **kwargs):
+        # calling the constructor of the super class
+        super(DspTests, self).__init__(*args, **kwargs)
+        # initialize the Qt free state of the dsp algorithm, so the tests
+        # run without PySide
+        self.state = audio3d.engine.dsp_state.DspState()
+        resource_filename = audio3d.engine.dsp_resources.resource_filename
+        # modify state like the GUI
+        self.state.gui_sp = []
+        self.state.gui_sp.append({"angle": 90, "distance": 0, "path":
+                                  resource_filename(
+                                      "audio_in/Sine_1kHz_(44.1,1,16).wav"),
+                                  "normalize": False})
+
+        self.state.gui_sp.append({"angle": 10, "distance": 1, "path":
+                                  resource_filename(
+                                      "audio_in/Rhythm_Guitar_1.wav"),
+                                  "normalize": True})
+
+        self.state.gui_sp.append({"angle": 120, "distance": 1, "path":
+                                  resource_filename("audio_in/Drums.wav"),
+                                  "normalize": True})
+
+        # same speaker input as already speaker 0: check whether there might
+        # be redundancy problems in the code
+        self.state.gui_sp.append({"angle": 90, "distance": 0, "path":
+                                  resource_filename(
+                                      "audio_in/Sine_1kHz_(44.1,1,16).wav"),
+                                  "normalize": True})
+
+        self.state.gui_settings = {"hrtf_database": "kemar_normal_ear",
+                                   "inverse_filter_active": False,
+                                   "bufferblocks": 5}
+
+        self.state.gui_stop = False
+        self.state.gui_pause = False
+        self.dsp_obj = audio3d.engine.dsp.Dsp(self.state)
+
+    def test_rnd_int(self):
+        """
+        H2 -- test_rnd_int
+        ===================
+        Tests rnd for one particular number.
+
+        Author: Matthias Lederle
+        """
+        val = 1.9
+        sol = 2
+        res = self.dsp_obj.dspin_obj.rnd(val)
+        error_msg = "test_rnd_int failed!"
+        self.assertEqual(res, sol, msg=error_msg)
+
+    def test_rnd(self):
+        """
+        H2 -- test_rnd
+        ===================
+        **Tests rnd for a list of numbers at the same time.**
+
+        Author: Matthias Lederle
+        """
+        i = 0
+        value = [2.55, 7.9, (2 / 3), 0.5, 0.00001, 500.1, -80.1, -1.4142, -9.5]
+        res = [None] * len(value)
+        sol = [3, 8, 1, 1, 0, 500, -80, -1, -10]
+        # value = []
+        # value[0] = 2
+        # sol = 2
+        while i < len(value):
+            # res[i] = res.append(self.dspin_obj.rnd(value[i]))
+            res[i] = self.dsp_obj.dspin_obj.rnd(value[i])
+            i += 1
+        error_msg = "test_rnd failed!"
+        self.assertListEqual(res, sol, msg=error_msg)
+
+    # @brief Tests equality of the values at position 2 and 200 of the
+    #  hamming-window.
+    def test_hann_window(self):
+        """
+        H2 -- test_hann_window
+        ===================
+        Tests equality of the values at position 2 and 200 of the
+        hamming-window.
+
+        Author: Matthias Lederle
+        """
+        sol_hannwin_2 = 0.00014997
+        sol_hannwin_200 = 0.88477
+        res = \
+            self.dsp_obj.dspin_obj.build_hann_window(sp_blocksize=513)
+        errmsg = "Hanning Window not calculated correctly"
+        self.assertAlmostEqual(res[2], sol_hannwin_2, 5, msg=errmsg)
+        self.assertAlmostEqual(res[200], sol_hannwin_200, 5, msg=errmsg)
+
+    # @brief Tests get_block_param by comparing two lists.
+    def test_get_block_param(self):
+        """
+        H2 -- test_get_block_param
+        ===================
+        **Tests get_block_param by comparing two lists.**
+
+        Author: Matthias Lederle
+        """
+        sol = [512, 0.011609977324263039, 0.5, 256]
+        res = [None] * 3
+        res[0: 3] = self.dsp_obj.dspin_obj.get_block_param()
+        errmsg = "Function get_block_param (in DspIn) doesn't work properly"
+        self.assertListEqual(res, sol, msg=errmsg)
+
+    def test_init_set_block_begin_end_1(self):
+        """
+        H2 -- test_init_set_block_begin_end_1
+        ===================
+        **Compare init_set_block_begin_end() output with correct values for
+        initialization of block_begin_end.**
+
+        Author: Felix Pfreundtner
+        """
+        #
+        # initialize -> set back begin end back about one iteration
+        # moving size of one step (each iteration)
+        step = self.dsp_obj.dspin_obj.hopsize
+        result_correct = [0 - step, self.dsp_obj.dspin_obj.sp_blocksize - step]
+        result_test = self.dsp_obj.dspin_obj.init_set_block_begin_end()
+        errmsg = "block begin end intialization does not have correct " \
+                 "position and size"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_init_set_block_begin_end_2(self):
+        """
+        H2 -- test_init_set_block_begin_end_2
+        ===================
+        **Tests init_set_block_begin_end by comparing two lists.**
+
+        Author: Matthias Lederle
+        """
+        res = self.dsp_obj.dspin_obj.init_set_block_begin_end()
+        errmsg = "The entries in init_block_begin_end are not symmetric  " \
+                 "to 0"
+        self.assertTrue(abs(res[0]) == abs(res[1]), msg=errmsg)
+
+    def test_set_block_begin_end(self):
+        """
+        H2 -- test_set_block_begin_end
+        ===================
+        **Compare set_block_begin_end() output with correct values for
+        the first run() iterations of dsp algorithm.**
+
+        Author: Felix Pfreundtner
+        """
+        # step between each read block array in position samples is
+        step = self.dsp_obj.dspin_obj.hopsize
+        result_correct = [[0, self.dsp_obj.dspin_obj.sp_blocksize],
+                          [0 + step * 1, self.dsp_obj.dspin_obj.sp_blocksize +
+                           step * 1], [0 + step * 2,
+                                       self.dsp_obj.dspin_obj.sp_blocksize +
+                                       step * 2]]
+        result_test = []
+        # run 3 iterations
+        for blockcounter in range(3):
+            # set position
+            self.dsp_obj.dspin_obj.set_block_begin_end()
+            temp = self.dsp_obj.dspin_obj.block_begin_end
+            result_test.append(copy.deepcopy(temp))
+
+        # set self.block_begin_end back to initialize value
+        self.dsp_obj.dspin_obj.init_set_block_begin_end()
+
+        errmsg = "first block iterations do not have correct position and " \
+                 "size"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+    # @brief Tests the values of init_block_begin_end on symmetry to 0
+
+    def test_set_block_begin_end(self):
+        """
+        H2 -- test_set-block_begin_end
+        ===================
+        **Tests the set_block_begin_end method for correctness.**
+
+        Author: Matthias Lederle
+        """
+        truelist = []
+        i = 1
+        block_begin_end = self.dsp_obj.dspin_obj.block_begin_end
+        while i < 10:
+            # Between ##### and ##### has to be the same code as in
+            # set_block_begin_end-method
+            #####
+            block_begin_end[0] += int(
+                self.dsp_obj.dspin_obj.sp_blocksize *
+                (1 - self.dsp_obj.dspin_obj.overlap))
+            block_begin_end[1] += int(
+                self.dsp_obj.dspin_obj.sp_blocksize *
+                (1 - self.dsp_obj.dspin_obj.overlap))
+            #####
+            if block_begin_end[1] - block_begin_end[0] == \
+                    self.dsp_obj.dspin_obj.sp_blocksize:
+                bool = True
+            else:
+                bool = False
+            errmsg = "set_block_begin_end does not work properly"
+            truelist.append(bool)
+            i += 1
+        self.assertTrue(truelist, msg=errmsg)
+
+    def test_init_read_sp(self):
+        """
+        H2 -- test_init_read_sp
+        ===================
+        **Test whether init_read_sp() gives out the sample samplerate as
+        scipy.io.wavfile.read()**
+
+        Author: Felix Pfreundtner
+        """
+
+        result_correct = []
+        result_test = []
+        # for all speakers in self.state.gui_sp
+        for sp in range(len(self.state.gui_sp)):
+            # get sample rate values produced by scipy.io.wavfile.read()
+            temp, _ = \
+                scipy.io.wavfile.read(self.state.gui_sp[sp]["path"])
+            result_correct.append(temp)
+            # get sample rate values produced by init_read_sp()
+            result_test.append(self.dsp_obj.dspin_obj.sp_param[sp][1])
+        errmsg = "wrong samplerate produced by init_read_sp()"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_read_sp(self):
+        """
+        H2 -- test_read_sp
+        ===================
+        **Compare get_sp-method to scipy-method-results.**
+
+        Author: Matthias Lederle
+        """
+        sp = 1
+        scipy_sp_input = {}
+        scipy_sp_input[sp] = np.zeros((220672, ), dtype=np.int16)
+        scipy_sp_input_raw = {}
+        for sp in range(len(self.state.gui_sp)):
+            _, scipy_sp_input_raw[sp] = \
+                scipy.io.wavfile.read(self.state.gui_sp[sp]["path"])
+            lenarray = len(scipy_sp_input_raw[sp])
+            # append zeros to scipy_sp_dict_raw to reach that output is
+            # divideable by sp_blocksize
+            if lenarray % self.dsp_obj.dspin_obj.sp_blocksize != 0:
+                scipy_sp_input[sp] = \
+                    np.zeros((lenarray +
+                              self.dsp_obj.dspin_obj.sp_blocksize -
+                              lenarray %
+                              self.dsp_obj.dspin_obj.sp_blocksize, ),
+                             dtype=np.int16)
+                scipy_sp_input[sp][0:lenarray, ] = scipy_sp_input_raw[sp]
+            else:
+                scipy_sp_input[sp] = scipy_sp_input_raw[sp]
+        sol = scipy_sp_input
+        res = self.dsp_obj.dspin_obj.read_sp()
+        errmsg = "get_sp doesn't get same values as scipy method"
+        checklist = [0, 1, 50, 1000, 20000, 100000, 200000, 220671]
+        truelist = []
+        i = 0
+        while i < len(checklist):
+            if sol[0][checklist[i]] == res[0][checklist[i]]:
+                bool = True
+            else:
+                bool = False
+            truelist.append(bool)
+            i += 1
+        self.assertTrue(truelist, msg=errmsg)
+
+    def test_hrtf_blocksize(self):
+        """
+        H2 -- test_hrtf_size
+        ===================
+        **Test whether hrtf_blocksize is calculated correct by dsp algorithm**
+
+        Author: Felix Pfreundtner
+        """
+
+        # Manually set correct standard HRTF Size in Samples
+        result_correct = 513
+        result_test = self.dsp_obj.dspin_obj.hrtf_blocksize
+
+        errmsg = "wrong hrtf block size calculation"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_fft_blocksize(self):
+        """
+        H2 -- test_fft_blocksize
+        ===================
+        **Test whether fft_blocksize is calculated correct by dsp algorithm**
+
+        Author: Felix Pfreundtner
+        """
+
+        # Manually set correct standard FFT Block Size in Samples
+        result_correct = 1024
+        result_test = self.dsp_obj.dspin_obj.fft_blocksize
+
+        errmsg = "wrong fft block size calculation"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_sp_blocksize(self):
+        """
+        H2 -- test_sp_blocksize
+        ===================
+        **Test whether sp_blocksize is calculated correct by dsp algorithm**
+
+        Author: Felix Pfreundtner
+        """
+
+        # Manually set correct standard Speaker Block Size in Samples
+        result_correct = self.dsp_obj.dspin_obj.fft_blocksize + 1 - \
+            self.dsp_obj.dspin_obj.hrtf_blocksize
+        result_test = self.dsp_obj.dspin_obj.sp_blocksize
+
+        errmsg = "wrong speaker block size calculation"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_overlap(self):
+        """
+        H2 -- test_overlap
+        ===================
+        **Test whether overlap is calculated correct by dsp algorithm**
+
+        Author: Felix Pfreundtner
+        """
+
+        # Manually set correct standard Overlap in decimal value
+        result_correct = 0.5
+        result_test = self.dsp_obj.dspin_obj.overlap
+
+        errmsg = "wrong speaker block size calculation"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_hopsize(self):
+        """
+        H2 -- test_hopsize
+        ===================
+        **Check whether hopsize is calculated correct by dsp algorithm**
+
+        Author: Felix Pfreundtner
+        """
+
+        # Manually set correct standard Hopsize in decimal value
+        result_correct = \
+            self.dsp_obj.dspin_obj.overlap * \
+            self.dsp_obj.dspin_obj.sp_blocksize
+
+        result_test = self.dsp_obj.dspin_obj.hopsize
+
+        errmsg = "wrong speaker block size calculation"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_kemar_inverse_filter(self):
+        """
+        H2 -- test_kemar_inverse_filter
+        ===================
+        **Test whether a deactivated kemar compact inverse measurement
+        speaker filter in gui leads to an filter full of zeros in dsp
+        algorithm ( kemar compact already includes the inverse speaker
+        filter)**
+
+        Author: Felix Pfreundtner
+        """
+
+        # model activated kemar filter in gu
+        self.state.gui_settings["inverse_filter_active"] = False
+        self.state.gui_settings["hrtf_database"] = "kemar_compact"
+
+        # create new dsp_in object with modelled gui state
+        dsp_in_test_obj = audio3d.engine.dsp_in.DspIn(self.state)
+        result_test = dsp_in_test_obj.kemar_inverse_filter
+
+        errmsg = "Inverse Filter just holds zeros"
+        self.assertEqual(np.amax(result_test), 0, msg=errmsg)
+
+    def test_read_hrtf_database_defaults(self):
+        """
+        H2 -- test_read_hrtf_database_defaults
+        ===================
+        **Test whether read_hrtf_database without arguments reads the hrtf
+        database of gui_settings with its real hrtf blocksize**
+
+        Author: Felix Pfreundtner
+        """
+        result = True
+        for database in ["kemar_normal_ear", "kemar_compact"]:
+            self.state.gui_settings["hrtf_database"] = database
+            dsp_in_test_obj = audio3d.engine.dsp_in.DspIn(self.state)
+            hrtf_database = dsp_in_test_obj.read_hrtf_database()
+            result = result and np.array_equal(
+                hrtf_database, dsp_in_test_obj.hrtf_database)
+
+        errmsg = "read_hrtf_database with defaults reads a wrong database"
+        self.assertTrue(result, msg=errmsg)
+
+    def test_get_sp_block_in_file(self):
+        """
+        H2 -- test_get_sp_block_in_file
+        ===================
+        **Test whether the read in block size of a speaker for different
+        positions in the the whole sp file is correct**
+
+        Author: Felix Pfreundtner
+        """
+        iteration_number = 5
+        result_correct = self.dsp_obj.spn * iteration_number * \
+            self.dsp_obj.dspin_obj.sp_blocksize
+        result_test = 0
+        # run 5 iterations
+        for blockcounter in range(iteration_number):
+            # set position in speaker file
+            self.dsp_obj.dspin_obj.set_block_begin_end()
+            for sp in range(self.dsp_obj.spn):
+                # get block at position
+                _ = self.dsp_obj.dspin_obj.get_sp_block(sp)  # flake8: noqa
+                result_test += len(self.dsp_obj.dspin_obj.sp_block[sp])
+
+        # set self.block_begin_end back to initialize value
+        self.dsp_obj.dspin_obj.init_set_block_begin_end()
+
+        errmsg = "Wrong block sizes was read in"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_get_sp_block_1_out_of_file(self):
+        """
+        H2 -- test_get_sp_block_1_out_of_file
+        ===================
+        **Test whether sp block is zeropadded to sp_blocksize when a block
+        position higher than samplenumber (sp_param[sp][0]) is adressed**
+
+        Author: Felix Pfreundtner
+        """
+        result = True
+        for sp in range(self.dsp_obj.spn):
+            # set first sample which needs to be read in as the last sample in
+            # the wave signal of the speaker
+            self.dsp_obj.dspin_obj.block_begin_end[0] = \
+                self.dsp_obj.dspin_obj.sp_param[sp][0] - 1
+            # last samples which needs to be read in is out of the wave file
+            self.dsp_obj.dspin_obj.block_begin_end[1] =  \
+                self.dsp_obj.dspin_obj.block_begin_end[0] + \
+                self.dsp_obj.dspin_obj.sp_blocksize
+
+            self.dsp_obj.dspin_obj.get_sp_block(sp)
+            length = len(self.dsp_obj.dspin_obj.sp_block[sp])
+            if length < self.dsp_obj.dspin_obj.sp_blocksize:
+                result = False
+                break
+
+        # set self.block_begin_end back to initialize value
+        self.dsp_obj.dspin_obj.init_set_block_begin_end()
+
+        errmsg = "Wrong block sizes was read in"
+        self.assertTrue(result, msg=errmsg)
+
+    def test_seek_loop(self):
+        """
+        H2 -- test_seek_loop
+        ===================
+        **Test whether a seek reads the block at the new position and whether
+        a looping speaker continues at the beginning of its file**
+
+        Author: Matthias Lederle
+        """
+        dspin_obj = self.dsp_obj.dspin_obj
+        samplenumber = dspin_obj.sp_param[0][0]
+        # seek in a file which is not looping
+        dspin_obj.seek(1000)
+        dspin_obj.set_block_begin_end()
+        dspin_obj.get_sp_block(0)
+        errmsg = "Wrong block was read in after seek"
+        self.assertTrue(np.array_equal(
+            dspin_obj.sp_block[0],
+            dspin_obj.sp_input[0][1000:1000 + dspin_obj.sp_blocksize]),
+            msg=errmsg)
+        # seek shortly before the end of a looping file
+        dspin_obj.sp_loop[0] = True
+        dspin_obj.seek(samplenumber - 100)
+        dspin_obj.set_block_begin_end()
+        continue_input = dspin_obj.get_sp_block(0)
+        dspin_obj.sp_loop[0] = False
+        # set self.block_begin_end back to initialize value
+        dspin_obj.block_begin_end = dspin_obj.init_set_block_begin_end()
+
+        errmsg = "Looping file did not continue at its beginning"
+        self.assertTrue(continue_input, msg=errmsg)
+        self.assertTrue(np.array_equal(
+            dspin_obj.sp_block[0],
+            np.concatenate((dspin_obj.sp_input[0][samplenumber - 100:
+                                                  samplenumber],
+                            dspin_obj.sp_input[0][
+                                0:dspin_obj.sp_blocksize - 100]))),
+            msg=errmsg)
+
+    def test_sp_schedule(self):
+        """
+        H2 -- test_sp_schedule
+        ===================
+        **Test whether a speaker with a later start, an offset and a length
+        reads the correct samples of its file on the common output clock**
+
+        Author: Matthias Lederle
+        """
+        dspin_obj = self.dsp_obj.dspin_obj
+        dspin_obj.sp_start[0] = 1000
+        dspin_obj.sp_offset[0] = 300
+        dspin_obj.sp_length[0] = 400
+        # block [0, 512] lies before the start of the speaker
+        dspin_obj.seek(0)
+        dspin_obj.set_block_begin_end()
+        active = dspin_obj.sp_active(0)
+        # block [800, 1312]: speaker starts at the 200th sample of the block
+        dspin_obj.seek(800)
+        dspin_obj.set_block_begin_end()
+        continue_input = dspin_obj.get_sp_block(0)
+        block = dspin_obj.sp_block[0].copy()
+        # block [1200, 1712]: speaker ends at the 200th sample of the block
+        dspin_obj.seek(1200)
+        dspin_obj.set_block_begin_end()
+        continue_input_end = dspin_obj.get_sp_block(0)
+        block_end = dspin_obj.sp_block[0].copy()
+        dspin_obj.sp_start[0] = 0
+        dspin_obj.sp_offset[0] = 0
+        dspin_obj.sp_length[0] = None
+        # set self.block_begin_end back to initialize value
+        dspin_obj.block_begin_end = dspin_obj.init_set_block_begin_end()
+
+        errmsg = "Speaker schedule was not applied"
+        self.assertFalse(active, msg=errmsg)
+        self.assertTrue(continue_input, msg=errmsg)
+        self.assertFalse(continue_input_end, msg=errmsg)
+        self.assertTrue(np.array_equal(block[0:200], np.zeros(200)),
+                        msg=errmsg)
+        self.assertTrue(np.array_equal(
+            block[200:], dspin_obj.sp_input[0][300:300 +
+                                               dspin_obj.sp_blocksize - 200]),
+            msg=errmsg)
+        self.assertTrue(np.array_equal(
+            block_end[0:200], dspin_obj.sp_input[0][500:700]), msg=errmsg)
+        self.assertTrue(np.array_equal(block_end[200:], np.zeros(
+            dspin_obj.sp_blocksize - 200)), msg=errmsg)
+
+    def test_normalize(self):
+        """
+        H2 -- test_normalize
+        ===================
+        **Test whether the speaker blocks are correctly normalized to
+        maximum int 16 amplitude**
+
+        Author: Felix Pfreundtner
+        """
+        maximum_int16_amplitude = 32767
+        iteration_number = 5
+        result_test = True
+        # run 5 iterations
+        for blockcounter in range(iteration_number):
+            # set position in speaker file
+            self.dsp_obj.dspin_obj.set_block_begin_end()
+            for sp in range(self.dsp_obj.spn):
+                # set gui normalize state to true and publish it to the dsp
+                self.state.gui_sp[sp]["normalize"] = True
+                self.state.publish_scene()
+                self.dsp_obj.update_scene()
+                # get block at position
+                _ = self.dsp_obj.dspin_obj.get_sp_block(sp)  # flake8: noqa
+                # get maximum value of not normalized block
+                amp_unnormalized = int(np.amax(abs(
+                    self.dsp_obj.dspin_obj.sp_block[sp])))
+                # normalize block at position
+                self.dsp_obj.dspin_obj.normalize(sp)
+                # get maximum value of normalized block
+                amp_normalized = int(np.amax(abs(
+                    self.dsp_obj.dspin_obj.sp_block[sp])))
+                if amp_normalized and amp_unnormalized != 0:
+                    division = int(amp_unnormalized / amp_normalized * 1000)
+                    compare = \
+                        int(self.dsp_obj.dspin_obj.sp_max_amp[
+                            sp]/maximum_int16_amplitude * 1000)
+                    if division == compare:
+                        result_test = True
+                    else:
+                        result_test = False
+                        break
+
+        # set self.block_begin_end back to initialize value
+        self.dsp_obj.dspin_obj.init_set_block_begin_end()
+
+        errmsg = "Files were not normalized correctly"
+        self.assertTrue(result_test, msg=errmsg)
+
+    def test_analysis_peak(self):
+        """
+        H2 -- test_analysis_peak
+        ===================
+        **Test whether the maximum amplitude taken from the analysis index
+        equals the maximum amplitude of the whole speaker input**
+
+        Author: Felix Pfreundtner
+        """
+        result_correct = []
+        result_test = []
+        for sp in range(self.dsp_obj.spn):
+            result_correct.append(float(np.amax(np.abs(
+                self.dsp_obj.dspin_obj.sp_input[sp]))))
+            result_test.append(self.dsp_obj.dspin_obj.sp_analysis[sp].peak)
+        errmsg = "analysis index has wrong maximum amplitude"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_analysis_sidecar(self):
+        """
+        H2 -- test_analysis_sidecar
+        ===================
+        **Test whether the analysis index read from the sidecar file equals
+        the index calculated from the speaker input**
+
+        Author: Felix Pfreundtner
+        """
+        sp = 0
+        path = self.state.gui_sp[sp]["path"]
+        analysis_calculated = audio3d.engine.dsp_analysis.DspAnalysis(
+            self.dsp_obj.dspin_obj.samplerate)
+        analysis_calculated.add_samples(self.dsp_obj.dspin_obj.sp_input[sp][
+            0:self.dsp_obj.dspin_obj.sp_param[sp][0]])
+        analysis_calculated.finish()
+        with tempfile.TemporaryDirectory() as directory:
+            # the first call saves the sidecar file, the second loads it
+            for i in range(2):
+                analysis_sidecar = \
+                    audio3d.engine.dsp_analysis.DspAnalysis.for_file(
+                        path, self.dsp_obj.dspin_obj.samplerate,
+                        directory=directory)
+            errmsg = "sidecar file not saved in the cache directory"
+            self.assertEqual(len(os.listdir(directory)), 1, msg=errmsg)
+        errmsg = "sidecar analysis index differs from calculated index"
+        self.assertEqual(analysis_calculated.peak, analysis_sidecar.peak,
+                         msg=errmsg)
+        self.assertAlmostEqual(analysis_calculated.loudness,
+                               analysis_sidecar.loudness, 5, msg=errmsg)
+        self.assertEqual(analysis_calculated.peak_between(0, 44100),
+                         analysis_sidecar.peak_between(0, 44100), msg=errmsg)
+
+    def test_analysis_sidecar_location(self):
+        """
+        H2 -- test_analysis_sidecar_location
+        ===================
+        **Test whether the sidecar file is kept in the cache directory,
+        next to the wave file only if the cache directory is not writable,
+        and whether an unsaved index is reported**
+
+        Author: Felix Pfreundtner
+        """
+        analysis = audio3d.engine.dsp_analysis.DspAnalysis
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "input.wav")
+            scipy.io.wavfile.write(path, 44100,
+                                   np.zeros((4410, ), dtype=np.int16))
+            cache = os.path.join(directory, "cache")
+            sidecar = analysis.sidecar_path(path, cache)
+            errmsg = "sidecar file not in the cache directory"
+            self.assertEqual(os.path.dirname(sidecar), cache, msg=errmsg)
+            # a file instead of a directory can not hold sidecar files
+            blocked = os.path.join(directory, "blocked")
+            open(blocked, "w").close()
+            errmsg = "sidecar file not next to the wave file"
+            self.assertEqual(analysis.sidecar_path(path, blocked),
+                             path + analysis.sidecar_ending, msg=errmsg)
+            index = analysis.for_file(path, 44100, directory=blocked)
+            self.assertTrue(os.path.exists(path + analysis.sidecar_ending),
+                            msg=errmsg)
+            # a failed save is reported instead of ignored
+            os.remove(path + analysis.sidecar_ending)
+            os.mkdir(path + analysis.sidecar_ending)
+            errmsg = "failed save of the sidecar file not reported"
+            with self.assertWarns(RuntimeWarning, msg=errmsg):
+                index.save_sidecar(path, blocked)
+
+    def test_jitter_buffer(self):
+        """
+        H2 -- test_jitter_buffer
+        ===================
+        **Test whether the jitter buffer of live sources returns zeros until
+        it is prefilled and afterwards the captured samples in the correct
+        order**
+
+        Author: Matthias Lederle
+        """
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        jitterbuffer = audio3d.engine.dsp_stream.JitterBuffer(8 * hopsize,
+                                                              2 * hopsize)
+        samples = np.arange(3 * hopsize, dtype=np.float32)
+        block = np.ones((hopsize, ), dtype=np.float32)
+        # not prefilled yet: zeros
+        jitterbuffer.write(samples[:hopsize], 1.0)
+        continue_input, capture_time = jitterbuffer.read_block(block)
+        self.assertTrue(continue_input)
+        self.assertEqual(np.amax(np.abs(block)), 0)
+        # prefilled: samples in correct order
+        jitterbuffer.write(samples[hopsize:], 2.0)
+        jitterbuffer.end()
+        result_test = []
+        continue_input = True
+        while continue_input:
+            continue_input, capture_time = jitterbuffer.read_block(block)
+            result_test.extend(block)
+        errmsg = "jitter buffer returned wrong samples"
+        self.assertEqual(list(samples), result_test, msg=errmsg)
+        self.assertEqual(capture_time, 2.0, msg=errmsg)
+
+    def test_pipe_source_stop(self):
+        """
+        H2 -- test_pipe_source_stop
+        ===================
+        **Test whether a pipe source delivers the written samples and its
+        capture thread ends after stop() while the writing process keeps the
+        pipe open without writing**
+
+        Author: Matthias Lederle
+        """
+        if not hasattr(os, "mkfifo"):
+            self.skipTest("named pipes are not supported")
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "live")
+            os.mkfifo(path)
+            source = audio3d.engine.dsp_stream.PipeSource(44100, hopsize, 1,
+                                                          path)
+            source.start()
+            writer = os.open(path, os.O_WRONLY)
+            samples = np.arange(hopsize, dtype="<i2")
+            os.write(writer, samples.tobytes())
+            block = np.zeros((hopsize, ), dtype=np.float32)
+            start = time.perf_counter()
+            while source.jitterbuffer.written < hopsize and \
+                    time.perf_counter() - start < 5:
+                time.sleep(0.01)
+            source.read_hop(block)
+            errmsg = "pipe source returned wrong samples"
+            self.assertEqual(list(samples), list(block), msg=errmsg)
+            source.stop()
+            source.capture_thread.join(2)
+            errmsg = "capture thread of the stopped pipe source still runs"
+            self.assertFalse(source.capture_thread.is_alive(), msg=errmsg)
+            self.assertTrue(source.jitterbuffer.ended, msg=errmsg)
+            os.close(writer)
+
+    def test_ring_buffer(self):
+        """
+        H2 -- test_ring_buffer
+        ===================
+        **Test whether the ring buffer returns the written blocks in the
+        correct order and reports a full and an empty buffer**
+
+        Author: Matthias Lederle
+        """
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        ring = audio3d.engine.dsp_ring.RingBuffer(4, (hopsize, ), np.float32)
+        result_correct = []
+        result_test = []
+        for block in range(10):
+            slot = ring.write_slot()
+            slot[:] = block
+            ring.commit_write()
+            result_correct.append(block)
+            if block % 2 == 1:
+                for read in range(2):
+                    result_test.append(int(ring.read_slot()[0]))
+                    ring.commit_read()
+        errmsg = "ring buffer returned wrong blocks"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+        self.assertIsNone(ring.read_slot(), msg=errmsg)
+        for block in range(4):
+            ring.write_slot()
+            ring.commit_write()
+        self.assertIsNone(ring.write_slot(), msg=errmsg)
+        self.assertIsNone(ring.write_slot(count=False), msg=errmsg)
+        errmsg = "ring buffer counted a retried block as overrun"
+        self.assertEqual(ring.overruns, 1, msg=errmsg)
+
+    def test_compressed_source(self):
+        """
+        H2 -- test_compressed_source
+        ===================
+        **Test whether a FLAC file decoded by the decoder pool and read
+        through a CompressedSource equals the samples read with soundfile**
+
+        Author: Matthias Lederle
+        """
+        try:
+            import soundfile
+        except ImportError:
+            self.skipTest("package soundfile is not installed")
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        samplerate = self.dsp_obj.dspin_obj.samplerate
+        noise = (np.random.RandomState(0).uniform(-1, 1, 5 * hopsize + 7) *
+                 20000).astype(np.int16)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "noise.flac")
+            soundfile.write(path, noise, samplerate, format="FLAC")
+            result_correct, _ = soundfile.read(path, dtype="int16")
+            pool = audio3d.engine.dsp_decode.DecoderPool(hopsize, samplerate,
+                                                         1)
+            try:
+                source = pool.open(path, slots=4)
+                source.blocking = True
+                block = np.zeros((hopsize, ), dtype=np.float32)
+                result_test = []
+                continue_input = True
+                while continue_input:
+                    continue_input, _ = source.read_hop(block)
+                    result_test.extend(block)
+                source.stop()
+            finally:
+                pool.close()
+        frames = result_correct.shape[0]
+        errmsg = "compressed source returned wrong samples"
+        self.assertEqual(list(result_correct), result_test[:frames],
+                         msg=errmsg)
+        self.assertEqual(np.amax(np.abs(result_test[frames:])), 0,
+                         msg=errmsg)
+
+    def test_buffer_depth_controller(self):
+        """
+        H2 -- test_buffer_depth_controller
+        ===================
+        **Test whether the buffer depth shrinks for short render times and
+        grows after an underrun**
+
+        Author: Felix Pfreundtner
+        """
+        hop_time = self.dsp_obj.dspin_obj.hopsize / \
+            self.dsp_obj.dspin_obj.samplerate
+        controller = audio3d.engine.dsp_buffer.BufferDepthController(
+            hop_time, 8, min_depth=1, max_depth=16, shrink_blocks=10)
+        # render time of a tenth of the block time, spare blocks buffered
+        for block in range(200):
+            controller.update(hop_time / 10, controller.depth + 1, 0)
+        depth_stable = controller.depth
+        change = controller.update(hop_time / 10, 0, 1)
+        errmsg = "Buffer depth was not adapted"
+        self.assertEqual(depth_stable, 2, msg=errmsg)
+        self.assertEqual(change, 1, msg=errmsg)
+        self.assertEqual(controller.metrics()["decisions"][-1][3], "underrun",
+                         msg=errmsg)
+
+    def test_metrics_snapshot(self):
+        """
+        H2 -- test_metrics_snapshot
+        ===================
+        **Test whether the metrics snapshot contains the recorded render
+        times, underruns and PortAudio status flags**
+
+        Author: Felix Pfreundtner
+        """
+        block_time = self.dsp_obj.dspin_obj.hopsize / \
+            self.dsp_obj.dspin_obj.samplerate
+        metrics = audio3d.engine.dsp_metrics.Metrics(block_time)
+        for block in range(10):
+            metrics.record_stage("block", block_time / 2)
+        # callback without block, PortAudio reports output underflow
+        metrics.record_callback(0, True, 4)
+        snapshot = metrics.snapshot()
+        errmsg = "Metrics snapshot is not correct"
+        self.assertEqual(snapshot["blocks"], 10, msg=errmsg)
+        self.assertEqual(sum(snapshot["stages"]["block"]["histogram"]), 10,
+                         msg=errmsg)
+        self.assertAlmostEqual(snapshot["realtime_factor"], 2, msg=errmsg)
+        self.assertEqual(snapshot["underruns"], 1, msg=errmsg)
+        self.assertEqual(snapshot["status"]["output_underflow"], 1,
+                         msg=errmsg)
+
+    def test_record_writer(self):
+        """
+        H2 -- test_record_writer
+        ===================
+        **Test whether the record writer writes all blocks to a readable
+        wave file**
+
+        Author: Matthias Lederle
+        """
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        path = os.path.join(tempfile.mkdtemp(), "record.wav")
+        writer = audio3d.engine.dsp_record.RecordWriter(
+            path, self.dsp_obj.dspin_obj.samplerate)
+        blocks = [np.full((hopsize, 2), block, dtype=np.int16) for block in
+                  range(20)]
+        for block in blocks:
+            writer.write(block)
+        writer.close()
+        _, record = scipy.io.wavfile.read(path)
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+        errmsg = "Record file does not contain the written blocks"
+        self.assertTrue(np.array_equal(record, np.concatenate(blocks)),
+                        msg=errmsg)
+
+    def test_offline_render(self):
+        """
+        H2 -- test_offline_render
+        ===================
+        **Test whether the offline renderer writes a binaural wave file of
+        the scene duration without GUI state and audio device**
+
+        Author: Matthias Lederle
+        """
+        scene = {"sources": [dict(self.state.gui_sp[0])], "duration": 0.5,
+                 "settings": {"hrtf_database": "kemar_compact"}}
+        renderer = audio3d.engine.dsp_offline.OfflineRenderer(scene)
+        path = os.path.join(tempfile.mkdtemp(), "render.wav")
+        result = renderer.render(path)
+        samplerate, render = scipy.io.wavfile.read(path)
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+        hopsize = renderer.dsp_obj.dspin_obj.hopsize
+        errmsg = "Offline render has not the length of the scene duration"
+        self.assertEqual(render.shape, (result["blocks"] * hopsize, 2),
+                         msg=errmsg)
+        self.assertEqual(result["blocks"], np.ceil(0.5 * samplerate /
+                                                   hopsize), msg=errmsg)
+        errmsg = "Offline render is silent"
+        self.assertTrue(np.any(render != 0), msg=errmsg)
+
+    def test_offline_render_parallel(self):
+        """
+        H2 -- test_offline_render_parallel
+        ===================
+        **Test whether the segments rendered in parallel processes join to
+        the same output as the serial render**
+
+        Author: Matthias Lederle
+        """
+        scene = {"sources": [dict(self.state.gui_sp[0]),
+                             dict(self.state.gui_sp[3], start=0.3)],
+                 "duration": 1.0}
+        directory = tempfile.mkdtemp()
+        renders = []
+        for jobs in [1, 3]:
+            path = os.path.join(directory, str(jobs) + ".wav")
+            audio3d.engine.dsp_offline.OfflineRenderer(
+                copy.deepcopy(scene)).render(path, jobs)
+            renders.append(scipy.io.wavfile.read(path)[1])
+            os.remove(path)
+        os.rmdir(directory)
+        errmsg = "Parallel offline render differs from serial render"
+        self.assertTrue(np.array_equal(renders[0], renders[1]), msg=errmsg)
+
+    def test_sharded_render(self):
+        """
+        H2 -- test_sharded_render
+        ===================
+        **Test whether the speakers rendered by several processes mix to the
+        same output as the speakers rendered by one process**
+
+        Author: Felix Pfreundtner
+        """
+        scene = {"sources": [dict(self.state.gui_sp[0]),
+                             dict(self.state.gui_sp[1], normalize=True),
+                             dict(self.state.gui_sp[3], start=0.3)],
+                 "duration": 1.0}
+        directory = tempfile.mkdtemp()
+        renders = []
+        for processes in [1, 2]:
+            scene["settings"] = {"render_processes": processes}
+            path = os.path.join(directory, str(processes) + ".wav")
+            audio3d.engine.dsp_offline.OfflineRenderer(
+                copy.deepcopy(scene)).render(path)
+            renders.append(scipy.io.wavfile.read(path)[1])
+            os.remove(path)
+        os.rmdir(directory)
+        errmsg = "Sharded render differs from render in one process"
+        self.assertTrue(np.array_equal(renders[0], renders[1]), msg=errmsg)
+
+    def test_threaded_render(self):
+        """
+        H2 -- test_threaded_render
+        ===================
+        **Test whether the speakers rendered by a thread pool mix to the same
+        output as the serially rendered speakers, whether few speakers
+        fall back to serial rendering and whether the threads are started
+        when added speakers reach render_threads_min_speakers**
+
+        Author: Felix Pfreundtner
+        """
+        scene = {"sources": [dict(sp) for sp in self.state.gui_sp],
+                 "duration": 1.0}
+        directory = tempfile.mkdtemp()
+        renders = []
+        for threads in [1, 3]:
+            scene["settings"] = {"render_threads": threads,
+                                 "render_threads_min_speakers": 2}
+            path = os.path.join(directory, str(threads) + ".wav")
+            renderer = audio3d.engine.dsp_offline.OfflineRenderer(
+                copy.deepcopy(scene))
+            errmsg = "Thread pool is not used for " + str(threads) + \
+                     " threads"
+            self.assertEqual(renderer.dsp_obj.threadpool is not None,
+                             threads > 1, msg=errmsg)
+            renderer.render(path)
+            renders.append(scipy.io.wavfile.read(path)[1])
+            os.remove(path)
+        os.rmdir(directory)
+        errmsg = "Threaded render differs from serial render"
+        self.assertTrue(np.array_equal(renders[0], renders[1]), msg=errmsg)
+        # fallback: one speaker is rendered serially, the threads start
+        # when the second speaker is added
+        renders = []
+        for threads in [1, 3]:
+            scene = {"sources": [dict(self.state.gui_sp[0])],
+                     "duration": 0.5,
+                     "settings": {"render_threads": threads,
+                                  "render_threads_min_speakers": 2}}
+            renderer = audio3d.engine.dsp_offline.OfflineRenderer(scene)
+            threadpool = renderer.dsp_obj.threadpool
+            blocks = []
+
+            def write(binaural_block):
+                blocks.append(binaural_block.copy())
+                if len(blocks) == 1:
+                    errmsg = "One speaker is not rendered serially"
+                    self.assertTrue(threadpool is None or
+                                    threadpool.started is False, msg=errmsg)
+                    renderer.dsp_obj.add_speaker(
+                        renderer.dsp_obj.prepare_speaker(
+                            dict(self.state.gui_sp[1])))
+
+            renderer.render_blocks(0, renderer.block_count(), write)
+            renderer.dsp_obj.close_workers()
+            renderer.dsp_obj.dspin_obj.close_streams()
+            renders.append(np.concatenate(blocks))
+        errmsg = "Thread pool was not started for the added speaker"
+        self.assertTrue(threadpool.started, msg=errmsg)
+        self.assertEqual(len(threadpool.shards), 3, msg=errmsg)
+        errmsg = "Threaded render of an added speaker differs from serial " \
+                 "render"
+        self.assertTrue(np.array_equal(renders[0], renders[1]), msg=errmsg)
+
+    def test_render_allocations(self):
+        """
+        H2 -- test_render_allocations
+        ===================
+        **Test whether rendering a block in steady state allocates no numpy
+        arrays: only a few small python objects, less than the 4096 bytes
+        of two binaural block outputs, also while recording**
+
+        Author: Felix Pfreundtner
+        """
+        for record in [False, True]:
+            for result in \
+                    audio3d.engine.dsp_benchmarks.benchmark_render_allocations(
+                        sourcenumbers=(1, 4), blocks=20, record=record):
+                errmsg = "Rendering a block of " + str(result["sources"]) + \
+                         " speakers allocates " + \
+                         str(result["allocated_bytes"]) + " bytes"
+                if record is True:
+                    errmsg += " while recording"
+                self.assertLess(result["allocated_bytes"], 4096, msg=errmsg)
+
+    def test_headless_import(self):
+        """
+        H2 -- test_headless_import
+        ===================
+        **Test whether the dsp algorithm can be imported without Qt, OpenGL,
+        PortAudio and pkg_resources**
+
+        Author: Matthias Lederle
+        """
+        for result in audio3d.engine.dsp_benchmarks.benchmark_import(
+                ("audio3d.engine", "audio3d.engine.dsp_offline",
+                 "audio3d.engine.dsp_batch"), repeats=1):
+            errmsg = result["module"] + " can not be imported"
+            self.assertIsNotNone(result["seconds"], msg=errmsg)
+            errmsg = result["module"] + " imports " + \
+                ", ".join(result["loaded"])
+            self.assertEqual(result["loaded"], [], msg=errmsg)
+        state = audio3d.engine.dsp_state.DspState().configure(
+            [{"path": self.state.gui_sp[0]["path"]}], {"bufferblocks": 3})
+        errmsg = "configure() does not set the defaults"
+        self.assertEqual(state.gui_sp[0]["angle"], 0, msg=errmsg)
+        self.assertEqual(state.gui_settings["bufferblocks"], 3, msg=errmsg)
+        self.assertEqual(state.gui_settings["hrtf_database"],
+                         "kemar_normal_ear", msg=errmsg)
+
+    def test_async_engine(self):
+        """
+        H2 -- test_async_engine
+        ===================
+        **Test whether one event loop drives two engines: one plays its scene
+        to the end, the other one is moved, streams metrics and is
+        stopped**
+
+        Author: Matthias Lederle
+        """
+        path = self.state.gui_sp[0]["path"]
+
+        async def drive():
+            engine = audio3d.engine.dsp_async.AsyncEngine(
+                {"audio_backend": "null", "audio_backend_realtime": False})
+            endless = audio3d.engine.dsp_async.AsyncEngine(
+                {"audio_backend": "null"})
+            await engine.start({"sources": [{"path": path, "length": 0.5}]})
+            await endless.start({"sources": [{"path": path, "loop": True,
+                                              "length": 60}]})
+            await endless.update_speaker(0, angle=120)
+            snapshots = []
+            async for snapshot in endless.metrics(0.05):
+                snapshots.append(snapshot)
+                if len(snapshots) == 3:
+                    break
+            status = await engine.wait()
+            endless_status = await endless.stop()
+            return status, endless_status, snapshots, endless
+
+        status, endless_status, snapshots, endless = asyncio.run(drive())
+        errmsg = "Engine did not play the scene without errors"
+        self.assertEqual(status["errors"], [], msg=errmsg)
+        self.assertFalse(status["running"], msg=errmsg)
+        errmsg = "Engine was not stopped"
+        self.assertFalse(endless_status["running"], msg=errmsg)
+        self.assertFalse(endless.state.dsp_run, msg=errmsg)
+        self.assertFalse(endless.dspthread.is_alive(), msg=errmsg)
+        self.assertFalse(endless.dsp_obj.playthread.is_alive(), msg=errmsg)
+        errmsg = "Metrics were not streamed"
+        self.assertEqual(len(snapshots), 3, msg=errmsg)
+        errmsg = "Speaker update was not published"
+        self.assertEqual(endless.state.scene.sp[0]["angle"], 120,
+                         msg=errmsg)
+
+    def test_parameter_events(self):
+        """
+        H2 -- test_parameter_events
+        ===================
+        **Test whether parameter events change the output exactly at their
+        sample: a gain of zero mutes all speakers from the sample on, an
+        angle change leaves the samples before it untouched**
+
+        Author: Felix Pfreundtner
+        """
+        scene = {"sources": [dict(sp) for sp in self.state.gui_sp[:2]],
+                 "duration": 0.5}
+        sample = 10037
+
+        def render(events):
+            renderer = audio3d.engine.dsp_offline.OfflineRenderer(
+                copy.deepcopy(scene))
+            for kind, value, sp in events:
+                renderer.state.dsp_events.push(sample, kind, value, sp=sp,
+                                               ramp=0)
+            blocks = []
+            renderer.render_blocks(0, None,
+                                   lambda block: blocks.append(block.copy()))
+            renderer.dsp_obj.close_workers()
+            renderer.dsp_obj.dspin_obj.close_streams()
+            return np.concatenate(blocks)
+
+        reference = render([])
+        muted = render([("gain", 0.0, 0), ("gain", 0.0, 1)])
+        errmsg = "Gain event changed the samples before its sample"
+        self.assertTrue(np.array_equal(reference[:sample], muted[:sample]),
+                        msg=errmsg)
+        errmsg = "Gain event did not mute the samples from its sample on"
+        self.assertEqual(np.abs(muted[sample:]).max(), 0, msg=errmsg)
+        moved = render([("angle", 150, 0)])
+        errmsg = "Angle event changed the samples before its sample"
+        self.assertTrue(np.array_equal(reference[:sample], moved[:sample]),
+                        msg=errmsg)
+        errmsg = "Angle event did not change the output"
+        self.assertFalse(np.array_equal(reference[sample:], moved[sample:]),
+                         msg=errmsg)
+        errmsg = "Parameter event without speaker was accepted"
+        with self.assertRaises(ValueError, msg=errmsg):
+            audio3d.engine.dsp_events.EventQueue().push(0, "gain", 0.5)
+
+    def test_hot_speakers(self):
+        """
+        H2 -- test_hot_speakers
+        ===================
+        **Test whether a speaker added during rendering plays like a speaker
+        of the scene which starts at the same sample, whether the level of
+        the playing speaker ramps to the new number of slots within one
+        block and whether a removed speaker is faded out and frees its
+        slot**
+
+        Author: Matthias Lederle
+        """
+        first = dict(self.state.gui_sp[0])
+        added = dict(self.state.gui_sp[1])
+        hopsize = 256
+        block = 20
+        removed = 60
+
+        def render(sources, changes, events):
+            renderer = audio3d.engine.dsp_offline.OfflineRenderer(
+                {"sources": copy.deepcopy(sources), "duration": 1.0})
+            for sample, sp in events:
+                renderer.state.dsp_events.push(sample, "gain", 0.0, sp=sp,
+                                               ramp=64)
+            blocks = []
+
+            def write(binaural_block):
+                blocks.append(binaural_block.copy())
+                # the change is applied before the next block
+                if len(blocks) in changes:
+                    changes[len(blocks)](renderer.dsp_obj)
+
+            renderer.render_blocks(0, renderer.block_count(), write)
+            renderer.dsp_obj.close_workers()
+            renderer.dsp_obj.dspin_obj.close_streams()
+            return np.concatenate(blocks), renderer
+
+        # the added speaker starts one hop after the begin of the block
+        start = (block * hopsize + hopsize) / 44100
+        reference, _ = render([first, dict(added, start=start)], {},
+                              [(removed * hopsize, 1)])
+        output, renderer = render(
+            [first],
+            {block: lambda dsp_obj: dsp_obj.add_speaker(
+                dsp_obj.prepare_speaker(added)),
+             removed: lambda dsp_obj: dsp_obj.remove_speaker(1)}, [])
+        alone, _ = render([first], {}, [])
+        errmsg = "Added or removed speaker differs from scene speaker"
+        self.assertTrue(np.array_equal(reference[(block + 1) * hopsize:],
+                                       output[(block + 1) * hopsize:]),
+                        msg=errmsg)
+        # the added speaker is silent in the block of the change, the mix
+        # factor ramps from 1 to 1 / 2
+        errmsg = "Level of the playing speaker jumps when a speaker is added"
+        self.assertTrue(np.array_equal(alone[:block * hopsize],
+                                       output[:block * hopsize]), msg=errmsg)
+        curve = 1 - 0.5 * np.arange(1, hopsize + 1) / hopsize
+        self.assertTrue(np.allclose(
+            output[block * hopsize:(block + 1) * hopsize],
+            alone[block * hopsize:(block + 1) * hopsize] *
+            curve[:, np.newaxis], atol=1), msg=errmsg)
+        errmsg = "Slot of removed speaker was not freed"
+        self.assertEqual(list(renderer.dsp_obj.free_slots), [1], msg=errmsg)
+        self.assertEqual(len(renderer.state.gui_sp), 2, msg=errmsg)
+
+    def test_batch_resume(self):
+        """
+        H2 -- test_batch_resume
+        ===================
+        **Test whether the batch renderer renders all jobs and skips the
+        jobs which are done when it is started again**
+
+        Author: Matthias Lederle
+        """
+        directory = tempfile.mkdtemp()
+        jobs = [{"name": name, "duration": 0.2,
+                 "sources": [dict(self.state.gui_sp[0], angle=angle)],
+                 "output": os.path.join(directory, name + ".wav")} for
+                name, angle in [("front", 0), ("back", 180)]]
+        summaries = []
+        for run in range(2):
+            batch = audio3d.engine.dsp_batch.BatchRenderer(
+                copy.deepcopy(jobs), directory, 2)
+            summaries.append(batch.run())
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+        errmsg = "Batch renderer did not render all jobs"
+        self.assertEqual(summaries[0]["done"], 2, msg=errmsg)
+        errmsg = "Batch renderer did not skip the done jobs"
+        self.assertEqual(summaries[1]["skipped"], 2, msg=errmsg)
+
+    def run_headless(self, settings):
+        """
+        H2 -- run_headless
+        ===================
+        **Runs the whole playback of speaker 0 (first second) with Dsp.run()
+        and the output backend given in settings, without GUI and sound
+        card.**
+
+        Return values:
+
+        * dsp_obj: The Dsp object after the playback
+
+        Author: Felix Pfreundtner
+        """
+        state = audio3d.engine.dsp_state.DspState()
+        state.gui_sp = [dict(self.state.gui_sp[0], length=1.0)]
+        state.gui_settings = dict(self.state.gui_settings, record=False)
+        state.gui_settings.update(settings)
+        state.dsp_stop = False
+        dsp_obj = audio3d.engine.dsp.Dsp(state)
+        dsp_obj.run()
+        state.wait_dsp(lambda: state.dsp_stop is True, timeout=10)
+        return dsp_obj
+
+    def test_wav_backend(self):
+        """
+        H2 -- test_wav_backend
+        ===================
+        **Test whether the playback on the wave file backend gives the same
+        output as the offline render**
+
+        Author: Felix Pfreundtner
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "playback.wav")
+        dsp_obj = self.run_headless({"audio_backend": "wav",
+                                     "audio_backend_path": path})
+        _, playback = scipy.io.wavfile.read(path)
+        os.remove(path)
+        scene = {"sources": [dict(self.state.gui_sp[0], length=1.0)],
+                 "settings": self.state.gui_settings}
+        audio3d.engine.dsp_offline.OfflineRenderer(scene).render(path)
+        _, render = scipy.io.wavfile.read(path)
+        os.remove(path)
+        os.rmdir(directory)
+        errmsg = "Playback on the wave file backend was not successful"
+        self.assertTrue(dsp_obj.dspout_obj.playback_successful, msg=errmsg)
+        errmsg = "Playback on the wave file backend differs from render"
+        self.assertTrue(np.array_equal(playback, render), msg=errmsg)
+
+    def test_null_backend_realtime(self):
+        """
+        H2 -- test_null_backend_realtime
+        ===================
+        **Test whether the null backend plays in real time without
+        underruns**
+
+        Author: Felix Pfreundtner
+        """
+        begin = time.perf_counter()
+        dsp_obj = self.run_headless({"audio_backend": "null",
+                                     "audio_backend_realtime": True})
+        walltime = time.perf_counter() - begin
+        errmsg = "Null backend did not play in real time"
+        self.assertGreater(walltime, 0.9, msg=errmsg)
+        errmsg = "Null backend playback had underruns"
+        self.assertTrue(dsp_obj.dspout_obj.playback_successful, msg=errmsg)
+        self.assertEqual(dsp_obj.metrics.snapshot()["status"][
+            "output_underflow"], 0, msg=errmsg)
+
+    def test_scene_snapshot(self):
+        """
+        H2 -- test_scene_snapshot
+        ===================
+        **Test whether a published scene snapshot is immutable and the next
+        block is rendered with the newest snapshot**
+
+        Author: Felix Pfreundtner
+        """
+        scene = self.state.publish_scene()
+        self.state.gui_sp[0]["angle"] = 45
+        errmsg = "Published scene snapshot changed with gui_sp"
+        self.assertEqual(scene.sp[0]["angle"], 90, msg=errmsg)
+        errmsg = "Published scene snapshot is not read only"
+        with self.assertRaises(TypeError, msg=errmsg):
+            scene.sp[0]["angle"] = 45
+        self.state.publish_scene()
+        self.dsp_obj.render_block(0)
+        errmsg = "Block was not rendered with the newest scene snapshot"
+        self.assertEqual(self.dsp_obj.prior_head_angle[0], 45, msg=errmsg)
+        self.assertEqual(self.dsp_obj.scene.version, scene.version + 1,
+                         msg=errmsg)
+
+    def test_set_fftfreq(self):
+        """
+        H2 -- test_set_fftfreq
+        ===================
+        **Tests whether calculates the correct number of fft frequency values
+         for given input paramaters**
+
+        Author: Felix Pfreundtner
+        """
+        fft_blocksize = 1024
+        samplerate = 44100
+        result_correct = (fft_blocksize // 2 + 1) * self.dsp_obj.spn
+
+        self.dsp_obj.dspin_obj.set_fftfreq(fft_blocksize, samplerate)
+        result_test = 0
+        for sp in range(self.dsp_obj.spn):
+            result_test += len(self.state.dsp_sp_spectrum[sp][:, 0])
+
+        errmsg = "Wrong number of frequency points in spectrum"
+        self.assertEqual(result_correct, result_test, msg=errmsg)
+
+    def test_overlap_add(self):
+        """
+        H2 -- test_overlap_add
+        ===================
+        **Tests whether overlap add algorithm calculates the correct block
+        output sizes**
+
+        Author: Felix Pfreundtner
+        """
+        # standard parameter
+        fft_blocksize = 1024
+        hopsize = 256
+
+        iteration_number = 5
+        length_out_correct = hopsize
+        length_add_correct = fft_blocksize - hopsize
+        result = True
+        # run 5 iterations
+        for blockcounter in range(iteration_number):
+            # set position in speaker file
+            self.dsp_obj.dspin_obj.set_block_begin_end()
+            for sp in range(self.dsp_obj.spn):
+                # get block at position
+                _ = self.dsp_obj.dspin_obj.get_sp_block(sp)  # flake8: noqa
+                # get hrtfs for speaker
+                self.dsp_obj.dspin_obj.get_hrtf_block_fft(sp)
+                # for left and right ear
+                for l_r in range(2):
+                    # convolve block
+                    self.dsp_obj.dspout_obj.sp_binaural_block[sp][:, l_r] = \
+                        self.dsp_obj.dspin_obj.fft_convolution(sp, l_r)
+                    # apply overlap_add algorithm
+                    self.dsp_obj.dspout_obj.overlap_add(fft_blocksize, hopsize,
+                                                        sp)
+                    # length (now played) out part
+                    length_out = len(
+                        self.dsp_obj.dspout_obj.sp_binaural_block_out[sp])
+                    # length (later played) add part
+                    lenght_add = len(
+                        self.dsp_obj.dspout_obj.sp_binaural_block_add[sp])
+
+                    if length_out != length_out_correct or lenght_add != \
+                            length_add_correct:
+                        result = False
+                        break
+
+        # set self.block_begin_end back to initialize value
+        self.dsp_obj.dspin_obj.init_set_block_begin_end()
+
+        errmsg = "Wrong output of overlap add algorithm"
+        self.assertTrue(result, msg=errmsg)
+
+    def test_overlap_add_circular(self):
+        """
+        H2 -- test_overlap_add_circular
+        ===================
+        **Test whether overlap add with the circular accumulator gives
+        exactly the output of shifting the remaining block output of prior
+        ffts every block, also if hopsize does not divide the
+        accumulator, and whether overlap add of all speakers at once equals
+        overlap add speaker by speaker**
+
+        Author: Felix Pfreundtner
+        """
+        fft_blocksize = 1024
+        random = np.random.RandomState(0)
+        result = True
+        for hopsize in [256, 300]:
+            dspout_obj = audio3d.engine.dsp_out.DspOut(
+                self.state, fft_blocksize, hopsize)
+            dspout_obj_sp = audio3d.engine.dsp_out.DspOut(
+                self.state, fft_blocksize, hopsize)
+            sps = range(dspout_obj.spn)
+            sp_binaural_block_add = np.zeros((dspout_obj.spn, fft_blocksize -
+                                              hopsize, 2), dtype=np.float32)
+            for blockcounter in range(10):
+                # at most four blocks overlap: no clipping
+                dspout_obj.sp_binaural_block[:] = random.uniform(
+                    -8000, 8000, dspout_obj.sp_binaural_block.shape)
+                dspout_obj.overlap_add(fft_blocksize, hopsize, sps)
+                dspout_obj_sp.sp_binaural_block[:] = \
+                    dspout_obj.sp_binaural_block
+                for sp in sps:
+                    dspout_obj_sp.overlap_add(fft_blocksize, hopsize, sp)
+                sp_binaural_block = dspout_obj.sp_binaural_block
+                sp_binaural_block_out = sp_binaural_block[:, 0:hopsize] + \
+                    sp_binaural_block_add[:, 0:hopsize]
+                sp_binaural_block_add_new = np.zeros_like(
+                    sp_binaural_block_add)
+                sp_binaural_block_add_new[:, 0:fft_blocksize - 2 * hopsize] = \
+                    sp_binaural_block_add[:, hopsize:]
+                sp_binaural_block_add_new += sp_binaural_block[:, hopsize:]
+                sp_binaural_block_add = sp_binaural_block_add_new
+                result = result and np.array_equal(
+                    dspout_obj.sp_binaural_block_out, sp_binaural_block_out) \
+                    and np.array_equal(dspout_obj_sp.sp_binaural_block_out,
+                                       sp_binaural_block_out)
+
+        errmsg = "Circular overlap add differs from shifted overlap add"
+        self.assertTrue(result, msg=errmsg)
+
+    def test_fft_convolution_block(self):
+        """
+        H2 -- test_fft_convolution_block
+        ===================
+        **Test whether the state of all speakers is kept in one array and the
+        convolution of all speakers at once equals the convolution of every
+        single speaker**
+
+        Author: Matthias Lederle
+        """
+        dspin_obj = self.dsp_obj.dspin_obj
+        spn = self.dsp_obj.spn
+        dspin_obj.set_block_begin_end()
+        for sp in range(spn):
+            dspin_obj.get_sp_block(sp)
+            dspin_obj.get_hrtf_block_fft(sp)
+        dspin_obj.apply_window_on_sp_block(range(spn))
+        block = dspin_obj.fft_convolution_block(range(spn))
+        result = dspin_obj.sp_block.shape == (spn, dspin_obj.sp_blocksize) \
+            and self.dsp_obj.dspout_obj.sp_binaural_block.shape == block.shape
+        for sp in range(spn):
+            for l_r in range(2):
+                result = result and np.array_equal(
+                    block[sp, :, l_r], dspin_obj.fft_convolution(sp, l_r))
+        dspin_obj.init_set_block_begin_end()
+
+        errmsg = "Convolution of all speakers differs from single speakers"
+        self.assertTrue(result, msg=errmsg)
+
+    def test_playring(self):
+        """
+        H2 -- test_playring
+        ===================
+        **Test whether the PortAudio callback returns the binaural blocks in
+        the order they were added and counts an underrun**
+
+        Author: Felix Pfreundtner
+        """
+        dspout_obj = self.dsp_obj.dspout_obj
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        time_info = {"output_buffer_dac_time": 0, "current_time": 0}
+        result_test = []
+        for block in range(3):
+            dspout_obj.binaural_block = np.full((hopsize, 2), block,
+                                                dtype=np.float32)
+            dspout_obj.add_to_playqueue()
+        for block in range(3):
+            data, _ = dspout_obj.callback(None, hopsize, time_info, 0)
+            result_test.append(int(np.asarray(data)[0, 0]))
+        # empty ring buffer: underrun
+        dspout_obj.callback(None, hopsize, time_info, 0)
+        status = dspout_obj.playback_status()
+        errmsg = "Playback ring buffer returned wrong blocks"
+        self.assertEqual(result_test, [0, 1, 2], msg=errmsg)
+        self.assertEqual(status["underruns"], 1, msg=errmsg)
+        self.assertEqual(status["fill_level"], 0, msg=errmsg)
+
+    def test_pull_mode_fallback(self):
+        """
+        H2 -- test_pull_mode_fallback
+        ===================
+        **Test whether the callback renders the blocks itself in pull mode
+        and falls back to the queued mode after missed deadlines**
+
+        Author: Felix Pfreundtner
+        """
+        self.state.gui_settings["record"] = False
+        # render_pull() renders nothing while the dsp algorithm is stopped
+        self.state.dsp_stop = False
+        dspout_obj = self.dsp_obj.dspout_obj
+        hopsize = self.dsp_obj.dspin_obj.hopsize
+        time_info = {"output_buffer_dac_time": 0, "current_time": 0}
+        dspout_obj.pull_mode = True
+        dspout_obj.pull_render = self.dsp_obj.render_pull
+        dspout_obj.pull_deadline = 10
+        data, _ = dspout_obj.callback(None, hopsize, time_info, 0)
+        errmsg = "Callback did not render the block in pull mode"
+        self.assertEqual(np.asarray(data).shape, (hopsize, 2), msg=errmsg)
+        self.assertEqual(dspout_obj.played_block_counter, 1, msg=errmsg)
+        # every block misses its deadline
+        dspout_obj.pull_deadline = 0
+        for block in range(dspout_obj.pull_max_misses):
+            dspout_obj.callback(None, hopsize, time_info, 0)
+        data, _ = dspout_obj.callback(None, hopsize, time_info, 0)
+        # set self.block_begin_end and dsp_stop back to initialize value
+        self.dsp_obj.dspin_obj.block_begin_end = \
+            self.dsp_obj.dspin_obj.init_set_block_begin_end()
+        self.state.dsp_stop = True
+
+        errmsg = "Pull mode did not fall back to queued mode"
+        self.assertFalse(dspout_obj.pull_mode, msg=errmsg)
+        self.assertTrue(dspout_obj.pull_handover, msg=errmsg)
+        self.assertFalse(np.any(np.asarray(data)), msg=errmsg)
+
+    def test_pull_mode_handover(self):
+        """
+        H2 -- test_pull_mode_handover
+        ===================
+        **Test whether the dsp thread continues with the next block number
+        when the pull mode falls back to the queued mode**
+
+        Author: Felix Pfreundtner
+        """
+        state = audio3d.engine.dsp_state.DspState()
+        state.gui_sp = [dict(self.state.gui_sp[0], length=0.5)]
+        state.gui_settings = dict(self.state.gui_settings, record=False,
+                                  audio_backend="null", pull_mode=True,
+                                  pull_deadline=0, pull_max_misses=3)
+        state.dsp_stop = False
+        dsp_obj = audio3d.engine.dsp.Dsp(state)
+        blocknumbers = []
+        render_block = dsp_obj.render_block
+
+        def render_block_logged(blocknumber):
+            blocknumbers.append(blocknumber)
+            render_block(blocknumber)
+        dsp_obj.render_block = render_block_logged
+        dsp_obj.run()
+        state.wait_dsp(lambda: state.dsp_stop is True, timeout=10)
+        errmsg = "Pull mode did not fall back to queued mode"
+        self.assertFalse(dsp_obj.dspout_obj.pull_mode, msg=errmsg)
+        self.assertEqual(dsp_obj.dspout_obj.pull_deadline_misses, 3,
+                         msg=errmsg)
+        errmsg = "Block numbers are not continued after the fallback"
+        self.assertEqual(blocknumbers, list(range(len(blocknumbers))),
+                         msg=errmsg)
+
+    def test_mix_binaural_block(self):
+        """
+        **Test whether final binaural block output has a higher amplitude
+        than int16 maximum allows, which would lead to clipping in PortAudio**
+
+        Author: Felix Pfreundtner
+        """
+        # standard parameter
+        fft_blocksize = 1024
+        hopsize = 256
+        maximum_int16_amplitude = 32767
+
+        iteration_number = 300
+        result = True
+        # run 300 iterations
+        for blockcounter in range(iteration_number):
+            # set position in speaker file
+            self.dsp_obj.dspin_obj.set_block_begin_end()
+            for sp in range(self.dsp_obj.spn):
+
+                # set gui maximum volume settings and publish them to the dsp
+                self.state.gui_sp[sp]["distance"] = 0
+                self.state.gui_sp[sp]["normalize"] = True
+                self.state.publish_scene()
+                self.dsp_obj.update_scene()
+
+                # get block at position
+                _ = self.dsp_obj.dspin_obj.get_sp_block(sp)
+                # get hrtfs for speaker
+                self.dsp_obj.dspin_obj.get_hrtf_block_fft(sp)
+                # for left and right ear
+                for l_r in range(2):
+                    # convolve block
+                    self.dsp_obj.dspout_obj.sp_binaural_block[sp][:, l_r] = \
+                        self.dsp_obj.dspin_obj.fft_convolution(sp, l_r)
+                    # apply overlap_add algorithm
+                    self.dsp_obj.dspout_obj.overlap_add(fft_blocksize, hopsize,
+                                                        sp)
+            # mix all speaker binaural blocks to one binaural block output
+            self.dsp_obj.dspout_obj.mix_binaural_block(hopsize)
+            amplitude_binaural_block = np.amax(abs(
+                self.dsp_obj.dspout_obj.binaural_block))
+            if amplitude_binaural_block > maximum_int16_amplitude:
+                result = False
+                break
+
+        # set self.block_begin_end back to initialize value
+        self.dsp_obj.dspin_obj.init_set_block_begin_end()
+
+        errmsg = "To high 16 bit integer amplitude in binaural output -> " \
+                 "clipping"
+        self.assertTrue(result, msg=errmsg)
+
+        self.dsp_obj.dspout_obj.mix_binaural_block(hopsize)
+
+if __name__ == '__main__':
+    unittest.main()
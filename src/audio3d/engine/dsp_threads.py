@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Author: Felix Pfreundtner, Matthias Lederle
+
+import threading
+
+
+class SpeakerThreadPool:
+    """
+    SpeakerThreadPool
+    ************************
+    **This class renders the speakers of a Dsp object with a pool of
+    persistent threads.**
+
+    The speakers are distributed round robin over threads shards. The
+    calling dsp thread renders the first shard itself, every other shard
+    has its own thread which lives as long as the pool. numpy releases the
+    GIL during the FFTs and the array operations of the convolution, so the
+    shards are rendered in parallel although the threads share one
+    interpreter. Every speaker is only touched by the thread of its shard
+    and the threads are synchronised by one barrier at the begin and one at
+    the end of every block, so no further locks are needed.
+
+    With less than min_speakers speakers the synchronisation of the threads
+    costs more than it saves: the speakers are rendered serially and the
+    threads are only started when resize() gets min_speakers speakers.
+
+    Authors: Felix Pfreundtner, Matthias Lederle
+    """
+    def __init__(self, render_sps, spn, threads, min_speakers=1):
+        """
+        **__init__ gets the function render_sps(sps, blocknumber) which
+        renders the speakers sps, the number of speakers, the number of
+        threads and the number of speakers from which on the threads are
+        used.**
+
+        Authors: Felix Pfreundtner, Matthias Lederle
+        """
+        self.render_sps = render_sps
+        self.threadnumber = max(1, threads)
+        self.min_speakers = min_speakers
+        self.barrier = threading.Barrier(self.threadnumber)
+        # block which is rendered by the threads
+        self.blocknumber = 0
+        # exceptions raised by the threads in the current block
+        self.errors = []
+        self.closed = False
+        # whether the threads have been started
+        self.started = False
+        self.threads = []
+        self.resize(spn)
+
+    def start(self):
+        """
+        H2 -- start
+        ===================
+        **Starts the threads of the pool once.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.started is True:
+            return
+        self.started = True
+        for shard in range(1, self.threadnumber):
+            thread = threading.Thread(target=self.render_loop, args=(shard, ))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def render_shard(self, shard):
+        """
+        H2 -- render_shard
+        ===================
+        **Renders all speakers of shard in the current block.**
+
+        Author: Felix Pfreundtner
+        """
+        # more threads than speakers: nothing to render
+        if len(shard) == 0:
+            return
+        try:
+            self.render_sps(shard, self.blocknumber)
+        except Exception as error:
+            self.errors.append(error)
+
+    def render_loop(self, shard):
+        """
+        H2 -- render_loop
+        ===================
+        **Main loop of a pool thread: renders the speakers of shard number
+        shard in every block until the pool is closed.**
+
+        Author: Felix Pfreundtner
+        """
+        while True:
+            self.barrier.wait()
+            if self.closed is True:
+                break
+            self.render_shard(self.shards[shard])
+            self.barrier.wait()
+
+    def render(self, blocknumber):
+        """
+        H2 -- render
+        ===================
+        **Renders block blocknumber of all speakers and returns when all
+        threads are finished.**
+
+        An exception of a thread is raised again in the calling thread.
+
+        Author: Felix Pfreundtner
+        """
+        if self.started is False:
+            self.render_sps(self.shards[0], blocknumber)
+            return
+        self.blocknumber = blocknumber
+        # start the block in all threads and render the first shard
+        self.barrier.wait()
+        self.render_shard(self.shards[0])
+        self.barrier.wait()
+        if len(self.errors) > 0:
+            error = self.errors[0]
+            self.errors = []
+            raise error
+
+    def resize(self, spn):
+        """
+        H2 -- resize
+        ===================
+        **Distributes spn speakers over the threads after speakers were
+        added. Called between two blocks.**
+
+        The threads are started when the pool gets min_speakers speakers,
+        until then all speakers are in the first shard, which is rendered
+        by the calling thread.
+
+        Author: Felix Pfreundtner
+        """
+        if spn >= self.min_speakers and self.threadnumber > 1:
+            self.start()
+        threads = self.threadnumber if self.started is True else 1
+        self.shards = [range(shard, spn, threads) for shard in
+                       range(threads)]
+
+    def close(self):
+        """
+        H2 -- close
+        ===================
+        **Ends all threads of the pool.**
+
+        Author: Felix Pfreundtner
+        """
+        if self.closed is True:
+            return
+        self.closed = True
+        if self.started is False:
+            return
+        self.barrier.wait()
+        for thread in self.threads:
+            thread.join()
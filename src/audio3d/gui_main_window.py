@@ -5,7 +5,7 @@
 from PySide import QtCore, QtGui
 from math import acos, degrees
 import audio3d.gui_utils
-from audio3d.dsp import Dsp
+from audio3d.engine.dsp import Dsp
 import threading
 
 
@@ -164,11 +164,13 @@ class MainWindow(QtGui.QWidget):
         for each speaker**
         It is called every 10 ms by a timer and updating the speaker 
         list for every present speaker.
-        A threading.Lock() avoids read-write overlaps of the dsp_run variable.
+        The new positions of all speakers are published together as one
+        snapshot to the dsp thread.
         """
         if self.state.dsp_run is True:
             for speaker in self.state.speaker_list:
-                speaker.cal_rel_pos(deg)
+                speaker.cal_rel_pos(deg, publish=False)
+            self.state.publish_scene()
 
     def inverse_disable(self):
         """
@@ -197,11 +199,8 @@ class MainWindow(QtGui.QWidget):
         instantaneous settings respectively, is opened to define/change the
         individual speaker settings.
         The change_property function is called to save changes.
-        A threading.Lock() avoids read-write overlaps of the gui_sp
-        variable.
         """
         sp = self.state.speaker_to_show
-        self.state.mtx_sp.acquire()
         path = str(self.state.gui_sp[sp]["path"])
         azimuth = "{:.0f}".format(self.state.gui_sp[sp]["angle"])
         dist = "{:.2f}".format(self.state.gui_sp[sp]["distance"])
@@ -211,7 +210,6 @@ class MainWindow(QtGui.QWidget):
         else:
             self.speaker_property.normalize_box.setCheckState(
                 QtCore.Qt.Unchecked)
-        self.state.mtx_sp.release()
         self.speaker_property.path_line_edit.setText(path)
         self.speaker_property.azimuth_line_edit.setText(azimuth)
         self.speaker_property.distance_line_edit.setText(dist)
@@ -225,8 +223,7 @@ class MainWindow(QtGui.QWidget):
         ===================
         **With this function transfers the speaker property changes and updates
         the speaker list and gui_sp variables.**
-        A threading.Lock() avoids read-write overlaps of the gui_sp
-        variable.
+        The changed gui_sp is published as new snapshot to the dsp thread.
         """
         sp = self.state.speaker_to_show
         x_new = self.speaker_property.posx
@@ -235,12 +232,11 @@ class MainWindow(QtGui.QWidget):
         self.state.speaker_list[sp].setPos(x_new, y_new)
         self.state.speaker_list[sp].path = path_new
         self.state.speaker_list[sp].cal_rel_pos()
-        self.state.mtx_sp.acquire()
         if self.speaker_property.normalize_box.isChecked():
             self.state.gui_sp[sp]["normalize"] = True
         else:
             self.state.gui_sp[sp]["normalize"] = False
-        self.state.mtx_sp.release()
+        self.state.publish_scene()
 
     @QtCore.Slot()
     def add_speaker(self):
@@ -342,9 +338,8 @@ class MainWindow(QtGui.QWidget):
 
         self.room.clear()
 
-        self.state.mtx_sp.acquire()
         del self.state.gui_sp[:]
-        self.state.mtx_sp.release()
+        self.state.publish_scene()
 
         del self.state.speaker_list[:]
         new_audience = audio3d.gui_utils.Audience(self.state)
@@ -4,6 +4,7 @@
 
 import unittest
 import audio3d.gui_utils
+import threading
 import sys
 
 
@@ -68,6 +69,24 @@ class GuiTests(unittest.TestCase):
         error_msg = "test_switch_pause_playback failed!"
         self.assertEqual(sol, False, msg=error_msg)
 
+    def test_wait_dsp_resume(self):
+        """
+        H2 -- test_wait_dsp_resume
+        ===================
+        **This tests whether wait_dsp() from gui_utils is woken up by a
+        resume of the playback in another thread.**
+        """
+        self.state.dsp_stop = False
+        self.state.dsp_pause = True
+        resume = threading.Timer(0.05, self.state.switch_pause_playback)
+        resume.start()
+        sol = self.state.wait_dsp(lambda: self.state.dsp_pause is False,
+                                  timeout=5)
+        resume.join()
+        self.state.dsp_stop = True
+        error_msg = "test_wait_dsp_resume failed!"
+        self.assertEqual(sol, True, msg=error_msg)
+
     def test_get_bound_pos_negative(self):
         """
         H2 -- test_get_bound_pos_negative
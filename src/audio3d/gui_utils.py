@@ -7,55 +7,24 @@ from audio3d.gui_plot import GLPlotWidget
 from audio3d.headtracker_dt2 import DT2
 from math import acos, degrees, cos, sin, radians
 import audio3d.headtracker_data as headtracker
-import threading
-import pkg_resources
+import audio3d.engine.dsp_state
+import audio3d.engine.dsp_resources
 
 
-class State(QtCore.QObject):
+class State(QtCore.QObject, audio3d.engine.dsp_state.DspState):
     """
     H1 -- State
     ************************
     **This is an exchange class for variables which are exchanged between DSP
     algorithm and all GUI applications and the corresponding mutex locks.**
+
+    The variables and locks of the DSP algorithm are inherited from
+    audio3d.engine.dsp_state.DspState.
     """
 
     def __init__(self):
         super(State, self).__init__()
-        # variables which are shared between gui and dsp algorithm
-        # at creation of the dsp object in GUI MainWindow play() the dsp thread
-        # gets access to the same instance which gui thread uses
-
-        # list with a dictionary for every speaker, which saves current
-        # azimuth angle between head and speaker position, the distance
-        # to the head, the file path to the speaker wave input file and an
-        # information whether normalize box was checked
-        self.gui_sp = []
-        # in this variable is saved how many bufferblocks are selected,
-        # whether inverse filter was activated and which hrtf database is
-        # selected
-        self.gui_settings = {}
-        # a error variable which is read from gui to show an error box
-        self.gui_error = []
-        # variables which shows whether dsp algorithm is currently running
-        self.dsp_run = False
-        # variables wich shows whether dsp algorithm was stopped
-        self.dsp_stop = True
-        # variables wich shows whether dsp algorithm is paused
-        self.dsp_pause = False
-        # variable with current block magnitude spectrum values for all speakers
-        self.dsp_sp_spectrum = []
-        # variable with current block magnitude spectrum values for all
-        # speakers and there corresponding current hrtfs for the left and
-        # right ear
-        self.dsp_hrtf_spectrum = []
-
-        # mutex for exchanging data between gui and dsp algorithm
-        self.mtx_sp = threading.Lock()
-        self.mtx_settings = threading.Lock()
-        self.mtx_error = threading.Lock()
-        self.mtx_run = threading.Lock()
-        self.mtx_stop = threading.Lock()
-        self.mtx_pause = threading.Lock()
+        audio3d.engine.dsp_state.DspState.__init__(self)
 
         # gui state variables
         # enable head tracker
@@ -65,49 +34,6 @@ class State(QtCore.QObject):
         self.speaker_list = []
         self.speaker_to_show = 0
 
-    def switch_stop_playback(self):
-        """
-        H2 -- switch_stop_playback
-        ===================
-        **This function is called from the MainWindow Play/Stop button and
-        remembers the state and transfers to a DSP command.**
-        """
-        self.mtx_stop.acquire()
-        if self.dsp_stop is False:
-            self.dsp_stop = True
-        else:
-            self.dsp_stop = False
-        self.mtx_stop.release()
-
-    def switch_pause_playback(self):
-        """
-        H2 -- switch_pause_playback
-        ===================
-        **This function is called from the MainWindow Pause button and
-        remembers the state and transfers to respective DSP command.**
-        """
-        # start pause
-        self.mtx_pause.acquire()
-        if self.dsp_pause is False:
-            self.dsp_pause = True
-        # end pause
-        else:
-            self.dsp_pause = False
-        self.mtx_pause.release()
-
-    def send_error(self, message):
-        """
-        H2 -- send_error
-        ===================
-        **The function can be used by the DSP classes to create case-specific
-        error messages.**
-        """
-
-        self.mtx_error.acquire()
-        if message not in self.gui_error:
-            self.gui_error.append(message)
-        self.mtx_error.release()
-
     def check_error(self):
         """
         H2 -- check_error
@@ -117,10 +43,16 @@ class State(QtCore.QObject):
 
         self.mtx_error.acquire()
         if len(self.gui_error) > 0:
+            message = self.gui_error.pop(0)
+        else:
+            message = None
+        self.mtx_error.release()
+        # show the message box after releasing the mutex: the dsp thread
+        # must not wait while the box is open
+        if message is not None:
             msgbox = QtGui.QMessageBox()
-            msgbox.setText(self.gui_error.pop(0))
+            msgbox.setText(message)
             msgbox.exec_()
-        self.mtx_error.release()
 
 
 class Headtracker(object):
@@ -427,21 +359,19 @@ class Speaker(Item):
         speaker_list = self.state.speaker_list
         self.index = index
         image_path = 'image/speaker' + str(index + 1) + '.png'
-        self.origin_image = QtGui.QImage(pkg_resources.resource_filename(
-            "audio3d", image_path))
+        self.origin_image = QtGui.QImage(
+            audio3d.engine.dsp_resources.resource_filename(image_path))
         super(Speaker, self).__init__(state)
         self.setPos(posx, posy)
         self.path = path
         self.norm = norm
         self.signal_handler = SignalHandler(self.index)
         speaker_list.append(self)
-        self.state.mtx_sp.acquire()
         self.state.gui_sp.append({"angle": None, "distance": None, "path":
                                   self.path, "normalize": self.norm})
-        self.state.mtx_sp.release()
         self.cal_rel_pos()
 
-    def cal_rel_pos(self, head_deg=0):
+    def cal_rel_pos(self, head_deg=0, publish=True):
         """
         H2 -- cal_rel_pos
         ===================
@@ -450,6 +380,8 @@ class Speaker(Item):
         clockwise) and the distance.**
         *head_deg: takes the azimuthal angle set by the headtracker
         into account
+        *publish: publish the new position at once to the dsp thread (False
+        if the caller publishes all speakers together)
         """
 
         dx = self.x() - self.state.audience_pos.x()
@@ -468,12 +400,12 @@ class Speaker(Item):
 
         if deg <= 0:
             deg += 360
-        self.state.mtx_sp.acquire()
         # write new relative position in exchange variable gui - dsp
         self.state.gui_sp[self.index]["angle"] = deg
         self.state.gui_sp[self.index]["distance"] = dis / 100
         self.state.gui_sp[self.index]["path"] = self.path
-        self.state.mtx_sp.release()
+        if publish is True:
+            self.state.publish_scene()
         return deg, dis
 
     def mouseDoubleClickEvent(self, event):
@@ -503,7 +435,7 @@ class Audience(Item):
 
     type = 'audience'
     origin_image = QtGui.QImage(
-        pkg_resources.resource_filename("audio3d", 'image/audience.png'))
+        audio3d.engine.dsp_resources.resource_filename('image/audience.png'))
 
     def __init__(self, state):
         self.state = state
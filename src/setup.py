@@ -8,10 +8,17 @@ setup(
     package_data = {
         'audio3d': ['*.png','*.wav'],
     },
-    install_requires = ['scipy','numpy','pyopengl','pyaudio','pyside'],
+    install_requires = ['scipy','numpy'],
+    extras_require = {
+        'gui': ['pyopengl','pyaudio','pyside'],
+        'portaudio': ['pyaudio'],
+        'compressed': ['soundfile'],
+    },
     entry_points={
         'console_scripts': [
             'audio3d = audio3d.__main__:main',
+            'audio3d-render = audio3d.engine.dsp_offline:main',
+            'audio3d-batch = audio3d.engine.dsp_batch:main',
         ],
     }
 